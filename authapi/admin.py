@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
-from authapi.models import User, Hotel, Review, Room, Booking
+from authapi.models import User, Hotel, Review, Room, Booking, RateRule
 
 # Register your models here.
 class UserModelAdmin(BaseUserAdmin):
@@ -33,9 +33,28 @@ class UserModelAdmin(BaseUserAdmin):
     filter_horizontal = []
 
 
+class RoomModelAdmin(admin.ModelAdmin):
+    # Room.__str__ reads the hotel name
+    list_select_related = ["hotel_id"]
+    raw_id_fields = ["hotel_id"]
+
+
+class BookingModelAdmin(admin.ModelAdmin):
+    # Booking.__str__ reads the room number, and a <select> of every room would fetch every hotel
+    list_select_related = ["room_id"]
+    raw_id_fields = ["room_id"]
+
+
+class RateRuleModelAdmin(admin.ModelAdmin):
+    list_display = ["hotel_id", "room_type", "start_date", "end_date", "weekdays", "percent", "priority"]
+    list_select_related = ["hotel_id"]
+    raw_id_fields = ["hotel_id"]
+
+
 # Now register the new UserModelAdmin...
 admin.site.register(User, UserModelAdmin)
 admin.site.register(Hotel)
-admin.site.register(Booking)
-admin.site.register(Room)
-admin.site.register(Review)
\ No newline at end of file
+admin.site.register(Booking, BookingModelAdmin)
+admin.site.register(Room, RoomModelAdmin)
+admin.site.register(Review)
+admin.site.register(RateRule, RateRuleModelAdmin)
\ No newline at end of file
@@ -0,0 +1,62 @@
+import numpy as np
+from django.db.models import F
+
+from .models import Room, Booking
+
+
+def occupancy(hotel_id, start, end):
+    """
+    Rooms sold, occupancy, revenue and ADR of a hotel for every night from ``start`` to ``end - 1``.
+
+    A booking occupies its room from the check-in night up to the night
+    before check-out, the nights it is charged for, and its total price is
+    spread evenly over those nights. Bookings overlapping the window are
+    read with one ``values_list`` query and swept with difference arrays, so
+    the cost is O(bookings + nights). Bookings without a night, which sell
+    nothing, are left out.
+    """
+    rooms = Room.objects.filter(hotel_id=hotel_id).count()
+    rows = list(Booking.objects.filter(room_id__hotel_id=hotel_id, check_in_date__lt=end, check_out_date__gt=start)
+                .filter(check_out_date__gt=F('check_in_date'))
+                .values_list('check_in_date', 'check_out_date', 'total_price'))
+    nights = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D'))
+    sold = np.zeros(len(nights) + 1, dtype=np.int64)
+    revenue = np.zeros(len(nights) + 1, dtype=np.float64)
+    if rows:
+        check_ins, check_outs, prices = zip(*rows)
+        check_ins = np.array(check_ins, dtype='datetime64[D]')
+        check_outs = np.array(check_outs, dtype='datetime64[D]')
+        nightly = np.array(prices, dtype=np.float64) / (check_outs - check_ins).astype(np.int64)
+        first = np.clip((check_ins - nights[0]).astype(np.int64), 0, len(nights))
+        last = np.clip((check_outs - nights[0]).astype(np.int64), 0, len(nights))
+        np.add.at(sold, first, 1)
+        np.add.at(sold, last, -1)
+        np.add.at(revenue, first, nightly)
+        np.add.at(revenue, last, -nightly)
+    sold = np.cumsum(sold)[:-1]
+    revenue = np.cumsum(revenue)[:-1]
+
+    days = [{
+        "date": night.item(),
+        "rooms_sold": int(count),
+        "occupancy": percent(count, rooms),
+        "revenue": round(float(amount), 2),
+        "adr": round(float(amount) / count, 2) if count else None,
+    } for night, count, amount in zip(nights, sold, revenue)]
+    total_sold = int(sold.sum())
+    total_revenue = float(revenue.sum())
+    return {
+        "rooms": rooms,
+        "summary": {
+            "rooms_sold": total_sold,
+            "occupancy": percent(total_sold, rooms * len(nights)),
+            "revenue": round(total_revenue, 2),
+            "adr": round(total_revenue / total_sold, 2) if total_sold else None,
+            "revpar": round(total_revenue / (rooms * len(nights)), 2) if rooms and len(nights) else None,
+        },
+        "days": days,
+    }
+
+
+def percent(part, whole):
+    return round(100 * float(part) / whole, 2) if whole else None
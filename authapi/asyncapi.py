@@ -0,0 +1,38 @@
+from inspect import isawaitable
+
+from asgiref.sync import sync_to_async
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """
+    ``APIView`` whose handlers are coroutines.
+
+    Django serves the view natively on ASGI (and through ``async_to_sync`` on
+    WSGI). Authentication, permissions and throttling stay the sync DRF code
+    and run in one ``sync_to_async`` hop, everything else happens on the
+    event loop. Handlers must use the async ORM (``aget``, ``acreate``, ...)
+    or wrap sync code themselves.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .cache import user_versions
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` that resolves the token's user from the cache.
+
+    Users are cached for ``USER_CACHE_TTL`` seconds under their id and their
+    current version. Saving (which includes password changes) or deleting a
+    user bumps the version, so the next request reads the user again.
+    """
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'HOTEL_CACHE_ALIAS', 'default')]
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        key = f"auth-user:{user_id}:{user_versions.get(user_id)}"
+        user = self.cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            self.cache.set(key, user, getattr(settings, 'USER_CACHE_TTL', 60))
+            return user
+
+        # Same checks as JWTAuthentication.get_user, on the cached row.
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if getattr(api_settings, 'CHECK_REVOKE_TOKEN', False) and validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
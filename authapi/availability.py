@@ -0,0 +1,191 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from .cache import hotel_versions
+from .models import Booking
+
+
+class RoomCalendar:
+    """
+    Sorted booking intervals of a single room.
+
+    ``starts`` and ``ends`` are kept sorted by check-in date and ``max_ends``
+    holds the running maximum of ``ends`` so an overlap lookup is a single
+    bisect, even if old rows overlap each other.
+    """
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.max_ends = []
+
+    def add(self, check_in_date, check_out_date):
+        index = bisect_right(self.starts, check_in_date)
+        self.starts.insert(index, check_in_date)
+        self.ends.insert(index, check_out_date)
+        self.max_ends.insert(index, check_out_date)
+        self._refresh_max_ends(index)
+
+    def remove(self, check_in_date, check_out_date):
+        index = bisect_left(self.starts, check_in_date)
+        while index < len(self.starts) and self.starts[index] == check_in_date:
+            if self.ends[index] == check_out_date:
+                del self.starts[index]
+                del self.ends[index]
+                del self.max_ends[index]
+                self._refresh_max_ends(index)
+                return True
+            index += 1
+        return False
+
+    def is_booked(self, check_in_date, check_out_date):
+        # Same rule as the ORM conflict check:
+        # booking.check_in_date <= check_out_date and booking.check_out_date >= check_in_date
+        count = bisect_right(self.starts, check_out_date)
+        return count > 0 and self.max_ends[count - 1] >= check_in_date
+
+    def _refresh_max_ends(self, index):
+        running = self.max_ends[index - 1] if index > 0 else None
+        for i in range(index, len(self.ends)):
+            if running is None or self.ends[i] > running:
+                running = self.ends[i]
+            self.max_ends[i] = running
+
+    def __len__(self):
+        return len(self.starts)
+
+
+class AvailabilityEngine:
+    """
+    In-process availability index, loaded lazily one hotel at a time.
+
+    A hotel's current and future bookings are read with a single
+    ``values_list`` query and kept as a ``RoomCalendar`` per room. Past stays
+    are left out, no lookup asks for them. Calendars are served while the
+    hotel's shared version (``hotel_versions``) is the one read before they
+    were loaded, so bookings made or cancelled by other processes are seen on
+    the next lookup; ``AVAILABILITY_CACHE_TTL`` bounds their age for writes
+    that bypass the versions. Booking writes of this process also patch the
+    loaded calendars through the signals in ``authapi.signals``. The lock only
+    guards the dicts, loads run outside of it.
+    """
+
+    def __init__(self, ttl=None):
+        self._lock = threading.RLock()
+        self._hotels = {}
+        self._versions = {}
+        self._loaded_at = {}
+        self.ttl = ttl
+
+    def _load(self, hotel_id):
+        calendars = {}
+        rows = Booking.objects.filter(room_id__hotel_id=hotel_id, check_out_date__gte=timezone.now().date()).order_by(
+            'check_in_date').values_list('room_id', 'check_in_date', 'check_out_date')
+        for room_id, check_in_date, check_out_date in rows.iterator(chunk_size=2000):
+            calendar = calendars.get(room_id)
+            if calendar is None:
+                calendar = calendars[room_id] = RoomCalendar()
+            calendar.starts.append(check_in_date)
+            calendar.ends.append(check_out_date)
+            calendar.max_ends.append(check_out_date)
+        for calendar in calendars.values():
+            calendar._refresh_max_ends(0)
+        return calendars
+
+    def _fresh(self, hotel_id, version):
+        # The hotel's calendars if they were loaded at ``version`` and are younger than the TTL, else None.
+        # Caller holds the lock.
+        ttl = self.ttl if self.ttl is not None else getattr(settings, 'AVAILABILITY_CACHE_TTL', 60)
+        calendars = self._hotels.get(hotel_id)
+        if (calendars is None or self._versions[hotel_id] != version
+                or time.monotonic() - self._loaded_at[hotel_id] > ttl):
+            return None
+        return calendars
+
+    def _install(self, hotel_id, version, calendars):
+        with self._lock:
+            self._hotels[hotel_id] = calendars
+            self._versions[hotel_id] = version
+            self._loaded_at[hotel_id] = time.monotonic()
+
+    def _calendars(self, hotel_id):
+        hotel_id = int(hotel_id)
+        # Read before loading: a write that lands during the load changes it, and the next lookup reloads.
+        version = hotel_versions.get(hotel_id)
+        with self._lock:
+            calendars = self._fresh(hotel_id, version)
+        if calendars is None:
+            calendars = self._load(hotel_id)
+            self._install(hotel_id, version, calendars)
+        return calendars
+
+    @staticmethod
+    def _booked(calendars, check_in_date, check_out_date):
+        return {room_id for room_id, calendar in calendars.items() if calendar.is_booked(check_in_date, check_out_date)}
+
+    def booked_room_ids(self, hotel_id, check_in_date, check_out_date):
+        calendars = self._calendars(hotel_id)
+        with self._lock:
+            return self._booked(calendars, check_in_date, check_out_date)
+
+    async def abooked_room_ids(self, hotel_id, check_in_date, check_out_date):
+        """
+        ``booked_room_ids`` for async views. Only a (re)load leaves the event loop, which never waits for one:
+        the lock is not held during loads.
+        """
+        version = await hotel_versions.aget(int(hotel_id))
+        with self._lock:
+            calendars = self._fresh(int(hotel_id), version)
+        if calendars is None:
+            calendars = await sync_to_async(self._calendars)(hotel_id)
+        with self._lock:
+            return self._booked(calendars, check_in_date, check_out_date)
+
+    def is_booked(self, hotel_id, room_id, check_in_date, check_out_date):
+        calendar = self._calendars(hotel_id).get(int(room_id))
+        with self._lock:
+            return calendar is not None and calendar.is_booked(check_in_date, check_out_date)
+
+    def booking_added(self, hotel_id, room_id, check_in_date, check_out_date):
+        with self._lock:
+            calendars = self._hotels.get(int(hotel_id))
+            if calendars is None:
+                # Not loaded yet, the next lookup reads it from the database.
+                return
+            calendar = calendars.get(int(room_id))
+            if calendar is None:
+                calendar = calendars[int(room_id)] = RoomCalendar()
+            calendar.add(check_in_date, check_out_date)
+
+    def booking_removed(self, room_id, check_in_date, check_out_date):
+        with self._lock:
+            for hotel_id, calendars in list(self._hotels.items()):
+                calendar = calendars.get(int(room_id))
+                if calendar is None:
+                    continue
+                if not calendar.remove(check_in_date, check_out_date):
+                    # We never saw this interval, drop the hotel and reload it on the next lookup.
+                    self._hotels.pop(hotel_id, None)
+
+    def room_moved(self, room_id, hotel_id):
+        with self._lock:
+            for loaded_hotel_id, calendars in list(self._hotels.items()):
+                if loaded_hotel_id != int(hotel_id) and int(room_id) in calendars:
+                    self._hotels.pop(loaded_hotel_id, None)
+                    self._hotels.pop(int(hotel_id), None)
+
+    def invalidate(self, hotel_id=None):
+        with self._lock:
+            if hotel_id is None:
+                self._hotels.clear()
+                self._versions.clear()
+            else:
+                self._hotels.pop(int(hotel_id), None)
+
+
+engine = AvailabilityEngine()
@@ -0,0 +1,170 @@
+import random
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import Exists, F, OuterRef
+
+from . import inventory
+from .availability import RoomCalendar, engine
+from .cache import hotel_versions
+from .models import Room, Booking
+from .pricing import stay_prices
+
+
+class BookingConflict(Exception):
+    pass
+
+
+class BulkBookingFailed(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def conflicting_bookings(room_id, check_in_date, check_out_date):
+    return Booking.objects.filter(room_id=room_id, check_in_date__lte=check_out_date,
+                                  check_out_date__gte=check_in_date)
+
+
+def lock_room(room_id):
+    """
+    Take the write lock for ``room_id`` before reading its bookings.
+
+    The UPDATE is what the booking path used to do last (``room.is_available = False``).
+    Doing it first makes it the lock: on PostgreSQL/MySQL it row-locks only this
+    room, on SQLite it takes the database write lock, so a second booking for
+    the same room waits and then sees the first one.
+    """
+    return Room.objects.filter(id=room_id).update(is_available=False)
+
+
+def lock_rooms(room_ids):
+    """
+    Same as ``lock_room`` for several rooms, without touching ``is_available``,
+    since some of them may end up without a booking.
+    """
+    return Room.objects.filter(id__in=room_ids).update(is_available=F('is_available'))
+
+
+def retry_on_lock(func, attempts=None):
+    """
+    Call ``func`` (which opens its own transaction) again when the database reports a lock timeout or a
+    deadlock. Inside an outer transaction there is nothing to retry, the error is raised straight away.
+    """
+    attempts = attempts or getattr(settings, 'BOOKING_RETRY_ATTEMPTS', 5)
+    for attempt in range(attempts):
+        try:
+            return func()
+        except OperationalError:
+            if attempt == attempts - 1 or transaction.get_connection().in_atomic_block:
+                raise
+            time.sleep(0.01 * 2 ** attempt * (1 + random.random()))
+
+
+def create_booking(validated_data, attempts=None):
+    """
+    Check for conflicts and insert the booking in one transaction, retrying when the database reports a lock
+    timeout or a deadlock. Raises ``BookingConflict`` if the room is taken for those dates.
+    """
+    room = validated_data['room_id']
+
+    def commit():
+        try:
+            with transaction.atomic():
+                lock_room(room.id)
+                if conflicting_bookings(room.id, validated_data['check_in_date'],
+                                        validated_data['check_out_date']).exists():
+                    raise BookingConflict()
+                return Booking.objects.create(**validated_data)
+        except IntegrityError:
+            # room_night_unique: one of the nights is sold already.
+            raise BookingConflict()
+
+    return retry_on_lock(commit, attempts)
+
+
+def create_bookings(hotel_id, items, partial=False, attempts=None):
+    """
+    Book several rooms of a hotel at once.
+
+    ``items`` maps the position of each stay in the request to a dict with
+    ``room_id``, ``guest_name``, ``check_in_date`` and ``check_out_date``.
+    Rooms are read with one query, existing bookings of those rooms with one
+    more, conflicts (also between the stays of the same request) are checked
+    in memory and the bookings are inserted with ``bulk_create``.
+
+    Returns ``(bookings, errors)``, ``bookings`` maps positions to the created
+    Booking and ``errors`` maps positions to an error message. Unless
+    ``partial`` is set, any error rolls everything back and raises
+    ``BulkBookingFailed``.
+    """
+    room_ids = {item['room_id'] for item in items.values()}
+
+    def commit():
+        errors = {}
+        created = {}
+        with transaction.atomic():
+            lock_rooms(room_ids)
+            rooms = Room.objects.filter(hotel_id=hotel_id, id__in=room_ids).in_bulk()
+            calendars = {room_id: RoomCalendar() for room_id in rooms}
+            if items:
+                first = min(item['check_in_date'] for item in items.values())
+                last = max(item['check_out_date'] for item in items.values())
+                existing = Booking.objects.filter(room_id__in=rooms, check_in_date__lte=last,
+                                                  check_out_date__gte=first).order_by('check_in_date')
+                for room_id, check_in_date, check_out_date in existing.values_list(
+                        'room_id', 'check_in_date', 'check_out_date'):
+                    calendars[room_id].add(check_in_date, check_out_date)
+
+            for index, item in sorted(items.items()):
+                room = rooms.get(item['room_id'])
+                if room is None:
+                    errors[index] = "Room does not exist in this hotel"
+                    continue
+                calendar = calendars[room.id]
+                if calendar.is_booked(item['check_in_date'], item['check_out_date']):
+                    errors[index] = "Room is not available for the requested dates"
+                    continue
+                calendar.add(item['check_in_date'], item['check_out_date'])
+                created[index] = Booking(room_id=room, guest_name=item.get('guest_name', ''),
+                                         check_in_date=item['check_in_date'],
+                                         check_out_date=item['check_out_date'])
+
+            if errors and not partial:
+                raise BulkBookingFailed(errors)
+            bookings = list(created.values())
+            prices = stay_prices(hotel_id, [booking.room_id for booking in bookings],
+                                 [booking.check_in_date for booking in bookings],
+                                 [booking.check_out_date for booking in bookings])
+            for booking, price in zip(bookings, prices):
+                booking.total_price = price
+            Booking.objects.bulk_create(bookings)
+            try:
+                with transaction.atomic():
+                    inventory.book_nights(bookings)
+            except IntegrityError:
+                # room_night_unique caught what the checks above missed, don't book any of them.
+                raise BulkBookingFailed({index: "Room is not available for the requested dates"
+                                         for index in created})
+            Room.objects.filter(id__in={booking.room_id_id for booking in created.values()}).update(
+                is_available=False)
+            # bulk_create does not send post_save, tell the availability engine ourselves.
+            transaction.on_commit(lambda: [
+                engine.booking_added(hotel_id, booking.room_id_id, booking.check_in_date, booking.check_out_date)
+                for booking in created.values()])
+            if created:
+                hotel_versions.bump_for_write(hotel_id)
+        return created, errors
+
+    return retry_on_lock(commit, attempts)
+
+
+def double_bookings():
+    """
+    Bookings that overlap an earlier booking of the same room. Should always be empty.
+    """
+    earlier = Booking.objects.filter(
+        room_id=OuterRef('room_id'), id__lt=OuterRef('id'),
+        check_in_date__lte=OuterRef('check_out_date'), check_out_date__gte=OuterRef('check_in_date'))
+    return Booking.objects.filter(Exists(earlier))
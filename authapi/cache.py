@@ -0,0 +1,239 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+# Query params that are matched case-insensitively, so "Pune" and "pune" share a cache entry.
+CASE_INSENSITIVE_PARAMS = {'name', 'city', 'add', 'q'}
+
+
+class LRUCache:
+    """
+    Small thread-safe LRU with a TTL, the per-process tier in front of Django's cache.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class HotelCache:
+    """
+    Serialized hotel payloads, cached per hotel and per normalized list query.
+
+    Lookups go to a per-process LRU first, then to Django's cache
+    (``HOTEL_CACHE_ALIAS``), then to the database. Hotel keys carry the
+    hotel's version (``hotel_versions``), the one its ETag is made of, so no
+    process serves an old payload under a new ETag. List keys carry a
+    generation number that every Hotel save/delete bumps, so all cached lists
+    go stale at once without having to enumerate them. Other processes keep
+    serving their LRU copy of a list for at most ``HOTEL_CACHE_LOCAL_TTL``
+    seconds.
+    """
+    GENERATION_KEY = 'hotels:generation'
+    WRITTEN_KEY = 'hotels:written'
+
+    def __init__(self):
+        self.local = LRUCache(getattr(settings, 'HOTEL_CACHE_LOCAL_SIZE', 1024),
+                              getattr(settings, 'HOTEL_CACHE_LOCAL_TTL', 5))
+        self._stats_lock = threading.Lock()
+        self.stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0}
+
+    @property
+    def shared(self):
+        return caches[getattr(settings, 'HOTEL_CACHE_ALIAS', 'default')]
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'HOTEL_CACHE_TTL', 300)
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def get_or_set(self, key, compute):
+        value = self.local.get(key)
+        if value is not None:
+            self._count('local_hits')
+            return value
+        value = self.shared.get(key)
+        if value is not None:
+            self._count('shared_hits')
+        else:
+            self._count('misses')
+            value = compute()
+            self.shared.set(key, value, self.ttl)
+        self.local.set(key, value)
+        return value
+
+    async def aget_or_set(self, key, compute):
+        """
+        ``get_or_set`` for async views, ``compute`` is a coroutine function.
+        """
+        value = self.local.get(key)
+        if value is not None:
+            self._count('local_hits')
+            return value
+        value = await self.shared.aget(key)
+        if value is not None:
+            self._count('shared_hits')
+        else:
+            self._count('misses')
+            value = await compute()
+            await self.shared.aset(key, value, self.ttl)
+        self.local.set(key, value)
+        return value
+
+    def hotel(self, hotel_id, version, compute):
+        """
+        The payload of ``hotel_id`` at ``version`` (``hotel_versions``), so it always matches the version's ETag.
+        """
+        return self.get_or_set(f'hotel:{hotel_id}:{version}', compute)
+
+    def hotel_list(self, request, compute):
+        return self.get_or_set(self.list_key(request), compute)
+
+    async def ahotel(self, hotel_id, version, compute):
+        return await self.aget_or_set(f'hotel:{hotel_id}:{version}', compute)
+
+    async def ahotel_list(self, request, compute):
+        return await self.aget_or_set(self.list_key(request), compute)
+
+    def generation(self):
+        generation = self.shared.get(self.GENERATION_KEY)
+        if generation is None:
+            # Start from the clock rather than 1, so a generation lost with an evicted key is never reused.
+            self.shared.add(self.GENERATION_KEY, time.time_ns(), None)
+            generation = self.shared.get(self.GENERATION_KEY)
+        return generation
+
+    def list_key(self, request):
+        params = []
+        for name in sorted(request.query_params):
+            value = request.query_params.get(name)
+            if value == '':
+                continue
+            params.append((name, value.lower() if name in CASE_INSENSITIVE_PARAMS else value))
+        # Paginated payloads hold absolute next/previous links.
+        raw = repr((request.get_host(), params)).encode()
+        return f'hotels:{self.generation()}:{hashlib.sha1(raw).hexdigest()}'
+
+    def invalidate_hotel(self, hotel_id):
+        # Single hotel keys carry the hotel's version, which the write bumps already, only the lists need a new
+        # generation.
+        self.invalidate_lists()
+
+    def invalidate_lists(self):
+        self.shared.set(self.WRITTEN_KEY, time.time_ns(), None)
+        try:
+            self.shared.incr(self.GENERATION_KEY)
+        except ValueError:
+            self.shared.set(self.GENERATION_KEY, time.time_ns(), None)
+
+    def last_write(self):
+        """
+        When a hotel was last saved or deleted, as a nanosecond timestamp, None if not since the cache started.
+        """
+        return self.shared.get(self.WRITTEN_KEY)
+
+    def hit_ratio(self):
+        hits = self.stats['local_hits'] + self.stats['shared_hits']
+        total = hits + self.stats['misses']
+        return hits / total if total else None
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+
+class VersionCounter:
+    """
+    Version numbers per object id, bumped on every write that concerns the object.
+
+    ``hotel_versions`` covers a hotel with its rooms and bookings,
+    ``rate_versions`` a hotel's rate rules and ``user_versions`` a user. Versions are nanosecond timestamps kept strictly
+    increasing, so they double as Last-Modified and a version lost to cache
+    eviction is never handed out again. They live in the shared cache tier
+    only: with the default locmem backend every process has its own,
+    deployments with several workers need a shared backend.
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+
+    def key(self, object_id):
+        return f'{self.prefix}:{object_id}'
+
+    @property
+    def shared(self):
+        return caches[getattr(settings, 'HOTEL_CACHE_ALIAS', 'default')]
+
+    def get(self, object_id):
+        version = self.shared.get(self.key(object_id))
+        if version is None:
+            self.shared.add(self.key(object_id), time.time_ns(), None)
+            version = self.shared.get(self.key(object_id))
+        return version
+
+    async def aget(self, object_id):
+        version = await self.shared.aget(self.key(object_id))
+        if version is None:
+            await self.shared.aadd(self.key(object_id), time.time_ns(), None)
+            version = await self.shared.aget(self.key(object_id))
+        return version
+
+    def bump(self, object_id):
+        old = self.shared.get(self.key(object_id)) or 0
+        version = max(time.time_ns(), old + 1)
+        self.shared.set(self.key(object_id), version, None)
+        return version
+
+    def bump_for_write(self, object_id):
+        """
+        Bump now and again after commit, so nothing cached under a version read before the write was
+        visible survives it.
+        """
+        self.bump(object_id)
+        transaction.on_commit(lambda: self.bump(object_id))
+
+
+hotel_cache = HotelCache()
+hotel_versions = VersionCounter('hotel-version')
+rate_versions = VersionCounter('rate-version')
+user_versions = VersionCounter('user-version')
@@ -0,0 +1,58 @@
+import hashlib
+from datetime import datetime, timezone
+
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+from .cache import hotel_cache, hotel_versions
+
+
+def query_hash(request):
+    raw = repr(sorted(request.GET.lists())).encode()
+    return hashlib.sha1(raw).hexdigest()[:16]
+
+
+def version_time(version):
+    return datetime.fromtimestamp(version / 1e9, tz=timezone.utc)
+
+
+def hotel_etag(request, pk):
+    return f"hotel-{pk}-{hotel_versions.get(pk)}"
+
+
+def hotel_last_modified(request, pk):
+    return version_time(hotel_versions.get(pk))
+
+
+def hotel_written(request, pk):
+    return hotel_versions.get(pk)
+
+
+def hotel_list_written(request):
+    return hotel_cache.last_write()
+
+
+def hotel_list_etag(request):
+    # The list cache key already holds the hotel generation and the normalized query.
+    return hotel_cache.list_key(request)
+
+
+def hotel_bookings_etag(request, pk):
+    if not (request.GET.get('all') or request.GET.get('booking')) or request.GET.get('today'):
+        # ?today= lists bookings of every hotel, no single version covers it.
+        return None
+    return f"hotel-bookings-{pk}-{hotel_versions.get(pk)}-{query_hash(request)}"
+
+
+def hotel_bookings_last_modified(request, pk):
+    if hotel_bookings_etag(request, pk) is None:
+        return None
+    return hotel_last_modified(request, pk)
+
+
+def conditional(etag_func, last_modified_func=None):
+    """
+    ``condition`` for APIView methods: answers If-None-Match / If-Modified-Since with a 304
+    from the version numbers alone, before the view runs any query.
+    """
+    return method_decorator(condition(etag_func=etag_func, last_modified_func=last_modified_func))
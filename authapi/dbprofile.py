@@ -0,0 +1,34 @@
+import re
+
+from django.conf import settings
+
+# PRAGMA names and values are interpolated, keep them to plain words and numbers.
+PRAGMA_TOKEN = re.compile(r'^-?\w+$')
+# Stored in the database file rather than the connection.
+PERSISTENT_PRAGMAS = {'journal_mode'}
+
+
+def apply_pragmas(connection, pragmas=None):
+    """
+    Run ``SQLITE_PRAGMAS`` on a freshly opened SQLite connection, other vendors are left alone.
+
+    ``journal_mode`` is stored in the database file and only set with
+    ``SQLITE_PRODUCTION_PROFILE``, so development databases are left as they
+    are. The others last as long as the connection, which is why they go with
+    persistent connections (``CONN_MAX_AGE``).
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {}) if pragmas is None else pragmas
+    production = getattr(settings, 'SQLITE_PRODUCTION_PROFILE', False)
+    for name, value in pragmas.items():
+        if not (PRAGMA_TOKEN.match(name) and PRAGMA_TOKEN.match(str(value))):
+            raise ValueError(f"Invalid SQLite pragma {name} = {value!r}")
+        if name in PERSISTENT_PRAGMAS and not production:
+            continue
+        # On the raw connection, so every new connection doesn't log a handful of queries.
+        connection.connection.execute(f"PRAGMA {name} = {value}")
+
+
+def current_pragmas(connection, names):
+    return {name: connection.connection.execute(f"PRAGMA {name}").fetchone()[0] for name in names}
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from rest_framework.exceptions import Throttled
+
+
+class HashingBusy(Throttled):
+    default_detail = "Too many password checks in progress."
+    default_code = 'hashing_busy'
+
+
+class HashingPool:
+    """
+    Bounded thread pool that keeps password hashing off the event loop.
+
+    PBKDF2 releases the GIL, so ``PASSWORD_HASHING_WORKERS`` threads really
+    hash in parallel. At most ``PASSWORD_HASHING_BACKLOG`` calls may be
+    running or queued at once, further calls fail right away with
+    ``HashingBusy`` (429 with Retry-After) instead of piling up behind them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self.pending = 0
+
+    @property
+    def workers(self):
+        return getattr(settings, 'PASSWORD_HASHING_WORKERS', None) or os.cpu_count() or 1
+
+    @property
+    def backlog(self):
+        return getattr(settings, 'PASSWORD_HASHING_BACKLOG', None) or self.workers * 8
+
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hashing')
+            return self._executor
+
+    async def run(self, func, *args):
+        executor = self.executor()
+        with self._lock:
+            if self.pending >= self.backlog:
+                raise HashingBusy(wait=1)
+            self.pending += 1
+        try:
+            return await asyncio.wrap_future(executor.submit(func, *args))
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+
+pool = HashingPool()
+
+
+async def amake_password(password):
+    return await pool.run(make_password, password)
+
+
+async def aauthenticate(email, password):
+    """
+    Async ``authenticate(email=..., password=...)`` for ``ModelBackend`` users, hashing on the pool.
+
+    Outdated hashes are not upgraded here, the sync login does that.
+    """
+    from .models import User
+
+    try:
+        user = await User.objects.aget(email=email)
+    except User.DoesNotExist:
+        # Hash anyway, like ModelBackend, so unknown emails take as long as wrong passwords.
+        await amake_password(password)
+        return None
+    if await pool.run(check_password, password, user.password) and user.is_active:
+        return user
+    return None
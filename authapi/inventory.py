@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.db.models import Count, Exists, F, OuterRef, Q
+
+from .models import Booking, RoomNight
+
+
+def nights(booking):
+    return [RoomNight(room_id_id=booking.room_id_id, booking_id=booking,
+                      date=booking.check_in_date + timedelta(days=i))
+            for i in range((booking.check_out_date - booking.check_in_date).days)]
+
+
+def book_nights(bookings, ignore_conflicts=False):
+    """
+    Insert the room nights of ``bookings`` with one query per 1000 rows. A night that is already sold raises
+    ``IntegrityError`` (room_night_unique), unless ``ignore_conflicts`` is set.
+    """
+    rows = [night for booking in bookings for night in nights(booking)]
+    RoomNight.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=ignore_conflicts)
+    return len(rows)
+
+
+def rebook_nights(booking):
+    RoomNight.objects.filter(booking_id=booking.id).delete()
+    book_nights([booking])
+
+
+def unbooked(queryset=None):
+    """
+    Bookings that have nights to sell but no room night rows, e.g. made before the table existed.
+    """
+    queryset = Booking.objects.all() if queryset is None else queryset
+    return queryset.filter(check_out_date__gt=F('check_in_date')).exclude(
+        Exists(RoomNight.objects.filter(booking_id=OuterRef('pk'))))
+
+
+def backfill(batch_size=1000):
+    """
+    Write the room nights of every booking that has none. Returns ``(bookings, nights)`` handled.
+
+    Nights another booking already holds are skipped, ``check`` reports those
+    bookings afterwards.
+    """
+    total_bookings = total_nights = 0
+    last_id = 0
+    while True:
+        batch = list(unbooked(Booking.objects.filter(id__gt=last_id)).order_by('id')[:batch_size])
+        if not batch:
+            return total_bookings, total_nights
+        total_nights += book_nights(batch, ignore_conflicts=True)
+        total_bookings += len(batch)
+        last_id = batch[-1].id
+
+
+def check():
+    """
+    Compare the room nights with the bookings they were made from.
+
+    Returns a dict of:
+    ``stray`` - ids of RoomNights outside their booking's stay or on another room,
+    ``incomplete`` - ids of Bookings whose number of room nights doesn't match their stay.
+    Because (room, date) is unique, nothing stray and nothing incomplete means
+    the table holds exactly the nights of the bookings.
+    """
+    stray = RoomNight.objects.filter(
+        Q(date__lt=F('booking_id__check_in_date')) | Q(date__gte=F('booking_id__check_out_date'))
+        | ~Q(room_id=F('booking_id__room_id'))).values_list('id', flat=True)
+    rows = Booking.objects.annotate(night_count=Count('roomnight')).values_list(
+        'id', 'check_in_date', 'check_out_date', 'night_count')
+    incomplete = [booking_id for booking_id, check_in_date, check_out_date, night_count in rows.iterator()
+                  if max((check_out_date - check_in_date).days, 0) != night_count]
+    return {'stray': list(stray), 'incomplete': incomplete}
+
+
+def repair(problems):
+    """
+    Fix what ``check`` found: drop stray nights and rebuild incomplete bookings. Nights held by another
+    booking are left out. Returns the ids of bookings that still could not get all their nights.
+    """
+    stray = RoomNight.objects.filter(id__in=problems['stray'])
+    # A stray row may have kept its booking's count right, rebuild those bookings too.
+    booking_ids = set(problems['incomplete']) | set(stray.values_list('booking_id', flat=True))
+    stray.delete()
+    bookings = list(Booking.objects.filter(id__in=booking_ids))
+    RoomNight.objects.filter(booking_id__in=bookings).delete()
+    book_nights(bookings, ignore_conflicts=True)
+    return check()['incomplete']
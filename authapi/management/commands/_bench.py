@@ -0,0 +1,58 @@
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+@contextmanager
+def isolated_database(verbosity=0, on_disk=False):
+    """
+    Run the body against a throwaway test database, so benchmarks never touch real data.
+
+    SQLite test databases live in shared-cache memory by default, which locks
+    differently from a real database file. Pass ``on_disk=True`` for
+    benchmarks that need several connections to write concurrently.
+    """
+    old_name = connection.settings_dict['NAME']
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    old_test_name = test_settings.get('NAME')
+    if on_disk and connection.vendor == 'sqlite':
+        test_settings['NAME'] = os.path.join(tempfile.mkdtemp(prefix='authapi-bench-'), 'bench.sqlite3')
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        test_settings['NAME'] = old_test_name
+        teardown_test_environment()
+
+
+def measure(func, repeat=20):
+    """
+    Call ``func`` ``repeat`` times and return the timings in milliseconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summary(values):
+    return {
+        'p50': statistics.median(values),
+        'p95': percentile(values, 95),
+        'max': max(values),
+    }
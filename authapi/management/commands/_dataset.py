@@ -0,0 +1,109 @@
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+
+from authapi import inventory, ratings
+from authapi.availability import engine
+from authapi.cache import hotel_cache
+from authapi.models import User, Hotel, Room, Booking, RateRule, Review
+
+CITIES = ["Pune", "Mumbai", "Goa", "Delhi", "Jaipur", "Bengaluru", "Chennai", "Kochi"]
+ROOM_TYPES = [choice for choice, _ in Room._meta.get_field('room_type').choices]
+BASE_PRICES = {'Standard Room': 1500, 'Deluxe Room': 2500, 'Suite': 4500, 'Executive Suite': 6500,
+               'Poolside Room': 3500}
+ADMIN_EMAIL = "bench-admin@example.com"
+PASSWORD = "bench"
+
+
+def distribution(spec):
+    """
+    Parse a distribution of positive whole numbers: ``N``, ``uniform:LOW,HIGH``, ``normal:MEAN,SD`` or
+    ``exp:MEAN``. Returns ``sample(rng)``.
+    """
+    kind, _, args = spec.partition(':')
+    try:
+        if not args:
+            value = int(kind)
+            return lambda rng: value
+        params = [float(arg) for arg in args.split(',')]
+        if kind == 'uniform':
+            low, high = params
+            return lambda rng: rng.randint(int(low), int(high))
+        if kind == 'normal':
+            mean, sd = params
+            return lambda rng: max(1, round(rng.gauss(mean, sd)))
+        if kind == 'exp':
+            mean, = params
+            return lambda rng: max(1, round(rng.expovariate(1 / mean)))
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid distribution {spec!r}, use N, uniform:LOW,HIGH, normal:MEAN,SD or exp:MEAN")
+
+
+def stays(rng, start, end, nights=lambda rng: rng.choice((1, 1, 2, 2, 3, 4, 7)),
+          gap=lambda rng: 1 + int(rng.expovariate(1 / 3))):
+    """
+    ``(check_in, check_out)`` pairs from ``start`` to ``end`` that never overlap, ``nights`` long and ``gap``
+    days apart. Gaps are at least a day, as the inclusive overlap rule of the booking path wants.
+    """
+    check_in = start + timedelta(days=rng.randint(0, 6))
+    while True:
+        check_out = check_in + timedelta(days=nights(rng))
+        if check_out > end:
+            return
+        yield check_in, check_out
+        check_in = check_out + timedelta(days=max(1, gap(rng)))
+
+
+def seed_dataset(seed=0, hotels=10, rooms=20, years=2, users=200, batch_size=2000):
+    """
+    A reproducible catalog: ``hotels`` hotels with ``rooms`` rooms each, bookings from ``years`` years back to
+    two months ahead, users with reviews and a few rate rules. Everything is written with ``bulk_create``, so
+    the derived data (room nights, rating aggregates, caches) is rebuilt at the end.
+
+    Returns the admin user (password ``PASSWORD``), whose token the benchmarks use.
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    # Hashing once is what keeps thousands of users cheap, they all share the password.
+    password = make_password(PASSWORD)
+    admin = User.objects.create(email=ADMIN_EMAIL, name="Bench Admin", tc=True, is_admin=True, password=password)
+    user_objs = User.objects.bulk_create(
+        (User(email=f"user{n}@example.com", name=f"User {n}", tc=True, password=password) for n in range(users)),
+        batch_size=batch_size)
+
+    hotel_objs = Hotel.objects.bulk_create(
+        Hotel(name=f"Hotel {n}", address=f"{rng.randint(1, 200)} Main Road", city=rng.choice(CITIES),
+              contact_no="9999999999", rating=rng.randint(1, 5), email=f"hotel{n}@example.com")
+        for n in range(hotels))
+    room_objs = Room.objects.bulk_create(
+        (Room(hotel_id=hotel, room_no=100 + n, room_type=room_type,
+              price_per_night=BASE_PRICES[room_type] + 100 * rng.randint(0, 10))
+         for hotel in hotel_objs for n, room_type in enumerate(rng.choices(ROOM_TYPES, k=rooms))),
+        batch_size=batch_size)
+
+    batch = []
+    for room in room_objs:
+        for check_in, check_out in stays(rng, today - timedelta(days=365 * years), today + timedelta(days=60)):
+            batch.append(Booking(room_id=room, guest_name=f"Guest {rng.randint(1, 100000)}",
+                                 check_in_date=check_in, check_out_date=check_out,
+                                 total_price=(check_out - check_in).days * room.price_per_night))
+            if len(batch) >= batch_size:
+                Booking.objects.bulk_create(batch)
+                batch = []
+    Booking.objects.bulk_create(batch)
+
+    Review.objects.bulk_create(
+        (Review(hotel_id=hotel, user_id=rng.choice(user_objs), rating=rng.randint(1, 5), comment="Nice stay")
+         for hotel in hotel_objs for _ in range(rng.randint(0, 20))),
+        batch_size=batch_size)
+    RateRule.objects.bulk_create(
+        RateRule(hotel_id=hotel, weekdays=RateRule.WEEKEND, percent=rng.choice((110, 120, 125)))
+        for hotel in hotel_objs)
+
+    inventory.backfill(batch_size=batch_size)
+    ratings.recompute()
+    engine.invalidate()
+    hotel_cache.clear()
+    return admin
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from authapi import inventory
+
+
+class Command(BaseCommand):
+    help = "Write the room nights of bookings made before the RoomNight table existed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        bookings, nights = inventory.backfill(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {nights} room nights of {bookings} bookings"))
+        problems = inventory.check()
+        if problems['incomplete']:
+            self.stdout.write(self.style.WARNING(
+                f"{len(problems['incomplete'])} bookings overlap another booking and are missing nights, "
+                f"see check_room_nights"))
@@ -0,0 +1,142 @@
+import asyncio
+import io
+import json
+import threading
+import time
+from datetime import date, timedelta
+
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+
+from authapi.models import Hotel, Room, Booking
+from ._bench import isolated_database, percentile, summary
+
+
+class Command(BaseCommand):
+    help = "Compare requests/sec and tail latency of the read endpoints on WSGI (sync views) and ASGI (async views)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=16, help="Requests in flight at once")
+        parser.add_argument('--requests', type=int, default=400, help="Requests per endpoint and stack")
+        parser.add_argument('--rooms', type=int, default=50)
+        parser.add_argument('--bookings', type=int, default=500)
+
+    def handle(self, *args, **options):
+        with isolated_database(on_disk=True):
+            hotel = self.seed(options['rooms'], options['bookings'])
+            stay = json.dumps({'check_in_date': (date.today() + timedelta(days=3)).isoformat(),
+                               'check_out_date': (date.today() + timedelta(days=5)).isoformat()}).encode()
+            endpoints = [
+                ('hotel list', 'GET', 'hotels', '', b''),
+                ('hotel detail', 'GET', f'hotels/{hotel.id}', '', b''),
+                ('availability', 'POST', f'hotels/{hotel.id}/rooms', '', stay),
+                ('bookings', 'GET', f'hotels/{hotel.id}/rooms/bookings', 'booking=1&page_size=50', b''),
+            ]
+            self.stdout.write(f"{'endpoint':<14} {'stack':<6} {'req/sec':>9} {'p50 ms':>8} {'p95 ms':>8} "
+                              f"{'p99 ms':>8} {'errors':>6}")
+            wsgi, asgi = WSGIHandler(), ASGIHandler()
+            for label, method, path, query, body in endpoints:
+                request = (method, f'/api/{path}', query, body)
+                self.report(label, 'wsgi', *self.run_wsgi(wsgi, request, options['concurrency'],
+                                                          options['requests']))
+                request = (method, f'/api/async/{path}', query, body)
+                self.report(label, 'asgi', *async_to_sync(self.run_asgi)(asgi, request, options['concurrency'],
+                                                                         options['requests']))
+
+    def seed(self, rooms, bookings):
+        hotel = Hotel.objects.create(name="Bench Hotel", address="Bench street", city="Pune",
+                                     contact_no="9999999999", rating=4, email="bench@example.com")
+        room_objs = Room.objects.bulk_create(
+            Room(hotel_id=hotel, room_no=no, room_type='Standard Room', price_per_night=1000)
+            for no in range(1, rooms + 1))
+        start = date.today() + timedelta(days=1)
+        Booking.objects.bulk_create(
+            Booking(room_id=room_objs[i % rooms], guest_name="guest",
+                    check_in_date=start + timedelta(days=3 * (i // rooms)),
+                    check_out_date=start + timedelta(days=3 * (i // rooms) + 2), total_price=2000)
+            for i in range(bookings))
+        return hotel
+
+    def run_wsgi(self, app, request, concurrency, requests):
+        # A threaded WSGI server: one request per thread at a time.
+        method, path, query, body = request
+        results = []
+        lock = threading.Lock()
+        counter = iter(range(requests))
+
+        def worker():
+            local = []
+            while True:
+                with lock:
+                    if next(counter, None) is None:
+                        break
+                environ = {
+                    'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+                    'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'HTTP_HOST': 'testserver',
+                    'SERVER_PROTOCOL': 'HTTP/1.1', 'CONTENT_TYPE': 'application/json',
+                    'CONTENT_LENGTH': str(len(body)), 'wsgi.input': io.BytesIO(body), 'wsgi.url_scheme': 'http',
+                    'wsgi.errors': io.StringIO(), 'wsgi.multithread': True, 'wsgi.multiprocess': False,
+                    'wsgi.run_once': False, 'wsgi.version': (1, 0),
+                }
+                status = []
+                start = time.perf_counter()
+                response = app(environ, lambda line, headers, exc_info=None: status.append(int(line[:3])))
+                for _ in response:
+                    pass
+                response.close()
+                local.append((status[0], (time.perf_counter() - start) * 1000))
+            with lock:
+                results.extend(local)
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, time.perf_counter() - start
+
+    async def run_asgi(self, app, request, concurrency, requests):
+        # A single event loop, like one uvicorn/daphne worker.
+        method, path, query, body = request
+        slots = asyncio.Semaphore(concurrency)
+        results = []
+
+        async def call():
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+                'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+                'root_path': '', 'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+                'headers': [(b'host', b'testserver'), (b'content-type', b'application/json'),
+                            (b'content-length', str(len(body)).encode())],
+            }
+            messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+            status = []
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+                # The client never disconnects, Django cancels this wait once the response is sent.
+                await asyncio.Future()
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+
+            async with slots:
+                start = time.perf_counter()
+                await app(scope, receive, send)
+                results.append((status[0], (time.perf_counter() - start) * 1000))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(call() for _ in range(requests)))
+        return results, time.perf_counter() - start
+
+    def report(self, label, stack, results, elapsed):
+        ok = sum(1 for status, _ in results if status < 400)
+        timings = [ms for _, ms in results]
+        latency = summary(timings)
+        self.stdout.write(f"{label:<14} {stack:<6} {len(results) / elapsed:>9.1f} {latency['p50']:>8.2f} "
+                          f"{latency['p95']:>8.2f} {percentile(timings, 99):>8.2f} {len(results) - ok:>6}")
@@ -0,0 +1,69 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from authapi.availability import AvailabilityEngine
+from authapi.models import Hotel, Room, Booking
+from ._bench import isolated_database, measure, summary
+
+
+class Command(BaseCommand):
+    help = "Compare the ORM join and the availability engine for RoomsAvailableView against booking history size"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=100)
+        parser.add_argument('--sizes', default='1000,10000,100000',
+                            help="Comma separated number of bookings per hotel")
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        with isolated_database():
+            self.stdout.write(f"{'bookings':>10} {'orm p50':>10} {'orm p95':>10} "
+                              f"{'engine p50':>11} {'engine p95':>11} {'engine load':>12}")
+            for size in sizes:
+                hotel = self.seed(size, options['rooms'])
+                self.report(hotel, size, options['repeat'])
+                hotel.delete()
+
+    def seed(self, bookings, rooms):
+        hotel = Hotel.objects.create(name=f"Bench Hotel {bookings}", address="Bench street", city="Pune",
+                                     contact_no="9999999999", rating=4, email="bench@example.com")
+        room_objs = Room.objects.bulk_create(
+            Room(hotel_id=hotel, room_no=no, room_type='Standard Room', price_per_night=1000)
+            for no in range(1, rooms + 1))
+        per_room = max(1, bookings // rooms)
+        start = date.today() - timedelta(days=per_room * 3)
+        batch = []
+        for room in room_objs:
+            check_in = start
+            for _ in range(per_room):
+                check_out = check_in + timedelta(days=2)
+                batch.append(Booking(room_id=room, guest_name="guest", check_in_date=check_in,
+                                     check_out_date=check_out, total_price=2000))
+                check_in = check_out + timedelta(days=1)
+        Booking.objects.bulk_create(batch, batch_size=5000)
+        return hotel
+
+    def report(self, hotel, size, repeat):
+        check_in = date.today() + timedelta(days=10)
+        check_out = check_in + timedelta(days=3)
+
+        def orm():
+            list(Room.objects.filter(hotel_id=hotel.id).exclude(
+                Q(booking__check_in_date__lte=check_out, booking__check_out_date__gte=check_in)
+            ).distinct())
+
+        engine = AvailabilityEngine(ttl=3600)
+        load = measure(lambda: engine._calendars(hotel.id) and engine.invalidate(hotel.id), repeat=1)
+        engine._calendars(hotel.id)
+
+        def indexed():
+            booked = engine.booked_room_ids(hotel.id, check_in, check_out)
+            list(Room.objects.filter(hotel_id=hotel.id).exclude(id__in=booked))
+
+        orm_stats = summary(measure(orm, repeat))
+        engine_stats = summary(measure(indexed, repeat))
+        self.stdout.write(f"{size:>10} {orm_stats['p50']:>10.2f} {orm_stats['p95']:>10.2f} "
+                          f"{engine_stats['p50']:>11.2f} {engine_stats['p95']:>11.2f} {load[0]:>12.2f}")
@@ -0,0 +1,230 @@
+import io
+import json
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from authapi import profiling
+from authapi.availability import engine
+from authapi.cache import hotel_cache
+from authapi.models import User, Hotel, Room, Booking, RateRule
+from authapi.testing import counted_queries
+from authapi.views import get_tokens_for_user
+from ._bench import isolated_database, measure, summary
+from ._dataset import ADMIN_EMAIL, PASSWORD, seed_dataset
+
+# Allocation growth below this many KiB is noise, whatever the threshold.
+ALLOC_SLACK_KIB = 16
+
+
+def days(n):
+    return (date.today() + timedelta(days=n)).isoformat()
+
+
+def new_hotel(n):
+    return {'name': f"Bench New Hotel {n}", 'address': "Street", 'city': "Goa", 'contact_no': "9999999999",
+            'rating': 3, 'email': "new@example.com"}
+
+
+# (url name, method) -> context -> (url kwargs, data). Bookings go past the seeded horizon of two months,
+# so they never conflict; every write is rolled back.
+SCENARIOS = {
+    ('registration', 'post'): lambda ctx: ({}, {'email': "new@example.com", 'name': "New", 'password': "pw",
+                                                'password2': "pw", 'tc': True}),
+    ('login', 'post'): lambda ctx: ({}, {'email': ADMIN_EMAIL, 'password': PASSWORD}),
+    ('async-registration', 'post'): lambda ctx: ({}, {'email': "new@example.com", 'name': "New",
+                                                      'password': "pw", 'password2': "pw", 'tc': True}),
+    ('async-login', 'post'): lambda ctx: ({}, {'email': ADMIN_EMAIL, 'password': PASSWORD}),
+    ('profile', 'get'): lambda ctx: ({}, None),
+    ('users', 'get'): lambda ctx: ({}, {'page_size': 50}),
+    ('user-delete', 'delete'): lambda ctx: ({'pk': ctx['user'].id}, None),
+    ('change-password', 'post'): lambda ctx: ({}, {'password': PASSWORD, 'password2': PASSWORD}),
+    ('hotels', 'get'): lambda ctx: ({}, {'city': ctx['hotel'].city, 'ordering': "-rating"}),
+    ('hotels', 'post'): lambda ctx: ({}, new_hotel(1)),
+    ('single-hotel', 'get'): lambda ctx: ({'pk': ctx['hotel'].id}, None),
+    ('single-hotel', 'put'): lambda ctx: ({'pk': ctx['hotel'].id}, new_hotel(2)),
+    ('single-hotel', 'delete'): lambda ctx: ({'pk': ctx['hotel'].id}, None),
+    ('city-availability', 'get'): lambda ctx: ({}, {'city': ctx['hotel'].city, 'check_in_date': days(10),
+                                                    'check_out_date': days(13)}),
+    ('add-room', 'post'): lambda ctx: ({'pk': ctx['hotel'].id}, {'room_no': 9001, 'room_type': 'Suite',
+                                                                  'price_per_night': 5000}),
+    ('hotel-room-available', 'post'): lambda ctx: ({'pk': ctx['hotel'].id}, {'check_in_date': days(10),
+                                                                              'check_out_date': days(13)}),
+    ('book-room', 'post'): lambda ctx: ({'pk': ctx['hotel'].id, 'pk2': ctx['rooms'][0].id},
+                                        {'check_in_date': days(400), 'check_out_date': days(402),
+                                         'guest_name': "Guest"}),
+    ('bulk-book', 'post'): lambda ctx: ({'pk': ctx['hotel'].id}, {'bookings': [
+        {'room_id': room.id, 'check_in_date': days(410), 'check_out_date': days(412)} for room in ctx['rooms']]}),
+    ('quote', 'post'): lambda ctx: ({'pk': ctx['hotel'].id}, {'stays': [
+        {'check_in_date': days(10), 'check_out_date': days(13)}, {'check_in_date': days(30),
+                                                                  'check_out_date': days(37)}]}),
+    ('rate-rules', 'get'): lambda ctx: ({'pk': ctx['hotel'].id}, None),
+    ('rate-rules', 'post'): lambda ctx: ({'pk': ctx['hotel'].id}, {'weekdays': RateRule.WEEKDAYS,
+                                                                    'percent': 90}),
+    ('hotel-analytics', 'get'): lambda ctx: ({'pk': ctx['hotel'].id}, {'start': days(-365), 'end': days(0)}),
+    ('booking-cancel', 'delete'): lambda ctx: ({'pk': ctx['booking'].id}, None),
+    ('hotel-bookings', 'get'): lambda ctx: ({'pk': ctx['hotel'].id}, {'booking': 1, 'page_size': 50}),
+    ('cache-stats', 'get'): lambda ctx: ({}, None),
+    ('metrics', 'get'): lambda ctx: ({}, None),
+    ('profiling-token', 'post'): lambda ctx: ({}, None),
+    ('request-profile', 'get'): lambda ctx: ({'pk': ctx['profile_id']}, None),
+    ('async-hotels', 'get'): lambda ctx: ({}, {'city': ctx['hotel'].city, 'ordering': "-rating"}),
+    ('async-single-hotel', 'get'): lambda ctx: ({'pk': ctx['hotel'].id}, None),
+    ('async-hotel-room-available', 'post'): lambda ctx: ({'pk': ctx['hotel'].id}, {'check_in_date': days(10),
+                                                                                    'check_out_date': days(13)}),
+    ('async-hotel-bookings', 'get'): lambda ctx: ({'pk': ctx['hotel'].id}, {'booking': 1, 'page_size': 50}),
+}
+
+
+def regressions(baseline, results, threshold, min_delta_ms):
+    """
+    Describe every route of ``results`` that got worse than ``baseline``: latency or allocations up by more than
+    ``threshold`` (a fraction), latency also by more than ``min_delta_ms``, or any extra query.
+    """
+    found = []
+    for route, result in results.items():
+        base = baseline['routes'].get(route)
+        if base is None:
+            continue
+        for metric in ('p50_ms', 'p95_ms'):
+            if (result[metric] > base[metric] * (1 + threshold)
+                    and result[metric] - base[metric] > min_delta_ms):
+                found.append(f"{route}: {metric} {base[metric]:.2f} -> {result[metric]:.2f}")
+        if result['queries'] > base['queries']:
+            found.append(f"{route}: queries {base['queries']} -> {result['queries']}")
+        if (result['alloc_kib'] > base['alloc_kib'] * (1 + threshold)
+                and result['alloc_kib'] - base['alloc_kib'] > ALLOC_SLACK_KIB):
+            found.append(f"{route}: alloc_kib {base['alloc_kib']:.0f} -> {result['alloc_kib']:.0f}")
+    return found
+
+
+class Command(BaseCommand):
+    help = ("Drive every route of authapi/urls.py against a seeded dataset and report latency, queries and "
+            "allocations, optionally saving them as a baseline or failing on regressions against one")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--hotels', type=int, default=10)
+        parser.add_argument('--rooms', type=int, default=20, help="Rooms per hotel")
+        parser.add_argument('--years', type=int, default=2, help="Years of booking history")
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=20, help="Timed requests per route")
+        parser.add_argument('--routes', help="Comma separated url names, all by default")
+        parser.add_argument('--cold', action='store_true', help="Clear the hotel cache and the availability "
+                                                                "engine before every request")
+        parser.add_argument('--save', metavar='PATH', help="Write the results as a JSON baseline")
+        parser.add_argument('--baseline', metavar='PATH', help="Fail when a route regressed against this baseline")
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help="Allowed relative growth of latency and allocations (default 0.25)")
+        parser.add_argument('--min-delta-ms', type=float, default=1.0,
+                            help="Latency growth below this is never a regression (default 1.0)")
+
+    def handle(self, *args, **options):
+        dataset = {name: options[name] for name in ('seed', 'hotels', 'rooms', 'years', 'users')}
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            if baseline['dataset'] != dataset or baseline['cold'] != options['cold']:
+                raise CommandError(f"The baseline was recorded with {baseline['dataset']} "
+                                   f"(cold={baseline['cold']}), not comparable")
+        scenarios = SCENARIOS
+        if options['routes']:
+            names = set(options['routes'].split(','))
+            scenarios = {key: value for key, value in SCENARIOS.items() if key[0] in names}
+
+        with isolated_database():
+            admin = seed_dataset(**dataset)
+            # Several views print() what they handle.
+            with redirect_stdout(io.StringIO()):
+                results = self.run(scenarios, self.context(admin), options)
+
+        self.stdout.write(f"{'route':<34} {'p50 ms':>8} {'p95 ms':>8} {'queries':>7} {'alloc KiB':>9} "
+                          f"{'p95 vs base':>11}")
+        for route, result in results.items():
+            base = baseline and baseline['routes'].get(route)
+            change = f"{result['p95_ms'] / base['p95_ms']:>10.2f}x" if base and base['p95_ms'] else f"{'-':>11}"
+            self.stdout.write(f"{route:<34} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+                              f"{result['queries']:>7} {result['alloc_kib']:>9.0f} {change}")
+
+        if options['save']:
+            with open(options['save'], 'w') as f:
+                json.dump({'dataset': dataset, 'cold': options['cold'], 'repeat': options['repeat'],
+                           'routes': results}, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Saved baseline to {options['save']}")
+        if baseline is not None:
+            found = regressions(baseline, results, options['threshold'], options['min_delta_ms'])
+            if found:
+                raise CommandError("Regressions against the baseline:\n" + "\n".join(found))
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
+
+    def context(self, admin):
+        hotel = Hotel.objects.order_by('id').first()
+        return {
+            'admin': admin,
+            'hotel': hotel,
+            'rooms': list(Room.objects.filter(hotel_id=hotel).order_by('id')[:2]),
+            'booking': Booking.objects.filter(room_id__hotel_id=hotel, check_in_date__gt=date.today())
+            .order_by('check_in_date').first(),
+            'user': User.objects.exclude(id=admin.id).order_by('id').first(),
+            'profile_id': APIClient().get(reverse('hotels'), HTTP_X_PROFILE=profiling.make_token(admin),
+                                          HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(admin)['access']}")[
+                'X-Profile-Id'],
+        }
+
+    def run(self, scenarios, ctx, options):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(ctx['admin'])['access']}")
+        results = {}
+        for (name, method), scenario in scenarios.items():
+            kwargs, data = scenario(ctx)
+            url = reverse(name, kwargs=kwargs)
+
+            def call():
+                if options['cold']:
+                    hotel_cache.clear()
+                    engine.invalidate()
+                if method == 'get':
+                    return self.send(client, method, url, data)
+                with transaction.atomic():
+                    response = self.send(client, method, url, data)
+                    transaction.set_rollback(True)
+                return response
+
+            # Warm up, and make sure the scenario still describes a valid request.
+            response = call()
+            if response.status_code >= 400:
+                raise CommandError(f"{name} {method.upper()} answered {response.status_code}: "
+                                   f"{getattr(response, 'data', '')}")
+            latency = summary(measure(call, repeat=options['repeat']))
+            # Queries and allocations in a separate run, tracing slows the request down.
+            tracemalloc.start()
+            try:
+                start, _ = tracemalloc.get_traced_memory()
+                with CaptureQueriesContext(connection) as queries:
+                    call()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            results[f"{name} {method.upper()}"] = {
+                'p50_ms': latency['p50'], 'p95_ms': latency['p95'],
+                'queries': len(counted_queries(queries)), 'alloc_kib': (peak - start) / 1024,
+            }
+        return results
+
+    @staticmethod
+    def send(client, method, url, data):
+        if method == 'get':
+            response = client.get(url, data)
+        else:
+            response = getattr(client, method)(url, data, format='json')
+        if response.streaming:
+            # Streamed bodies run their queries while being consumed.
+            b''.join(response.streaming_content)
+        return response
@@ -0,0 +1,69 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from authapi.models import Hotel
+from authapi.search import filter_hotels
+from ._bench import isolated_database, measure, summary
+
+CITIES = ["Pune", "Mumbai", "Delhi", "Goa", "Jaipur", "Chennai", "Kolkata", "Manali", "Udaipur", "Kochi"]
+WORDS = ["Grand", "Royal", "Palace", "Breeze", "Residency", "Inn", "Resort", "Heritage", "Plaza", "Comfort",
+         "Lake", "Hill", "Garden", "Sea", "Park", "Sunrise", "Orchid", "Lotus", "Crown", "Harbour"]
+STREETS = ["MG Road", "FC Road", "Marine Drive", "Mall Road", "Station Road", "Beach Road", "Lake View Road"]
+
+
+class Command(BaseCommand):
+    help = "Compare the FTS5 hotel search with the old icontains filters"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hotels', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        with isolated_database():
+            self.seed(options['hotels'], random.Random(options['seed']))
+            queries = [
+                {'name': 'breeze'},
+                {'city': 'pune'},
+                {'add': 'marine drive'},
+                {'name': 'palace', 'city': 'jaipur'},
+                {'q': 'harbour'},
+                {'name': 'lotus crown 4242'},
+                {'q': 'orchid park 777'},
+            ]
+            self.stdout.write(f"{options['hotels']} hotels")
+            self.stdout.write(f"{'query':<28} {'rows':>6} {'icontains p50':>14} {'fts p50':>8} "
+                              f"{'icontains page p50':>19} {'fts page p50':>13}")
+            for params in queries:
+                rows = self.icontains(params).count()
+                old = summary(measure(lambda: list(self.icontains(params)), options['repeat']))
+                new = summary(measure(lambda: list(filter_hotels(Hotel.objects.all(), params)), options['repeat']))
+                old_page = summary(measure(lambda: list(self.icontains(params)[:50]), options['repeat']))
+                new_page = summary(measure(lambda: list(filter_hotels(Hotel.objects.all(), params)[:50]),
+                                           options['repeat']))
+                label = '&'.join(f"{key}={value}" for key, value in params.items())
+                self.stdout.write(f"{label:<28} {rows:>6} {old['p50']:>14.2f} {new['p50']:>8.2f} "
+                                  f"{old_page['p50']:>19.2f} {new_page['p50']:>13.2f}")
+
+    def seed(self, count, rng):
+        batch = []
+        for i in range(count):
+            name = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}"
+            batch.append(Hotel(name=name, address=f"{rng.randint(1, 999)} {rng.choice(STREETS)}",
+                               city=rng.choice(CITIES), contact_no="9999999999", rating=rng.randint(1, 5),
+                               email="bench@example.com"))
+        Hotel.objects.bulk_create(batch, batch_size=5000)
+
+    @staticmethod
+    def icontains(params):
+        # Same filters as the old HotelView, but combined.
+        condition = Q()
+        for param, column in (('name', 'name'), ('city', 'city'), ('add', 'address')):
+            if params.get(param):
+                condition &= Q(**{f"{column}__icontains": params[param]})
+        if params.get('q'):
+            condition &= (Q(name__icontains=params['q']) | Q(city__icontains=params['q'])
+                          | Q(address__icontains=params['q']))
+        return Hotel.objects.filter(condition).order_by('id')
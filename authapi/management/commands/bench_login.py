@@ -0,0 +1,67 @@
+import asyncio
+import logging
+import time
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+
+from authapi.models import User
+from ._bench import isolated_database, summary
+
+
+class Command(BaseCommand):
+    help = "Compare concurrent login throughput of the sync and the async login view on the ASGI handler"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=16, help="Logins in flight at once")
+        parser.add_argument('--requests', type=int, default=64, help="Logins per view")
+        parser.add_argument('--workers', type=int, help="PASSWORD_HASHING_WORKERS for the run")
+        parser.add_argument('--backlog', type=int, help="PASSWORD_HASHING_BACKLOG for the run")
+
+    def handle(self, *args, **options):
+        overrides = {name: options[option] for name, option in (('PASSWORD_HASHING_WORKERS', 'workers'),
+                                                                ('PASSWORD_HASHING_BACKLOG', 'backlog'))
+                     if options[option]}
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        # Requests turned away by the hashing backlog are 429s, don't log every one of them.
+        request_logger.setLevel(logging.ERROR)
+        try:
+            with isolated_database(), override_settings(**overrides):
+                self.bench(options)
+        finally:
+            request_logger.setLevel(level)
+
+    def bench(self, options):
+        User.objects.create_user(email="bench@example.com", name="Bench", tc=True, password="secret")
+        self.stdout.write(f"{'view':<12} {'logins/sec':>10} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} "
+                          f"{'429':>5} {'errors':>6}")
+        for name in ('login', 'async-login'):
+            self.report(name, *async_to_sync(self.run)(reverse(name), options['concurrency'],
+                                                       options['requests']))
+
+    async def run(self, url, concurrency, requests):
+        # Sync views run one at a time on the ASGI thread-sensitive executor, async ones hash on the pool.
+        client = AsyncClient()
+        slots = asyncio.Semaphore(concurrency)
+        results = []
+
+        async def login():
+            async with slots:
+                start = time.perf_counter()
+                response = await client.post(url, {'email': "bench@example.com", 'password': "secret"},
+                                             content_type='application/json')
+                results.append((response.status_code, (time.perf_counter() - start) * 1000))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(requests)))
+        return results, time.perf_counter() - start
+
+    def report(self, name, results, elapsed):
+        ok = sum(1 for status, _ in results if status == 200)
+        busy = sum(1 for status, _ in results if status == 429)
+        latency = summary([ms for _, ms in results])
+        self.stdout.write(f"{name:<12} {ok / elapsed:>10.1f} {latency['p50']:>8.1f} {latency['p95']:>8.1f} "
+                          f"{latency['max']:>8.1f} {busy:>5} {len(results) - ok - busy:>6}")
@@ -0,0 +1,120 @@
+import threading
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections
+from django.test import Client, override_settings
+
+from authapi.cache import hotel_cache
+from authapi.dbprofile import current_pragmas
+from authapi.models import Hotel, Room, Booking
+from ._bench import isolated_database, summary
+
+# SQLite's defaults with connections closed after every request, what DATABASES had before SQLITE_PRAGMAS.
+PROFILES = {
+    'stock': ({'journal_mode': 'delete'}, 0),
+    'production': (None, 600),
+}
+
+
+class Command(BaseCommand):
+    help = "Compare throughput of mixed hotel reads and booking writes with stock SQLite and SQLITE_PRAGMAS"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8, help="Threads reading hotels and bookings")
+        parser.add_argument('--writers', type=int, default=4, help="Threads booking rooms")
+        parser.add_argument('--reads', type=int, default=150, help="Requests per reader")
+        parser.add_argument('--writes', type=int, default=40, help="Bookings per writer")
+        parser.add_argument('--bookings', type=int, default=2000, help="Booking history to start from")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'profile':<11} {'journal':<8} {'reads/s':>8} {'writes/s':>9} {'read p50':>9} "
+                          f"{'read p95':>9} {'write p50':>10} {'write p95':>10} {'locked':>7} {'errors':>7}")
+        for name, (pragmas, max_age) in PROFILES.items():
+            pragmas = settings.SQLITE_PRAGMAS if pragmas is None else pragmas
+            old_max_age = connection.settings_dict['CONN_MAX_AGE']
+            connection.settings_dict['CONN_MAX_AGE'] = max_age
+            connection.close()
+            try:
+                with override_settings(SQLITE_PRAGMAS=pragmas, SQLITE_PRODUCTION_PROFILE=True), \
+                        isolated_database(on_disk=True):
+                    self.report(name, *self.run(options))
+            finally:
+                connection.settings_dict['CONN_MAX_AGE'] = old_max_age
+
+    def seed(self, rooms, bookings):
+        hotel = Hotel.objects.create(name="Bench Hotel", address="Bench street", city="Pune",
+                                     contact_no="9999999999", rating=4, email="bench@example.com")
+        room_objs = Room.objects.bulk_create(
+            Room(hotel_id=hotel, room_no=no, room_type='Standard Room', price_per_night=1000)
+            for no in range(1, rooms + 1))
+        start = date.today() - timedelta(days=3 * (bookings // rooms + 1))
+        Booking.objects.bulk_create(
+            (Booking(room_id=room_objs[i % rooms], guest_name="guest",
+                     check_in_date=start + timedelta(days=3 * (i // rooms)),
+                     check_out_date=start + timedelta(days=3 * (i // rooms) + 2), total_price=2000)
+             for i in range(bookings)), batch_size=1000)
+        return hotel, room_objs
+
+    def run(self, options):
+        # One room per writer, so bookings never conflict and every failure is the database's.
+        hotel, rooms = self.seed(max(options['writers'], 1), options['bookings'])
+        reads, writes, errors = [], [], {'locked': 0, 'other': 0}
+        lock = threading.Lock()
+
+        def timed(results, func):
+            start = time.perf_counter()
+            try:
+                status = func().status_code
+            except OperationalError as exc:
+                with lock:
+                    errors['locked' if 'locked' in str(exc) else 'other'] += 1
+                return
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                if status >= 400:
+                    errors['other'] += 1
+                else:
+                    results.append(elapsed)
+
+        def reader(n):
+            client = Client()
+            for i in range(options['reads']):
+                if i % 2:
+                    # Uncached, so every read reaches the database.
+                    hotel_cache.clear()
+                    timed(reads, lambda: client.get('/api/hotels'))
+                else:
+                    timed(reads, lambda: client.get(f'/api/hotels/{hotel.id}/rooms/bookings',
+                                                    {'booking': 1, 'page_size': 50}))
+            connections.close_all()
+
+        def writer(n):
+            client = Client()
+            room = rooms[n]
+            check_in = date.today() + timedelta(days=1)
+            for _ in range(options['writes']):
+                data = {'check_in_date': check_in.isoformat(),
+                        'check_out_date': (check_in + timedelta(days=1)).isoformat(), 'guest_name': "guest"}
+                timed(writes, lambda: client.post(f'/api/hotels/{hotel.id}/{room.id}/book', data,
+                                                  content_type='application/json'))
+                check_in += timedelta(days=3)
+            connections.close_all()
+
+        journal = current_pragmas(connection, ['journal_mode'])['journal_mode']
+        threads = [threading.Thread(target=reader, args=(n,)) for n in range(options['readers'])]
+        threads += [threading.Thread(target=writer, args=(n,)) for n in range(options['writers'])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return journal, reads, writes, errors, time.perf_counter() - start
+
+    def report(self, name, journal, reads, writes, errors, elapsed):
+        read, write = summary(reads or [0]), summary(writes or [0])
+        self.stdout.write(f"{name:<11} {journal:<8} {len(reads) / elapsed:>8.1f} {len(writes) / elapsed:>9.1f} "
+                          f"{read['p50']:>9.2f} {read['p95']:>9.2f} {write['p50']:>10.2f} {write['p95']:>10.2f} "
+                          f"{errors['locked']:>7} {errors['other']:>7}")
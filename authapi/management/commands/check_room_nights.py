@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from authapi import inventory
+
+
+class Command(BaseCommand):
+    help = "Check that the RoomNight table holds exactly the nights of the bookings"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Drop stray nights and rebuild incomplete bookings")
+
+    def handle(self, *args, **options):
+        problems = inventory.check()
+        if not problems['stray'] and not problems['incomplete']:
+            self.stdout.write(self.style.SUCCESS("Room nights match the bookings"))
+            return
+        self.stdout.write(f"stray room nights: {len(problems['stray'])}")
+        self.stdout.write(f"bookings with missing or extra nights: {len(problems['incomplete'])} "
+                          f"{problems['incomplete'][:20]}")
+        if not options['fix']:
+            raise CommandError("Room nights are inconsistent, run with --fix to repair them")
+        remaining = inventory.repair(problems)
+        if remaining:
+            raise CommandError(f"{len(remaining)} bookings overlap other bookings and can't get all their nights: "
+                               f"{remaining[:20]}")
+        self.stdout.write(self.style.SUCCESS("Repaired"))
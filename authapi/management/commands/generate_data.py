@@ -0,0 +1,156 @@
+import multiprocessing
+import random
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from authapi import inventory
+from authapi.cache import hotel_cache, hotel_versions
+from authapi.models import User, Hotel, Room, Booking
+from ._dataset import BASE_PRICES, CITIES, ROOM_TYPES, distribution, stays
+
+# Rooms handed to a worker at a time.
+ROOMS_PER_TASK = 200
+
+
+def room_bookings(task):
+    """
+    Bookings of a slice of rooms as plain tuples, so workers never touch the database. Every room gets its own
+    generator seeded from the run's seed and the room's position, which keeps the output independent of
+    ``--workers``.
+    """
+    seed, rooms, start, end, nights, gap = task
+    nights, gap = distribution(nights), distribution(gap)
+    start, end = date.fromordinal(start), date.fromordinal(end)
+    rows = []
+    for index, room_id, price in rooms:
+        rng = random.Random(seed * 1_000_003 + index)
+        for check_in, check_out in stays(rng, start, end, nights, gap):
+            rows.append((room_id, f"Guest {rng.randint(1, 10 ** 6)}", check_in, check_out,
+                         (check_out - check_in).days * price))
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Generate hotels, rooms, users and non-overlapping bookings in bulk, reproducibly from a seed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--hotels', type=int, default=100)
+        parser.add_argument('--rooms', default='uniform:20,200', help="Rooms per hotel (default uniform:20,200)")
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--years', type=float, default=3, help="Years of booking history")
+        parser.add_argument('--ahead', type=int, default=180, help="Days of future bookings")
+        parser.add_argument('--nights', default='exp:3', help="Nights per stay (default exp:3)")
+        parser.add_argument('--gap', default='exp:4', help="Free days between stays of a room (default exp:4)")
+        parser.add_argument('--prefix', default='gen', help="Prefix of hotel names and user emails, which must "
+                                                            "be unique")
+        parser.add_argument('--batch-size', type=int, default=2000, help="Rows per INSERT")
+        parser.add_argument('--chunk-size', type=int, default=50000, help="Bookings per transaction")
+        parser.add_argument('--workers', type=int, default=1, help="Processes generating bookings")
+        parser.add_argument('--skip-room-nights', action='store_true',
+                            help="Leave RoomNight rows to backfill_room_nights")
+
+    def handle(self, *args, **options):
+        for name in ('rooms', 'nights', 'gap'):
+            try:
+                distribution(options[name])
+            except ValueError as exc:
+                raise CommandError(f"--{name}: {exc}")
+        prefix = options['prefix']
+        if Hotel.objects.filter(name__startswith=f"{prefix} hotel ").exists():
+            raise CommandError(f"Data with prefix {prefix!r} exists already, pick another --prefix")
+        rng = random.Random(options['seed'])
+        started = time.perf_counter()
+
+        users = self.generate_users(prefix, options['users'], options['batch_size'])
+        rooms = self.generate_rooms(rng, prefix, options['hotels'], distribution(options['rooms']),
+                                    options['batch_size'])
+        self.stdout.write(f"{options['hotels']} hotels, {len(rooms)} rooms, {users} users")
+
+        today = date.today()
+        start = today - timedelta(days=round(365 * options['years']))
+        end = today + timedelta(days=options['ahead'])
+        tasks = [(options['seed'], rooms[i:i + ROOMS_PER_TASK], start.toordinal(), end.toordinal(),
+                  options['nights'], options['gap']) for i in range(0, len(rooms), ROOMS_PER_TASK)]
+        bookings, nights = self.insert_bookings(tasks, options)
+
+        self.invalidate(prefix)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"{bookings} bookings, {nights} room nights in {elapsed:.1f}s"))
+
+    def invalidate(self, prefix):
+        # Only what covers the new hotels, the cache is shared with auth, replica pins and other versions.
+        for hotel_id in Hotel.objects.filter(name__startswith=f"{prefix} hotel ").values_list('id', flat=True):
+            hotel_versions.bump(hotel_id)
+        hotel_cache.invalidate_lists()
+
+    def generate_users(self, prefix, count, batch_size):
+        # One hash for everybody, hashing is what makes creating users slow.
+        password = make_password(prefix)
+        with transaction.atomic():
+            User.objects.bulk_create(
+                (User(email=f"{prefix}-user{n}@example.com", name=f"User {n}", tc=True, password=password)
+                 for n in range(count)), batch_size=batch_size)
+        return count
+
+    def generate_rooms(self, rng, prefix, count, rooms_per_hotel, batch_size):
+        """
+        Returns ``(index, room id, price)`` of every room, in creation order.
+        """
+        with transaction.atomic():
+            hotels = Hotel.objects.bulk_create(
+                (Hotel(name=f"{prefix} hotel {n}", address=f"{rng.randint(1, 500)} Main Road",
+                       city=rng.choice(CITIES), contact_no="9999999999", rating=rng.randint(1, 5),
+                       email=f"hotel{n}@example.com") for n in range(count)), batch_size=batch_size)
+            rooms = Room.objects.bulk_create(
+                (Room(hotel_id=hotel, room_no=100 + n, room_type=room_type,
+                      price_per_night=BASE_PRICES[room_type] + 100 * rng.randint(0, 10))
+                 for hotel in hotels
+                 for n, room_type in enumerate(rng.choices(ROOM_TYPES, k=rooms_per_hotel(rng)))),
+                batch_size=batch_size)
+        return [(index, room.id, room.price_per_night) for index, room in enumerate(rooms)]
+
+    def insert_bookings(self, tasks, options):
+        if options['workers'] > 1:
+            # Workers only generate, the inserts stay in this process: SQLite takes one writer at a time anyway.
+            connections.close_all()
+            pool = multiprocessing.Pool(options['workers'])
+            generated = pool.imap(room_bookings, tasks)
+        else:
+            pool = None
+            generated = map(room_bookings, tasks)
+        total_bookings = total_nights = 0
+        started = time.perf_counter()
+        chunk = []
+        try:
+            for rows in generated:
+                chunk.extend(rows)
+                while len(chunk) >= options['chunk_size']:
+                    total_nights += self.insert_chunk(chunk[:options['chunk_size']], options)
+                    total_bookings += options['chunk_size']
+                    chunk = chunk[options['chunk_size']:]
+                    self.stdout.write(f"{total_bookings} bookings "
+                                      f"({total_bookings / (time.perf_counter() - started):.0f}/s)")
+            if chunk:
+                total_nights += self.insert_chunk(chunk, options)
+                total_bookings += len(chunk)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        return total_bookings, total_nights
+
+    def insert_chunk(self, rows, options):
+        with transaction.atomic():
+            bookings = Booking.objects.bulk_create(
+                (Booking(room_id_id=room_id, guest_name=guest_name, check_in_date=check_in,
+                         check_out_date=check_out, total_price=total_price)
+                 for room_id, guest_name, check_in, check_out, total_price in rows),
+                batch_size=options['batch_size'])
+            if options['skip_room_nights']:
+                return 0
+            return inventory.book_nights(bookings)
@@ -0,0 +1,87 @@
+import logging
+import random
+import threading
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from authapi.bookings import double_bookings
+from authapi.models import Hotel, Room, Booking
+from ._bench import isolated_database, summary
+
+
+class Command(BaseCommand):
+    help = "Hammer the booking endpoint from several threads and check that no room gets double-booked"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=200, help="Booking attempts per thread")
+        parser.add_argument('--rooms', type=int, default=10)
+        parser.add_argument('--days', type=int, default=90, help="Window the stays are picked from")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        with isolated_database(on_disk=True):
+            hotel = Hotel.objects.create(name="Load Test Hotel", address="Street", city="Pune",
+                                         contact_no="9999999999", rating=4, email="load@example.com")
+            rooms = [Room.objects.create(hotel_id=hotel, room_no=no, room_type='Standard Room', price_per_night=1000)
+                     for no in range(1, options['rooms'] + 1)]
+            results = []
+            lock = threading.Lock()
+
+            def worker(index):
+                rng = random.Random(options['seed'] * 1000 + index)
+                client = Client()
+                local = []
+                try:
+                    for _ in range(options['requests']):
+                        room = rng.choice(rooms)
+                        check_in = date.today() + timedelta(days=rng.randint(1, options['days']))
+                        check_out = check_in + timedelta(days=rng.randint(1, 4))
+                        url = reverse('book-room', kwargs={'pk': hotel.id, 'pk2': room.id})
+                        start = time.perf_counter()
+                        try:
+                            status = client.post(url, {'check_in_date': check_in.isoformat(),
+                                                       'check_out_date': check_out.isoformat(),
+                                                       'guest_name': f"guest {index}"},
+                                                 content_type='application/json').status_code
+                        except Exception as exc:
+                            status = type(exc).__name__
+                        local.append((status, (time.perf_counter() - start) * 1000))
+                finally:
+                    connection.close()
+                    with lock:
+                        results.extend(local)
+
+            threads = [threading.Thread(target=worker, args=(i,)) for i in range(options['threads'])]
+            start = time.perf_counter()
+            request_logger = logging.getLogger('django.request')
+            level = request_logger.level
+            # Rejected bookings are 400s, don't log every one of them.
+            request_logger.setLevel(logging.ERROR)
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            request_logger.setLevel(level)
+
+            booked = sum(1 for status, _ in results if status == 200)
+            rejected = sum(1 for status, _ in results if status == 400)
+            errors = len(results) - booked - rejected
+            latency = summary([ms for _, ms in results])
+            doubles = double_bookings().count()
+
+            self.stdout.write(f"threads={options['threads']} attempts={len(results)} elapsed={elapsed:.2f}s")
+            self.stdout.write(f"booked={booked} rejected={rejected} errors={errors} "
+                              f"rows={Booking.objects.count()}")
+            self.stdout.write(f"bookings/sec={booked / elapsed:.1f} attempts/sec={len(results) / elapsed:.1f}")
+            self.stdout.write(f"latency ms p50={latency['p50']:.2f} p95={latency['p95']:.2f} max={latency['max']:.2f}")
+            if doubles:
+                self.stdout.write(self.style.ERROR(f"double bookings: {doubles}"))
+            else:
+                self.stdout.write(self.style.SUCCESS("double bookings: 0"))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from authapi import ratings
+from authapi.cache import hotel_cache, hotel_versions
+
+
+class Command(BaseCommand):
+    help = "Recompute the review aggregates of hotels from their reviews and fix the ones that drifted"
+
+    def add_arguments(self, parser):
+        parser.add_argument('hotel_ids', nargs='*', type=int, help="Only these hotels (default: all)")
+        parser.add_argument('--check', action='store_true', help="Report stale hotels without fixing them")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        stale = ratings.recompute(options['hotel_ids'] or None, dry_run=options['check'],
+                                  batch_size=options['batch_size'])
+        if not stale:
+            self.stdout.write(self.style.SUCCESS("All hotel ratings are up to date"))
+            return
+        ids = ', '.join(str(hotel_id) for hotel_id in stale[:20]) + (' ...' if len(stale) > 20 else '')
+        if options['check']:
+            self.stdout.write(self.style.WARNING(f"{len(stale)} hotels have stale ratings: {ids}"))
+            return
+        for hotel_id in stale:
+            hotel_versions.bump(hotel_id)
+            hotel_cache.invalidate_hotel(hotel_id)
+        self.stdout.write(self.style.SUCCESS(f"Repaired the ratings of {len(stale)} hotels: {ids}"))
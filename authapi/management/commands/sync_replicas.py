@@ -0,0 +1,32 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = "Copy the primary SQLite database over its replicas, a stand-in for replication in local setups"
+
+    def add_arguments(self, parser):
+        parser.add_argument('aliases', nargs='*', help="Replica aliases, DATABASE_REPLICAS by default")
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or settings.DATABASE_REPLICAS
+        if not aliases:
+            raise CommandError("No replicas, set DATABASE_REPLICAS or name the aliases")
+        primary = connections[DEFAULT_DB_ALIAS]
+        for alias in [DEFAULT_DB_ALIAS, *aliases]:
+            if alias not in connections or connections[alias].vendor != 'sqlite':
+                raise CommandError(f"{alias} is not an SQLite database")
+        primary.ensure_connection()
+        for alias in aliases:
+            replica = connections[alias]
+            replica.close()
+            # The online backup API copies a consistent snapshot while the primary stays writable.
+            target = sqlite3.connect(replica.settings_dict['NAME'])
+            try:
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(f"{alias}: copied from {primary.settings_dict['NAME']}")
@@ -0,0 +1,160 @@
+import threading
+import time
+from contextvars import ContextVar
+
+# Upper bounds of the histogram buckets, +Inf is implied.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# The SQL tally of the request being handled. Context variables follow sync_to_async into its threads,
+# so async views are counted too.
+_current = ContextVar('request_sql', default=None)
+
+
+class SQLTally:
+    __slots__ = ('queries', 'seconds', 'statements')
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+        # A list while authapi.profiling wants every statement.
+        self.statements = None
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    """
+    Installed on every connection (see ``install``), costs a context variable lookup outside requests.
+    """
+    tally = _current.get()
+    if tally is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        tally.queries += 1
+        tally.seconds += elapsed
+        if tally.statements is not None:
+            tally.statements.append({'alias': context['connection'].alias, 'sql': sql, 'params': repr(params),
+                                     'ms': elapsed * 1000})
+
+
+def install(connection):
+    if sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sql_wrapper)
+
+
+def current():
+    return _current.get()
+
+
+def start_request():
+    tally = SQLTally()
+    return tally, _current.set(tally)
+
+
+def resume_request(tally):
+    """
+    Make ``tally`` current again, e.g. while a streamed body runs its queries. Undo with ``end_request``.
+    """
+    return _current.set(tally)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'sum')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                break
+        else:
+            i = len(self.bounds)
+        self.counts[i] += 1
+        self.sum += value
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, count in zip((*self.bounds, '+Inf'), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_sum{{{labels}}} {self.sum}'
+        yield f'{name}_count{{{labels}}} {cumulative}'
+
+
+class Endpoint:
+    __slots__ = ('latency', 'queries', 'sql_seconds', 'response_bytes')
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.sql_seconds = 0.0
+        self.response_bytes = 0
+
+
+class Registry:
+    """
+    Request metrics per URL name and method, rendered in the Prometheus text format.
+
+    Recording is a few additions under a lock, the text is only built when
+    scraped. Counts are per process, like any Prometheus client without a
+    multiprocess collector.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def _endpoint(self, view, method):
+        endpoint = self._endpoints.get((view, method))
+        if endpoint is None:
+            endpoint = self._endpoints.setdefault((view, method), Endpoint())
+        return endpoint
+
+    def observe(self, view, method, seconds, tally):
+        with self._lock:
+            endpoint = self._endpoint(view, method)
+            endpoint.latency.observe(seconds)
+            endpoint.queries.observe(tally.queries)
+            endpoint.sql_seconds += tally.seconds
+
+    def add_bytes(self, view, method, size):
+        with self._lock:
+            self._endpoint(view, method).response_bytes += size
+
+    def render(self):
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            latency, queries, sql_seconds, response_bytes = [], [], [], []
+            for (view, method), endpoint in endpoints:
+                labels = f'view="{view}",method="{method}"'
+                latency.extend(endpoint.latency.samples('authapi_request_duration_seconds', labels))
+                queries.extend(endpoint.queries.samples('authapi_request_sql_queries', labels))
+                sql_seconds.append(f'authapi_request_sql_seconds_total{{{labels}}} {endpoint.sql_seconds}')
+                response_bytes.append(f'authapi_response_bytes_total{{{labels}}} {endpoint.response_bytes}')
+        families = [
+            ('authapi_request_duration_seconds', 'histogram', "Request latency", latency),
+            ('authapi_request_sql_queries', 'histogram', "SQL queries per request", queries),
+            ('authapi_request_sql_seconds_total', 'counter', "Time spent in SQL", sql_seconds),
+            ('authapi_response_bytes_total', 'counter', "Response body bytes", response_bytes),
+        ]
+        lines = []
+        for name, kind, description, samples in families:
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}", *samples]
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+registry = Registry()
@@ -0,0 +1,152 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.utils.decorators import sync_and_async_middleware
+
+from . import metrics, profiling, routers
+
+
+@sync_and_async_middleware
+def replica_pin_middleware(get_response):
+    """
+    Pins the client of every successful write to the primary database for a while, see ``authapi.routers``.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            response = await get_response(request)
+            routers.pin(request, response)
+            return response
+    else:
+        def middleware(request):
+            response = get_response(request)
+            routers.pin(request, response)
+            return response
+    return middleware
+
+
+def _view(request):
+    match = request.resolver_match
+    return match.url_name if match and match.url_name else 'unmatched'
+
+
+def _record_stream(request, response, started, tally):
+    # Streamed bodies run their SQL while being sent, so the request's tally is made current again around
+    # every chunk and the request is recorded once the stream is closed.
+    view = _view(request)
+
+    if response.is_async:
+        async def chunks(content):
+            size = 0
+            try:
+                iterator = aiter(content)
+                while True:
+                    token = metrics.resume_request(tally)
+                    try:
+                        chunk = await anext(iterator)
+                    except StopAsyncIteration:
+                        break
+                    finally:
+                        metrics.end_request(token)
+                    size += len(chunk)
+                    yield chunk
+            finally:
+                metrics.registry.observe(view, request.method, time.perf_counter() - started, tally)
+                metrics.registry.add_bytes(view, request.method, size)
+    else:
+        def chunks(content):
+            size = 0
+            try:
+                iterator = iter(content)
+                while True:
+                    token = metrics.resume_request(tally)
+                    try:
+                        chunk = next(iterator)
+                    except StopIteration:
+                        break
+                    finally:
+                        metrics.end_request(token)
+                    size += len(chunk)
+                    yield chunk
+            finally:
+                metrics.registry.observe(view, request.method, time.perf_counter() - started, tally)
+                metrics.registry.add_bytes(view, request.method, size)
+    response.streaming_content = chunks(response.streaming_content)
+
+
+def _record(request, response, started, tally):
+    if response.streaming:
+        _record_stream(request, response, started, tally)
+        return
+    view = _view(request)
+    metrics.registry.observe(view, request.method, time.perf_counter() - started, tally)
+    metrics.registry.add_bytes(view, request.method, len(response.content))
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """
+    Records latency, SQL queries and time, and response bytes per URL name, see ``authapi.metrics``.
+    Streamed responses are recorded when their body is done.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            started = time.perf_counter()
+            tally, token = metrics.start_request()
+            try:
+                response = await get_response(request)
+            finally:
+                metrics.end_request(token)
+            _record(request, response, started, tally)
+            return response
+    else:
+        def middleware(request):
+            started = time.perf_counter()
+            tally, token = metrics.start_request()
+            try:
+                response = get_response(request)
+            finally:
+                metrics.end_request(token)
+            _record(request, response, started, tally)
+            return response
+    return middleware
+
+
+def _profiled(request, response, profiler):
+    if profiler.active:
+        response['X-Profile-Id'] = profiler.save(request, response)
+    else:
+        response['X-Profile-Status'] = "busy"
+    return response
+
+
+@sync_and_async_middleware
+def profiling_middleware(get_response):
+    """
+    Profiles requests of an admin that carry their profiling token, see ``authapi.profiling``. The profile id
+    comes back in ``X-Profile-Id``. Requests without a token go straight through.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = profiling.requested(request)
+            if token is None:
+                return await get_response(request)
+            if not await sync_to_async(profiling.allowed)(request, token):
+                response = await get_response(request)
+                response['X-Profile-Status'] = "denied"
+                return response
+            with profiling.RequestProfiler(profiling.requested_mode(request)) as profiler:
+                response = await get_response(request)
+            return _profiled(request, response, profiler)
+    else:
+        def middleware(request):
+            token = profiling.requested(request)
+            if token is None:
+                return get_response(request)
+            if not profiling.allowed(request, token):
+                response = get_response(request)
+                response['X-Profile-Status'] = "denied"
+                return response
+            with profiling.RequestProfiler(profiling.requested_mode(request)) as profiler:
+                response = get_response(request)
+            return _profiled(request, response, profiler)
+    return middleware
@@ -0,0 +1,47 @@
+# Generated by Django 5.0.2 on 2026-10-18 14:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("authapi", "0004_alter_booking_check_in_date_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["room_id", "check_in_date", "check_out_date"], name="booking_room_dates_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(fields=["check_in_date"], name="booking_check_in_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="room",
+            index=models.Index(
+                fields=["hotel_id", "room_type", "price_per_night"], name="room_hotel_type_price_idx"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="booking",
+            name="room_id",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="authapi.room",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="room",
+            name="hotel_id",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to="authapi.hotel",
+            ),
+        ),
+    ]
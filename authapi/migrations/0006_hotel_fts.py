@@ -0,0 +1,63 @@
+# Generated by Django 5.0.2 on 2026-10-18 15:20
+
+from django.db import migrations
+
+FTS_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS authapi_hotel_fts USING fts5(
+        name, city, address, content='authapi_hotel', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS authapi_hotel_fts_ai AFTER INSERT ON authapi_hotel BEGIN
+        INSERT INTO authapi_hotel_fts(rowid, name, city, address)
+        VALUES (new.id, new.name, new.city, new.address);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS authapi_hotel_fts_ad AFTER DELETE ON authapi_hotel BEGIN
+        INSERT INTO authapi_hotel_fts(authapi_hotel_fts, rowid, name, city, address)
+        VALUES ('delete', old.id, old.name, old.city, old.address);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS authapi_hotel_fts_au AFTER UPDATE ON authapi_hotel BEGIN
+        INSERT INTO authapi_hotel_fts(authapi_hotel_fts, rowid, name, city, address)
+        VALUES ('delete', old.id, old.name, old.city, old.address);
+        INSERT INTO authapi_hotel_fts(rowid, name, city, address)
+        VALUES (new.id, new.name, new.city, new.address);
+    END
+    """,
+    "INSERT INTO authapi_hotel_fts(authapi_hotel_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS authapi_hotel_fts_ai",
+    "DROP TRIGGER IF EXISTS authapi_hotel_fts_ad",
+    "DROP TRIGGER IF EXISTS authapi_hotel_fts_au",
+    "DROP TABLE IF EXISTS authapi_hotel_fts",
+]
+
+
+def create_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in FTS_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("authapi", "0005_booking_room_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.2 on 2026-10-18 18:20
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("authapi", "0006_hotel_fts"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RateRule",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "room_type",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("Standard Room", "Standard Room"),
+                            ("Deluxe Room", "Deluxe Room"),
+                            ("Suite", "Suite"),
+                            ("Executive Suite", "Executive Suite"),
+                            ("Poolside Room", "Poolside Room"),
+                        ],
+                        max_length=255,
+                    ),
+                ),
+                ("start_date", models.DateField(blank=True, null=True)),
+                ("end_date", models.DateField(blank=True, null=True)),
+                (
+                    "weekdays",
+                    models.PositiveSmallIntegerField(
+                        default=127, validators=[django.core.validators.MaxValueValidator(127)]
+                    ),
+                ),
+                ("percent", models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1)])),
+                ("priority", models.IntegerField(default=0)),
+                (
+                    "hotel_id",
+                    models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="authapi.hotel"),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 5.0.2 on 2026-10-18 19:05
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+# Adding columns rebuilds authapi_hotel on SQLite, which drops the triggers of 0006_hotel_fts. The update
+# trigger now only fires for the indexed columns, rating aggregates are written on every review.
+TRIGGER_SQL = [
+    "DROP TRIGGER IF EXISTS authapi_hotel_fts_ai",
+    "DROP TRIGGER IF EXISTS authapi_hotel_fts_ad",
+    "DROP TRIGGER IF EXISTS authapi_hotel_fts_au",
+    """
+    CREATE TRIGGER authapi_hotel_fts_ai AFTER INSERT ON authapi_hotel BEGIN
+        INSERT INTO authapi_hotel_fts(rowid, name, city, address)
+        VALUES (new.id, new.name, new.city, new.address);
+    END
+    """,
+    """
+    CREATE TRIGGER authapi_hotel_fts_ad AFTER DELETE ON authapi_hotel BEGIN
+        INSERT INTO authapi_hotel_fts(authapi_hotel_fts, rowid, name, city, address)
+        VALUES ('delete', old.id, old.name, old.city, old.address);
+    END
+    """,
+    """
+    CREATE TRIGGER authapi_hotel_fts_au AFTER UPDATE OF name, city, address ON authapi_hotel BEGIN
+        INSERT INTO authapi_hotel_fts(authapi_hotel_fts, rowid, name, city, address)
+        VALUES ('delete', old.id, old.name, old.city, old.address);
+        INSERT INTO authapi_hotel_fts(rowid, name, city, address)
+        VALUES (new.id, new.name, new.city, new.address);
+    END
+    """,
+    "INSERT INTO authapi_hotel_fts(authapi_hotel_fts) VALUES ('rebuild')",
+]
+
+
+def recreate_fts_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in TRIGGER_SQL:
+        schema_editor.execute(sql)
+
+
+def backfill_ratings(apps, schema_editor):
+    Hotel = apps.get_model("authapi", "Hotel")
+    Review = apps.get_model("authapi", "Review")
+    rows = Review.objects.values("hotel_id").order_by().annotate(
+        review_count=Count("id"),
+        rating_sum=Sum("rating"),
+        **{f"rating_{star}_count": Count("id", filter=Q(rating=star)) for star in range(1, 6)},
+    )
+    for row in rows:
+        hotel_id = row.pop("hotel_id")
+        Hotel.objects.filter(id=hotel_id).update(average_rating=row["rating_sum"] / row["review_count"], **row)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("authapi", "0007_raterule"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="hotel",
+            name="review_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="hotel",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="hotel",
+            name="rating_1_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="hotel",
+            name="rating_2_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="hotel",
+            name="rating_3_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="hotel",
+            name="rating_4_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="hotel",
+            name="rating_5_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="hotel",
+            name="average_rating",
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="hotel",
+            index=models.Index(fields=["average_rating"], name="hotel_average_rating_idx"),
+        ),
+        migrations.RunPython(recreate_fts_triggers, migrations.RunPython.noop),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.2 on 2026-10-18 19:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("authapi", "0008_hotel_rating_aggregates"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RoomNight",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField()),
+                (
+                    "booking_id",
+                    models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="authapi.booking"),
+                ),
+                (
+                    "room_id",
+                    models.ForeignKey(
+                        db_index=False, on_delete=django.db.models.deletion.CASCADE, to="authapi.room"
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [models.UniqueConstraint(fields=("room_id", "date"), name="room_night_unique")],
+            },
+        ),
+    ]
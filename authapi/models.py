@@ -5,6 +5,8 @@ from django.db import models
 from django.contrib.auth.models import BaseUserManager, AbstractBaseUser
 from rest_framework.exceptions import ValidationError
 
+from .hashing import amake_password
+
 
 # Validators
 # def rating_validator(value):
@@ -34,6 +36,22 @@ class UserManager(BaseUserManager):
         user.save(using=self._db)
         return user
 
+    async def acreate_user(self, email, name, tc, password=None, password2=None):
+        """
+        Async create_user that hashes the password on the hashing pool.
+        """
+        if not email:
+            raise ValueError("Users must have an email address")
+
+        user = self.model(
+            email=self.normalize_email(email),
+            name=name,
+            tc=tc,
+            password=await amake_password(password),
+        )
+        await user.asave(using=self._db)
+        return user
+
     def create_superuser(self, email, name, tc, password=None, **extra_fields):
         """
         Creates and saves a superuser with the given email, date of
@@ -101,13 +119,28 @@ class Hotel(models.Model):
     contact_no = models.CharField(max_length=10)
     rating = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
     email = models.EmailField()
+    # Aggregates of the hotel's reviews, kept up to date by authapi.ratings.
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_1_count = models.PositiveIntegerField(default=0)
+    rating_2_count = models.PositiveIntegerField(default=0)
+    rating_3_count = models.PositiveIntegerField(default=0)
+    rating_4_count = models.PositiveIntegerField(default=0)
+    rating_5_count = models.PositiveIntegerField(default=0)
+    average_rating = models.FloatField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['average_rating'], name='hotel_average_rating_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
 
 class Room(models.Model):
-    hotel_id = models.ForeignKey(Hotel, on_delete=models.CASCADE)
+    # Covered by room_hotel_type_price_idx, which leads with hotel_id.
+    hotel_id = models.ForeignKey(Hotel, on_delete=models.CASCADE, db_index=False)
     room_no = models.IntegerField()
     room_type = models.CharField(max_length=255, choices=(
         ('Standard Room', 'Standard Room'), ('Deluxe Room', 'Deluxe Room'), ('Suite', 'Suite'),
@@ -115,17 +148,29 @@ class Room(models.Model):
     price_per_night = models.IntegerField()
     is_available = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['hotel_id', 'room_type', 'price_per_night'], name='room_hotel_type_price_idx'),
+        ]
+
     def __str__(self):
         return f"{self.hotel_id.name}, {self.room_no}, {self.id}"
 
 
 class Booking(models.Model):
-    room_id = models.ForeignKey(Room, on_delete=models.CASCADE)
+    # Covered by booking_room_dates_idx, which leads with room_id.
+    room_id = models.ForeignKey(Room, on_delete=models.CASCADE, db_index=False)
     guest_name = models.CharField(max_length=255)
     check_in_date = models.DateField(validators=[MinValueValidator(limit_value=timezone.now().date())])
     check_out_date = models.DateField(validators=[MinValueValidator(limit_value=timezone.now().date())])
     total_price = models.IntegerField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['room_id', 'check_in_date', 'check_out_date'], name='booking_room_dates_idx'),
+            models.Index(fields=['check_in_date'], name='booking_check_in_idx'),
+        ]
+
     def clean(self):
         if self.check_out_date < self.check_in_date:
             raise ValidationError("Check-out date cannot be before check-in date.")
@@ -144,3 +189,63 @@ class Review(models.Model):
     rating = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
     comment = models.TextField()
     date_posted = models.DateField(auto_now_add=True)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'hotel_id_id' in field_names and 'rating' in field_names:
+            # What the hotel aggregates count for this review, so an update can take the old rating out again.
+            instance._counted = (instance.hotel_id_id, instance.rating)
+        return instance
+
+
+class RateRule(models.Model):
+    """
+    Per-night price override, e.g. weekend nights at 120% or a festive season at 150%.
+
+    A night's rate is the room's price_per_night scaled by ``percent`` of the
+    highest-priority rule that covers the night's date and weekday and the
+    room's type (any type when ``room_type`` is blank). ``start_date`` and
+    ``end_date`` are inclusive, leave them empty for a rule that always applies.
+    """
+    # Bit 0 is Monday night, bit 6 Sunday night.
+    EVERY_DAY = 0b1111111
+    WEEKDAYS = 0b0001111
+    WEEKEND = 0b0110000
+
+    hotel_id = models.ForeignKey(Hotel, on_delete=models.CASCADE)
+    room_type = models.CharField(max_length=255, blank=True, choices=Room._meta.get_field('room_type').choices)
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    weekdays = models.PositiveSmallIntegerField(default=EVERY_DAY, validators=[MaxValueValidator(EVERY_DAY)])
+    percent = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    priority = models.IntegerField(default=0)
+
+    def clean(self):
+        if self.start_date and self.end_date and self.end_date < self.start_date:
+            raise ValidationError("End date cannot be before start date.")
+
+    def __str__(self):
+        return f"{self.hotel_id_id} {self.room_type or 'all rooms'} {self.percent}%"
+
+
+class RoomNight(models.Model):
+    """
+    One row per room and night sold, from a booking's check-in night up to the night before check-out.
+
+    The unique constraint makes selling a night twice impossible at the database
+    level, whichever path the booking came through. Rows are written by
+    authapi.inventory and go away with their booking.
+    """
+    room_id = models.ForeignKey(Room, on_delete=models.CASCADE, db_index=False)
+    booking_id = models.ForeignKey(Booking, on_delete=models.CASCADE)
+    date = models.DateField()
+
+    class Meta:
+        constraints = [
+            # Also the index for lookups by room, so room_id needs no index of its own.
+            models.UniqueConstraint(fields=['room_id', 'date'], name='room_night_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.room_id_id} {self.date}"
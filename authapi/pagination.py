@@ -0,0 +1,158 @@
+import base64
+import json
+from functools import reduce
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(pagination.BasePagination):
+    """
+    Cursor pagination on the queryset's own ``order_by`` plus ``id`` as a tie breaker.
+
+    The cursor holds the ordering values of the last (or first) row of a page,
+    so every page is a ``WHERE (ordering) > (cursor) LIMIT n`` query and costs
+    the same no matter how deep the client goes. Pagination is used when the
+    client sends ``cursor`` or ``page_size``, plain requests keep getting a list.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.page_size = getattr(settings, 'PAGINATION_PAGE_SIZE', 50)
+        self.max_page_size = getattr(settings, 'PAGINATION_MAX_PAGE_SIZE', 500)
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request)
+        if queryset is None:
+            return None
+        return self.finish_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request)
+        if queryset is None:
+            return None
+        return self.finish_page([instance async for instance in queryset])
+
+    def page_queryset(self, queryset, request):
+        if not self.is_requested(request):
+            return None
+        self.request = request
+        self.model = queryset.model
+        self.annotations = set(queryset.query.annotations)
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+
+        self.values, self.reverse = self.decode_cursor(request)
+        ordering = self.ordering
+        if self.reverse:
+            ordering = [(name, not descending) for name, descending in ordering]
+
+        queryset = queryset.order_by(*[('-' if descending else '') + name for name, descending in ordering])
+        if self.values is not None:
+            queryset = queryset.filter(self.after(ordering, self.values))
+        return queryset[:self.page_size + 1]
+
+    def finish_page(self, results):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+
+        self.has_next = has_more if not self.reverse else self.values is not None
+        self.has_previous = self.values is not None if not self.reverse else has_more
+        self.first = results[0] if results else None
+        self.last = results[-1] if results else None
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: "Must be an integer."})
+        if page_size < 1:
+            raise ValidationError({self.page_size_query_param: "Must be greater than 0."})
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, queryset):
+        order_by = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        ordering = []
+        for field in order_by:
+            if not isinstance(field, str) or '__' in field.lstrip('-') or field.startswith('?'):
+                raise ValidationError({"ordering": f"Can not paginate on '{field}'."})
+            name = field.lstrip('-')
+            name = 'id' if name == 'pk' else name
+            if name not in queryset.query.annotations:
+                try:
+                    queryset.model._meta.get_field(name)
+                except FieldDoesNotExist:
+                    raise ValidationError({"ordering": f"Unknown field '{name}'."})
+            ordering.append((name, field.startswith('-')))
+        if not any(name == 'id' for name, _ in ordering):
+            ordering.append(('id', False))
+        return ordering
+
+    @staticmethod
+    def after(ordering, values):
+        # (a, b, id) > (x, y, z) expanded so each column can have its own direction.
+        clauses = []
+        for index, (name, descending) in enumerate(ordering):
+            equal = {ordering[i][0]: values[i] for i in range(index)}
+            lookup = f"{name}__lt" if descending else f"{name}__gt"
+            clauses.append(Q(**equal, **{lookup: values[index]}))
+        return reduce(lambda left, right: left | right, clauses)
+
+    def encode_cursor(self, instance, reverse):
+        values = []
+        for name, _ in self.ordering:
+            value = getattr(instance, name if name in self.annotations else instance._meta.get_field(name).attname)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        payload = json.dumps({'o': self.ordering_key(), 'v': values, 'r': reverse}, separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)).decode())
+            if payload['o'] != self.ordering_key() or len(payload['v']) != len(self.ordering):
+                raise ValueError
+            values = [value if name in self.annotations else self.model._meta.get_field(name).to_python(value)
+                      for (name, _), value in zip(self.ordering, payload['v'])]
+            return values, bool(payload.get('r'))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def ordering_key(self):
+        return ','.join(('-' if descending else '') + name for name, descending in self.ordering)
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        return self.encode_cursor(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first is None:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.first, reverse=True)
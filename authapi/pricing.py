@@ -0,0 +1,117 @@
+from datetime import date
+
+import numpy as np
+
+from .cache import hotel_cache, rate_versions
+from .models import RateRule, Room
+
+ROOM_TYPE_CODES = {room_type: code for code, (room_type, _) in
+                   enumerate(Room._meta.get_field('room_type').choices)}
+ANY_ROOM_TYPE = -1
+
+
+def days(values):
+    return np.asarray(values, dtype='datetime64[D]')
+
+
+class RateTable:
+    """
+    A hotel's RateRules as arrays, so rooms x nights are priced with array operations.
+
+    Every rule is matched against every room and night at once, the last
+    matching rule in ``(priority, id)`` order sets the night's percent and
+    stay totals are differences of a cumulative sum over the nights. The
+    number of rooms, stays or nights never turns into a Python loop.
+    """
+    FIELDS = ('room_type', 'start_date', 'end_date', 'weekdays', 'percent')
+
+    def __init__(self, rules):
+        """
+        ``rules`` are rows of ``FIELDS``, ordered by priority and id.
+        """
+        self.room_types = np.array([ROOM_TYPE_CODES.get(rule[0], ANY_ROOM_TYPE) for rule in rules],
+                                   dtype=np.int64)
+        self.starts = days([rule[1] or date.min for rule in rules])
+        self.ends = days([rule[2] or date.max for rule in rules])
+        self.weekdays = np.array([rule[3] for rule in rules], dtype=np.int64)
+        self.percents = np.array([rule[4] for rule in rules], dtype=np.int64)
+
+    @classmethod
+    def for_hotel(cls, hotel_id):
+        # Cached until a rule of the hotel changes. Kept out of hotel_cache, whose hit counters are about
+        # hotel payloads.
+        key = f'rates:{hotel_id}:{rate_versions.get(hotel_id)}'
+        return cls(hotel_cache.shared.get_or_set(key, lambda: list(
+            RateRule.objects.filter(hotel_id=hotel_id).order_by('priority', 'id').values_list(*cls.FIELDS)),
+            hotel_cache.ttl))
+
+    def nightly_rates(self, prices, room_types, first, last):
+        """
+        Rates of each room (rows) for the nights ``first`` to ``last - 1`` (columns).
+        """
+        nights = np.arange(days(first), days(last))
+        prices = np.asarray(prices, dtype=np.int64)
+        percents = np.full((len(prices), len(nights)), 100, dtype=np.int64)
+        if len(self.percents):
+            # 1970-01-01 was a Thursday, weekday 3.
+            weekday = (nights.astype(np.int64) + 3) % 7
+            on_night = ((nights >= self.starts[:, None]) & (nights <= self.ends[:, None])
+                        & ((self.weekdays[:, None] >> weekday) & 1).astype(bool))
+            on_room = (self.room_types[:, None] == ANY_ROOM_TYPE) | (self.room_types[:, None] == room_types)
+            matches = on_room[:, :, None] & on_night[:, None, :]
+            last_match = len(self.percents) - 1 - np.argmax(matches[::-1], axis=0)
+            percents = np.where(matches.any(axis=0), self.percents[last_match], percents)
+        # Rounded to the nearest rupee.
+        return (prices[:, None] * percents + 50) // 100
+
+    def _cumulative(self, prices, room_types, first, last):
+        rates = self.nightly_rates(prices, room_types, first, last)
+        cumulative = np.zeros((rates.shape[0], rates.shape[1] + 1), dtype=np.int64)
+        np.cumsum(rates, axis=1, out=cumulative[:, 1:])
+        return cumulative
+
+    def quote(self, prices, room_types, check_ins, check_outs):
+        """
+        Total price of every room (rows) for every stay (columns).
+        """
+        check_ins, check_outs = days(check_ins), days(check_outs)
+        first = check_ins.min()
+        cumulative = self._cumulative(prices, room_types, first, check_outs.max())
+        return (cumulative[:, (check_outs - first).astype(np.int64)]
+                - cumulative[:, (check_ins - first).astype(np.int64)])
+
+    def stay_totals(self, prices, room_types, check_ins, check_outs):
+        """
+        Total price of each ``(room, check_in, check_out)`` triple.
+        """
+        check_ins, check_outs = days(check_ins), days(check_outs)
+        first = check_ins.min()
+        cumulative = self._cumulative(prices, room_types, first, check_outs.max())
+        rows = np.arange(len(cumulative))
+        return (cumulative[rows, (check_outs - first).astype(np.int64)]
+                - cumulative[rows, (check_ins - first).astype(np.int64)])
+
+
+def room_arrays(rooms):
+    return (np.array([room.price_per_night for room in rooms], dtype=np.int64),
+            np.array([ROOM_TYPE_CODES.get(room.room_type, ANY_ROOM_TYPE) for room in rooms], dtype=np.int64))
+
+
+def quote_rooms(hotel_id, rooms, stays):
+    """
+    Totals of every room for every ``(check_in, check_out)`` stay, as a ``len(rooms) x len(stays)`` array.
+    """
+    if not rooms or not stays:
+        return np.zeros((len(rooms), len(stays)), dtype=np.int64)
+    check_ins, check_outs = zip(*stays)
+    return RateTable.for_hotel(hotel_id).quote(*room_arrays(rooms), check_ins, check_outs)
+
+
+def stay_prices(hotel_id, rooms, check_ins, check_outs):
+    """
+    What booking ``rooms[i]`` from ``check_ins[i]`` to ``check_outs[i]`` costs. The booking paths charge this,
+    so a booking always costs what it was quoted.
+    """
+    if not rooms:
+        return []
+    return RateTable.for_hotel(hotel_id).stay_totals(*room_arrays(rooms), check_ins, check_outs).tolist()
@@ -0,0 +1,233 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import suppress
+
+from django.conf import settings
+from django.core import signing
+from rest_framework.exceptions import AuthenticationFailed
+
+from . import metrics
+from .authentication import CachedJWTAuthentication
+
+SALT = 'authapi.profiling'
+HEADER = 'HTTP_X_PROFILE'
+MODE_HEADER = 'HTTP_X_PROFILE_MODE'
+QUERY_PARAM = 'profile'
+MODES = ('cprofile', 'sample')
+
+# cProfile can't run twice at once on Python 3.12+, and one profiled request at a time is plenty.
+_busy = threading.Lock()
+
+
+def directory():
+    path = getattr(settings, 'PROFILING_DIR', None) or os.path.join(tempfile.gettempdir(), 'authapi-profiles')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def make_token(user):
+    return signing.dumps({'user': user.pk}, salt=SALT)
+
+
+def token_user_id(token):
+    """
+    The id of the admin a profiling token was issued to, None if it is forged or expired.
+    """
+    try:
+        return signing.loads(token, salt=SALT, max_age=getattr(settings, 'PROFILING_TOKEN_MAX_AGE', 600))['user']
+    except (signing.BadSignature, KeyError, TypeError):
+        return None
+
+
+def allowed(request, token):
+    """
+    Whether ``request`` may be profiled with ``token``: it must be authenticated, like the API views do it, as
+    the admin the token was issued to. A leaked token is useless on its own.
+    """
+    user_id = token_user_id(token)
+    if user_id is None:
+        return False
+    try:
+        authenticated = CachedJWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    return authenticated is not None and authenticated[0].pk == user_id and authenticated[0].is_admin
+
+
+def requested(request):
+    """
+    The profiling token of ``request``, None for the ordinary request, which costs a header lookup.
+    """
+    token = request.META.get(HEADER)
+    if token is None and f'{QUERY_PARAM}=' in request.META.get('QUERY_STRING', ''):
+        token = request.GET.get(QUERY_PARAM)
+    return token
+
+
+def requested_mode(request):
+    return request.META.get(MODE_HEADER) or request.GET.get(f'{QUERY_PARAM}_mode')
+
+
+class Sampler:
+    """
+    Samples the stack of one thread every ``interval`` seconds from a background thread.
+
+    Unlike cProfile it doesn't slow the profiled code down, at the price of
+    missing anything shorter than the interval.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.frames = {}
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                key = (code.co_name, code.co_filename, code.co_firstlineno)
+                stack.append(self.frames.setdefault(key, len(self.frames)))
+                frame = frame.f_back
+            self.samples.append(stack[::-1])
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+    def speedscope(self, name):
+        frames = [{'name': func, 'file': file, 'line': line} for (func, file, line) in self.frames]
+        weight = self.interval * 1000
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled', 'name': name, 'unit': 'milliseconds', 'startValue': 0,
+                'endValue': self.elapsed * 1000, 'samples': self.samples, 'weights': [weight] * len(self.samples),
+            }],
+            'exporter': 'authapi.profiling',
+        }
+
+
+class RequestProfiler:
+    """
+    Profiles its ``with`` block with cProfile or the ``Sampler`` and records every SQL statement run in it.
+
+    Works around ``get_response(request)`` as well as ``await
+    get_response(request)``. The profile covers the thread the block runs in,
+    which for async views is the event loop; their SQL, which runs in other
+    threads, is still complete. Only one request is profiled at a time, the
+    block runs unprofiled (``active`` is False) while another one is.
+    """
+
+    def __init__(self, mode):
+        self.mode = mode if mode in MODES else MODES[0]
+
+    def __enter__(self):
+        self.active = _busy.acquire(blocking=False)
+        if not self.active:
+            return self
+        self.tally, self._token = metrics.current(), None
+        if self.tally is None:
+            self.tally, self._token = metrics.start_request()
+        self.tally.statements = []
+        self.started = time.perf_counter()
+        if self.mode == 'sample':
+            self.sampler = Sampler(getattr(settings, 'PROFILING_SAMPLE_INTERVAL', 0.001)).__enter__()
+        else:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self.active:
+            return
+        try:
+            if self.mode == 'sample':
+                self.sampler.__exit__(*exc_info)
+            else:
+                self.profiler.disable()
+            self.elapsed = time.perf_counter() - self.started
+            self.statements, self.tally.statements = self.tally.statements, None
+            if self._token is not None:
+                metrics.end_request(self._token)
+        finally:
+            _busy.release()
+
+    def save(self, request, response):
+        """
+        Store the profile next to its metadata and SQL, returns its id.
+        """
+        profile_id = str(uuid.uuid4())
+        name = f"{request.method} {request.get_full_path()}"
+        if self.mode == 'sample':
+            filename = f"{profile_id}.speedscope.json"
+            with open(os.path.join(directory(), filename), 'w') as f:
+                json.dump(self.sampler.speedscope(name), f)
+        else:
+            filename = f"{profile_id}.prof"
+            self.profiler.dump_stats(os.path.join(directory(), filename))
+        save(profile_id, {
+            'id': profile_id, 'request': name, 'status': response.status_code, 'mode': self.mode,
+            'ms': self.elapsed * 1000, 'sql': self.statements,
+            'sql_ms': sum(statement['ms'] for statement in self.statements), 'file': filename,
+        })
+        prune()
+        return profile_id
+
+
+def save(profile_id, meta):
+    with open(os.path.join(directory(), f"{profile_id}.json"), 'w') as f:
+        json.dump(meta, f)
+
+
+def load(profile_id):
+    """
+    The stored metadata and SQL of a profile, with a text summary of cProfile runs. Raises ``FileNotFoundError``.
+    """
+    with open(os.path.join(directory(), f"{profile_id}.json")) as f:
+        meta = json.load(f)
+    if meta['mode'] == 'cprofile':
+        out = io.StringIO()
+        pstats.Stats(path(meta), stream=out).sort_stats('cumulative').print_stats(30)
+        meta['summary'] = out.getvalue()
+    return meta
+
+
+def path(meta):
+    return os.path.join(directory(), meta['file'])
+
+
+def prune(keep=None):
+    """
+    Delete all but the ``keep`` (``PROFILING_KEEP``) newest profiles.
+    """
+    keep = getattr(settings, 'PROFILING_KEEP', 100) if keep is None else keep
+    folder = directory()
+    metas = sorted((entry for entry in os.scandir(folder)
+                    if entry.name.endswith('.json') and not entry.name.endswith('.speedscope.json')),
+                   key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in metas[keep:]:
+        profile_id = entry.name[:-len('.json')]
+        for name in (entry.name, f"{profile_id}.prof", f"{profile_id}.speedscope.json"):
+            # Another process may be pruning too.
+            with suppress(FileNotFoundError):
+                os.remove(os.path.join(folder, name))
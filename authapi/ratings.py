@@ -0,0 +1,105 @@
+import math
+
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Q, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from .models import Hotel, Review
+
+STARS = range(1, 6)
+HISTOGRAM_FIELDS = [f'rating_{star}_count' for star in STARS]
+AGGREGATE_FIELDS = ['review_count', 'rating_sum', *HISTOGRAM_FIELDS, 'average_rating']
+
+
+def adjust(hotel_id, added=(), removed=()):
+    """
+    Add and remove review ratings to a hotel's aggregates in one UPDATE, computed by the database so
+    concurrent reviews can't overwrite each other's counts.
+    """
+    count = len(added) - len(removed)
+    total = sum(added) - sum(removed)
+    changes = {
+        'review_count': F('review_count') + count,
+        'rating_sum': F('rating_sum') + total,
+        # SET expressions see the old row, so the average is computed from the new sum and count here.
+        'average_rating': Coalesce(Cast(F('rating_sum') + total, FloatField()) / NullIf(F('review_count') + count, 0),
+                                   Value(0.0)),
+    }
+    for star in STARS:
+        delta = list(added).count(star) - list(removed).count(star)
+        if delta:
+            changes[f'rating_{star}_count'] = F(f'rating_{star}_count') + delta
+    Hotel.objects.filter(id=hotel_id).update(**changes)
+
+
+def review_saved(review, created):
+    """
+    Count a saved review in its hotel's aggregates. Returns the ids of the hotels that changed.
+    """
+    new = (review.hotel_id_id, int(review.rating))
+    old = None if created else getattr(review, '_counted', None)
+    if not created and old is None:
+        # Saved from an instance that wasn't loaded from the database, what was counted before is unknown.
+        review._counted = new
+        return recompute([new[0]])
+    review._counted = new
+    if old == new:
+        return []
+    with transaction.atomic():
+        if old is None:
+            adjust(new[0], added=[new[1]])
+            return [new[0]]
+        if old[0] == new[0]:
+            adjust(new[0], added=[new[1]], removed=[old[1]])
+            return [new[0]]
+        adjust(old[0], removed=[old[1]])
+        adjust(new[0], added=[new[1]])
+        return [old[0], new[0]]
+
+
+def review_deleted(review):
+    hotel_id, rating = getattr(review, '_counted', (review.hotel_id_id, review.rating))
+    adjust(hotel_id, removed=[int(rating)])
+    return [hotel_id]
+
+
+def expected_aggregates(hotel_ids=None):
+    """
+    Aggregates computed from scratch with one GROUP BY over the reviews, keyed by hotel id.
+    """
+    reviews = Review.objects.all()
+    if hotel_ids is not None:
+        reviews = reviews.filter(hotel_id__in=hotel_ids)
+    rows = reviews.values('hotel_id').order_by().annotate(
+        review_count=Count('id'),
+        rating_sum=Sum('rating'),
+        **{f'rating_{star}_count': Count('id', filter=Q(rating=star)) for star in STARS},
+    )
+    return {row.pop('hotel_id'): row for row in rows}
+
+
+def recompute(hotel_ids=None, dry_run=False, batch_size=500):
+    """
+    Rewrite the aggregates of every hotel (or of ``hotel_ids``) that disagree with its reviews.
+
+    Returns the ids of the hotels that were off. ``bulk_update`` sends no
+    signals, callers outside a review save have to refresh the hotel caches.
+    """
+    expected = expected_aggregates(hotel_ids)
+    hotels = Hotel.objects.only('id', *AGGREGATE_FIELDS).order_by('id')
+    if hotel_ids is not None:
+        hotels = hotels.filter(id__in=hotel_ids)
+    empty = dict.fromkeys(AGGREGATE_FIELDS[:-1], 0)
+
+    stale = []
+    for hotel in hotels.iterator(chunk_size=batch_size):
+        values = expected.get(hotel.id, empty)
+        values = {**values, 'average_rating': values['rating_sum'] / values['review_count']
+                  if values['review_count'] else 0.0}
+        if any(not math.isclose(getattr(hotel, field), value) for field, value in values.items()):
+            for field, value in values.items():
+                setattr(hotel, field, value)
+            stale.append(hotel)
+    if stale and not dry_run:
+        Hotel.objects.bulk_update(stale, AGGREGATE_FIELDS, batch_size=batch_size)
+    return [hotel.id for hotel in stale]
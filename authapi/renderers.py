@@ -0,0 +1,108 @@
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+
+def dump(row):
+    return json.dumps(row, cls=encoders.JSONEncoder, ensure_ascii=False, separators=(',', ':'))
+
+
+class PrometheusRenderer(renderers.BaseRenderer):
+    """
+    The Prometheus text exposition format, the view hands over the finished text.
+    """
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            # Errors, e.g. {"detail": "..."} from a failed permission check.
+            data = f"{data.get('detail', data)}\n"
+        return data.encode(self.charset)
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """
+    Newline delimited JSON, one object per line. Selected with ``?format=ndjson``
+    or ``Accept: application/x-ndjson``.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(dump(row) + '\n' for row in rows).encode(self.charset)
+
+
+def iter_serialized(queryset, serializer_class, chunk_size=2000):
+    """
+    Serialize ``queryset`` row by row while the database hands it over ``chunk_size`` rows at a time.
+    """
+    serializer = serializer_class()
+    for instance in queryset.iterator(chunk_size=chunk_size):
+        yield serializer.to_representation(instance)
+
+
+async def aiter_serialized(queryset, serializer_class, chunk_size=2000):
+    serializer = serializer_class()
+    async for instance in queryset.aiterator(chunk_size=chunk_size):
+        yield serializer.to_representation(instance)
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield dump(row) + '\n'
+
+
+def json_array(rows):
+    yield '['
+    first = True
+    for row in rows:
+        yield dump(row) if first else ',' + dump(row)
+        first = False
+    yield ']'
+
+
+async def andjson_lines(rows):
+    async for row in rows:
+        yield dump(row) + '\n'
+
+
+async def ajson_array(rows):
+    yield '['
+    first = True
+    async for row in rows:
+        yield dump(row) if first else ',' + dump(row)
+        first = False
+    yield ']'
+
+
+def streaming_response(queryset, serializer_class, ndjson=True, filename=None):
+    rows = iter_serialized(queryset, serializer_class)
+    return stream(rows, ndjson, filename)
+
+
+def astreaming_response(queryset, serializer_class, ndjson=True, filename=None):
+    """
+    ``streaming_response`` for async views, the rows are fetched with the async ORM.
+    """
+    rows = aiter_serialized(queryset, serializer_class)
+    return stream(rows, ndjson, filename, asynchronous=True)
+
+
+def stream(rows, ndjson, filename, asynchronous=False):
+    if ndjson:
+        content = andjson_lines(rows) if asynchronous else ndjson_lines(rows)
+        response = StreamingHttpResponse(content, content_type=NDJSONRenderer.media_type)
+    else:
+        content = ajson_array(rows) if asynchronous else json_array(rows)
+        response = StreamingHttpResponse(content, content_type='application/json')
+    if filename:
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
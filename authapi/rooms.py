@@ -0,0 +1,53 @@
+from django.db import transaction
+
+from .cache import hotel_versions
+from .models import Room
+from .serializers import BulkRoomSerializer
+
+
+def expand(rooms, ranges):
+    """
+    Turn explicit rooms and ``room_no_from``..``room_no_to`` ranges into one list of room dicts.
+    """
+    items = list(rooms)
+    for room_range in ranges:
+        for room_no in range(room_range['room_no_from'], room_range['room_no_to'] + 1):
+            items.append({'room_no': room_no, 'room_type': room_range['room_type'],
+                          'price_per_night': room_range['price_per_night']})
+    return items
+
+
+def provision_rooms(hotel, items):
+    """
+    Validate ``items`` and insert the valid ones with ``bulk_create``.
+
+    Room numbers that already exist in the hotel, or that appear twice in
+    ``items``, are reported instead of inserted. Returns the created rooms and
+    a list of ``{"index", "room_no", "errors"}`` for the rejected items.
+    """
+    errors = []
+    valid = []
+    for index, item in enumerate(items):
+        serializer = BulkRoomSerializer(data=item)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            errors.append({'index': index, 'room_no': item.get('room_no'), 'errors': serializer.errors})
+
+    with transaction.atomic():
+        taken = set(Room.objects.filter(hotel_id=hotel, room_no__in={data['room_no'] for _, data in valid})
+                    .values_list('room_no', flat=True))
+        rooms = []
+        for index, data in valid:
+            if data['room_no'] in taken:
+                errors.append({'index': index, 'room_no': data['room_no'],
+                               'errors': {'room_no': ["Room number already exists in this hotel."]}})
+                continue
+            taken.add(data['room_no'])
+            rooms.append(Room(hotel_id=hotel, **data))
+        Room.objects.bulk_create(rooms, batch_size=500)
+        if rooms:
+            # bulk_create does not send post_save
+            hotel_versions.bump_for_write(hotel.id)
+    errors.sort(key=lambda error: error['index'])
+    return rooms, errors
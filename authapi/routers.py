@@ -0,0 +1,105 @@
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+# Set while a ``replica_reads`` handler runs.
+_replica_reads = ContextVar('replica_reads', default=False)
+
+PIN_COOKIE = 'db_pin'
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def sticky_seconds():
+    return getattr(settings, 'DATABASE_REPLICA_STICKY_SECONDS', 5)
+
+
+def shared():
+    return caches[getattr(settings, 'HOTEL_CACHE_ALIAS', 'default')]
+
+
+class PrimaryReplicaRouter:
+    """
+    Reads of ``replica_reads`` views go to a random alias of ``DATABASE_REPLICAS``,
+    everything else (writes, authentication, other views) to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        aliases = replicas()
+        if aliases and _replica_reads.get():
+            return random.choice(aliases)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the primary's rows.
+        return True
+
+
+def pin_key(user_id):
+    return f'db-pin:{user_id}'
+
+
+def pinned(request):
+    """
+    Whether ``request`` comes from a client that wrote within the sticky window, by cookie or by user.
+    """
+    if PIN_COOKIE in request.COOKIES:
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user and user.is_authenticated and shared().get(pin_key(user.pk)))
+
+
+def pin(request, response):
+    """
+    Keep the client of a successful write on the primary for ``DATABASE_REPLICA_STICKY_SECONDS``.
+    """
+    if not replicas() or request.method in SAFE_METHODS or response.status_code >= 400:
+        return
+    response.set_cookie(PIN_COOKIE, '1', max_age=sticky_seconds(), httponly=True, samesite='Lax')
+    # Token clients may not keep cookies.
+    user = getattr(request, 'user', None)
+    if user and user.is_authenticated:
+        shared().set(pin_key(user.pk), True, sticky_seconds())
+
+
+def recently_written(version):
+    return version is not None and time.time_ns() - version < sticky_seconds() * 1e9
+
+
+def replica_reads(written_func=None):
+    """
+    Run a read-only APIView handler against a replica, unless its client is pinned to the primary.
+
+    ``written_func(request, *args, **kwargs)`` returns the version (a
+    nanosecond timestamp, see ``authapi.cache.VersionCounter``) of the data
+    the response is built from. Data written within the sticky window is read
+    from the primary too, so nobody caches a lagging replica's payload under
+    a new version or ETag. Goes below ``conditional``, 304s never get here.
+    """
+
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            if (not replicas() or pinned(request)
+                    or (written_func and recently_written(written_func(request, *args, **kwargs)))):
+                return handler(view, request, *args, **kwargs)
+            token = _replica_reads.set(True)
+            try:
+                return handler(view, request, *args, **kwargs)
+            finally:
+                _replica_reads.reset(token)
+
+        return wrapper
+
+    return decorator
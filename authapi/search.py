@@ -0,0 +1,116 @@
+from django.db import connection
+from django.db.models import Exists, F, Min, OuterRef, Q, Window
+from django.db.models.expressions import RawSQL
+from rest_framework.exceptions import ValidationError
+
+from .bookings import conflicting_bookings
+from .models import Room
+
+FTS_TABLE = 'authapi_hotel_fts'
+
+# query param -> Hotel column
+TEXT_FILTERS = {
+    'name': 'name',
+    'city': 'city',
+    'add': 'address',
+}
+
+# The trigram tokenizer needs at least 3 characters to match anything.
+MIN_FTS_LENGTH = 3
+
+# ?ordering= names -> Hotel fields. Ratings sort by the review average, not the hotel's own stars.
+ORDERING_FIELDS = {
+    'rating': 'average_rating',
+}
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def fts_phrase(value):
+    return '"' + value.replace('"', '""') + '"'
+
+
+def order_hotels(queryset, ordering):
+    fields = []
+    for field in ordering.split(","):
+        name = field.lstrip('-')
+        fields.append(field[:len(field) - len(name)] + ORDERING_FIELDS.get(name, name))
+    return queryset.order_by(*fields)
+
+
+def filter_hotels(queryset, params):
+    """
+    Apply the ``name``, ``city``, ``add``, ``q`` and ``rating`` filters of HotelView together (AND).
+
+    ``rating`` matches hotels whose review average rounds to that many stars.
+
+    Text filters go through the ``authapi_hotel_fts`` trigram index, which
+    matches substrings case-insensitively just like ``icontains``. Free text
+    ``q`` searches are ranked by bm25. Terms too short for the index, and
+    databases without FTS5, fall back to ``icontains``.
+    """
+    match = []
+    ranked = False
+    fallback = Q()
+    use_fts = fts_available()
+
+    for param, column in TEXT_FILTERS.items():
+        value = params.get(param)
+        if not value:
+            continue
+        if use_fts and len(value) >= MIN_FTS_LENGTH:
+            match.append(f"{column} : {fts_phrase(value)}")
+        else:
+            fallback &= Q(**{f"{column}__icontains": value})
+
+    search = params.get('q')
+    if search:
+        if use_fts and len(search) >= MIN_FTS_LENGTH:
+            match.append(fts_phrase(search))
+            ranked = True
+        else:
+            fallback &= Q(name__icontains=search) | Q(city__icontains=search) | Q(address__icontains=search)
+
+    rating = params.get('rating')
+    if rating:
+        try:
+            rating = int(rating)
+        except ValueError:
+            raise ValidationError({"rating": "Must be an integer."})
+        # Hotels whose review average rounds to ``rating`` stars.
+        queryset = queryset.filter(average_rating__gte=rating - 0.5, average_rating__lt=rating + 0.5)
+    queryset = queryset.filter(fallback)
+
+    if match:
+        queryset = queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f"{FTS_TABLE}.rowid = authapi_hotel.id", f"{FTS_TABLE} MATCH %s"],
+            params=[' AND '.join(match)],
+        )
+        if ranked:
+            # Only free text search is ranked, scoring every match is what makes broad filters slower.
+            queryset = queryset.annotate(search_rank=RawSQL(f"{FTS_TABLE}.rank", [])).order_by('search_rank', 'id')
+    return queryset
+
+
+def free_rooms(city, check_in_date, check_out_date, room_type=None, max_price=None):
+    """
+    Rooms of every hotel in ``city`` that are free for the stay, as one query.
+
+    Taken rooms are dropped with a NOT EXISTS on ``booking_room_dates_idx``,
+    using the same overlap rule as the booking path. Rooms come grouped by
+    hotel, hotels with the cheapest room first and rooms by price within a
+    hotel, so the caller can stream the groups in order.
+    """
+    rooms = Room.objects.filter(hotel_id__city__iexact=city)
+    if room_type:
+        rooms = rooms.filter(room_type=room_type)
+    if max_price is not None:
+        rooms = rooms.filter(price_per_night__lte=max_price)
+    return rooms.exclude(
+        Exists(conflicting_bookings(OuterRef('pk'), check_in_date, check_out_date))
+    ).annotate(
+        hotel_min_price=Window(Min('price_per_night'), partition_by=[F('hotel_id')]),
+    ).select_related('hotel_id').order_by('hotel_min_price', 'hotel_id', 'price_per_night', 'id')
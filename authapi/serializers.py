@@ -1,8 +1,10 @@
+from django.conf import settings
+from django.utils import timezone
 from rest_framework.exceptions import ValidationError
 
 from .models import User
 from rest_framework import serializers
-from .models import User, Hotel, Booking, Review, Room
+from .models import User, Hotel, Booking, Review, Room, RateRule
 from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from django.utils.encoding import smart_str, force_bytes, DjangoUnicodeDecodeError
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
@@ -124,9 +126,16 @@ class ChangeUserPasswordSerializer(serializers.Serializer):
 
 
 class HotelSerializer(serializers.ModelSerializer):
+    rating_histogram = serializers.SerializerMethodField()
+
     class Meta:
         model = Hotel
-        fields = ['id', 'name', 'address', 'city', 'contact_no', 'rating', 'email']
+        fields = ['id', 'name', 'address', 'city', 'contact_no', 'rating', 'email', 'average_rating', 'review_count',
+                  'rating_histogram']
+        read_only_fields = ['average_rating', 'review_count']
+
+    def get_rating_histogram(self, obj):
+        return {star: getattr(obj, f'rating_{star}_count') for star in range(1, 6)}
 
 
 class CustomBookSerializer(serializers.ModelSerializer):
@@ -203,3 +212,141 @@ class RoomsAvailableSerializer(serializers.ModelSerializer):
     class Meta:
         model = Room
         fields = ['id', 'hotel_id', 'room_no', 'room_type', 'price_per_night']
+
+
+def max_stay_nights():
+    return getattr(settings, 'MAX_STAY_NIGHTS', 365)
+
+
+def validate_stay(check_in_date, check_out_date):
+    """
+    Every night of a stay becomes a RoomNight row, so stays are capped at ``MAX_STAY_NIGHTS``.
+    """
+    if check_in_date < timezone.now().date():
+        raise serializers.ValidationError("Booking is strictly for the present and future, not the past.")
+    if check_out_date <= check_in_date:
+        raise serializers.ValidationError("Check-out date should be after check-in date")
+    if (check_out_date - check_in_date).days > max_stay_nights():
+        raise serializers.ValidationError(f"At most {max_stay_nights()} nights per stay.")
+
+
+def validate_span(stays):
+    """
+    Stays are priced as one rooms x nights table from the first check-in to the last check-out, cap its width.
+    """
+    limit = getattr(settings, 'QUOTE_MAX_SPAN_DAYS', 731)
+    if (max(stay['check_out_date'] for stay in stays) - min(stay['check_in_date'] for stay in stays)).days > limit:
+        raise serializers.ValidationError(f"All stays should fit in {limit} days.")
+
+
+class BulkBookingItemSerializer(serializers.Serializer):
+    room_id = serializers.IntegerField()
+    guest_name = serializers.CharField(max_length=255, allow_blank=True, default='')
+    check_in_date = serializers.DateField()
+    check_out_date = serializers.DateField()
+
+    def validate(self, attrs):
+        validate_stay(attrs['check_in_date'], attrs['check_out_date'])
+        return attrs
+
+
+class BulkBookingSerializer(serializers.Serializer):
+    MODES = ('all_or_nothing', 'partial')
+
+    mode = serializers.ChoiceField(choices=MODES, default='all_or_nothing')
+    bookings = serializers.ListField(child=serializers.DictField(), allow_empty=False)
+
+    def validate_bookings(self, value):
+        limit = getattr(settings, 'BULK_BOOKING_MAX_ITEMS', 500)
+        if len(value) > limit:
+            raise serializers.ValidationError(f"At most {limit} bookings per request.")
+        return value
+
+
+class StaySerializer(serializers.Serializer):
+    check_in_date = serializers.DateField()
+    check_out_date = serializers.DateField()
+
+    def validate(self, attrs):
+        validate_stay(attrs['check_in_date'], attrs['check_out_date'])
+        return attrs
+
+
+class CityAvailabilitySerializer(StaySerializer):
+    city = serializers.CharField(max_length=255)
+    room_type = serializers.ChoiceField(choices=Room._meta.get_field('room_type').choices, required=False)
+    max_price = serializers.IntegerField(min_value=0, required=False)
+
+
+class FreeRoomSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Room
+        fields = ['id', 'room_no', 'room_type', 'price_per_night']
+
+
+class QuoteSerializer(serializers.Serializer):
+    stays = StaySerializer(many=True, allow_empty=False)
+    room_type = serializers.ChoiceField(choices=Room._meta.get_field('room_type').choices, required=False)
+
+    def validate_stays(self, value):
+        limit = getattr(settings, 'QUOTE_MAX_STAYS', 50)
+        if len(value) > limit:
+            raise serializers.ValidationError(f"At most {limit} stays per request.")
+        validate_span(value)
+        return value
+
+
+class AnalyticsRangeSerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+
+    def validate(self, attrs):
+        limit = getattr(settings, 'ANALYTICS_MAX_DAYS', 366)
+        if attrs['end'] <= attrs['start']:
+            raise serializers.ValidationError("end should be after start")
+        if (attrs['end'] - attrs['start']).days > limit:
+            raise serializers.ValidationError(f"At most {limit} days per request.")
+        return attrs
+
+
+class RateRuleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RateRule
+        fields = ['id', 'room_type', 'start_date', 'end_date', 'weekdays', 'percent', 'priority']
+
+    def validate(self, attrs):
+        if attrs.get('start_date') and attrs.get('end_date') and attrs['end_date'] < attrs['start_date']:
+            raise serializers.ValidationError("end_date should not be before start_date")
+        return attrs
+
+
+class BulkRoomSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Room
+        fields = ['room_no', 'room_type', 'price_per_night']
+
+
+class RoomRangeSerializer(serializers.Serializer):
+    room_no_from = serializers.IntegerField(min_value=0)
+    room_no_to = serializers.IntegerField(min_value=0)
+    room_type = serializers.ChoiceField(choices=Room._meta.get_field('room_type').choices)
+    price_per_night = serializers.IntegerField()
+
+    def validate(self, attrs):
+        if attrs['room_no_to'] < attrs['room_no_from']:
+            raise serializers.ValidationError("room_no_to should not be smaller than room_no_from")
+        return attrs
+
+
+class BulkRoomAddSerializer(serializers.Serializer):
+    rooms = serializers.ListField(child=serializers.DictField(), required=False, default=list)
+    ranges = RoomRangeSerializer(many=True, required=False, default=list)
+
+    def validate(self, attrs):
+        count = len(attrs['rooms']) + sum(r['room_no_to'] - r['room_no_from'] + 1 for r in attrs['ranges'])
+        limit = getattr(settings, 'BULK_ROOM_MAX_ITEMS', 2000)
+        if count == 0:
+            raise serializers.ValidationError("Send at least one room or range.")
+        if count > limit:
+            raise serializers.ValidationError(f"At most {limit} rooms per request.")
+        return attrs
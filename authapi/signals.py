@@ -0,0 +1,102 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import dbprofile, inventory, metrics, ratings
+from .availability import engine
+from .cache import hotel_cache, hotel_versions, rate_versions, user_versions
+from .models import User, Hotel, Booking, Room, RateRule, Review
+
+
+def _booking_dates(instance):
+    check_in_date = Booking._meta.get_field('check_in_date').to_python(instance.check_in_date)
+    check_out_date = Booking._meta.get_field('check_out_date').to_python(instance.check_out_date)
+    return check_in_date, check_out_date
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    dbprofile.apply_pragmas(connection)
+    metrics.install(connection)
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance, created, **kwargs):
+    hotel_versions.bump_for_write(instance.room_id.hotel_id_id)
+    # In the booking's transaction, a night that is already sold fails the save with an IntegrityError.
+    if created:
+        inventory.book_nights([instance])
+    else:
+        inventory.rebook_nights(instance)
+    if created:
+        check_in_date, check_out_date = _booking_dates(instance)
+        transaction.on_commit(lambda: engine.booking_added(
+            instance.room_id.hotel_id_id, instance.room_id_id, check_in_date, check_out_date))
+    else:
+        # The old dates are gone by now, so reload the whole hotel.
+        transaction.on_commit(lambda: engine.invalidate(instance.room_id.hotel_id_id))
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted(sender, instance, origin=None, **kwargs):
+    # Bookings deleted along with their room or hotel are covered by that model's own signal,
+    # which saves a room lookup per booking.
+    cascaded = isinstance(origin, (Room, Hotel)) or (isinstance(origin, QuerySet) and origin.model is not Booking)
+    if not cascaded:
+        hotel_versions.bump_for_write(instance.room_id.hotel_id_id)
+    check_in_date, check_out_date = _booking_dates(instance)
+    transaction.on_commit(lambda: engine.booking_removed(instance.room_id_id, check_in_date, check_out_date))
+
+
+@receiver(post_save, sender=Room)
+def room_saved(sender, instance, created, **kwargs):
+    hotel_versions.bump_for_write(instance.hotel_id_id)
+    if not created:
+        transaction.on_commit(lambda: engine.room_moved(instance.id, instance.hotel_id_id))
+
+
+@receiver(post_save, sender=Hotel)
+@receiver(post_delete, sender=Hotel)
+def hotel_changed(sender, instance, **kwargs):
+    hotel_versions.bump_for_write(instance.id)
+    hotel_cache.invalidate_hotel(instance.id)
+    # Again after commit, in case a reader cached the old row in between.
+    transaction.on_commit(lambda: hotel_cache.invalidate_hotel(instance.id))
+
+
+def hotels_rated(hotel_ids):
+    # The aggregates are written with QuerySet.update, which sends no Hotel signals.
+    for hotel_id in hotel_ids:
+        hotel_changed(Hotel, Hotel(id=hotel_id))
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    hotels_rated(ratings.review_saved(instance, created))
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Hotel) or (isinstance(origin, QuerySet) and origin.model is Hotel):
+        return
+    hotels_rated(ratings.review_deleted(instance))
+
+
+@receiver(post_delete, sender=Room)
+def room_deleted(sender, instance, **kwargs):
+    hotel_versions.bump_for_write(instance.hotel_id_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    # Drops the user from CachedJWTAuthentication's cache, password changes included.
+    user_versions.bump_for_write(instance.id)
+
+
+@receiver(post_save, sender=RateRule)
+@receiver(post_delete, sender=RateRule)
+def rate_rule_changed(sender, instance, **kwargs):
+    rate_versions.bump_for_write(instance.hotel_id_id)
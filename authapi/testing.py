@@ -0,0 +1,43 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+TRANSACTION_CONTROL = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT', 'BEGIN', 'COMMIT', 'ROLLBACK')
+
+
+def counted_queries(context):
+    return [query for query in context.captured_queries if not query['sql'].startswith(TRANSACTION_CONTROL)]
+
+
+class QueryBudgetMixin:
+    """
+    TestCase helpers to keep the number of SQL queries of an endpoint bounded.
+
+    ``assertMaxQueries`` fails when a block runs more than ``budget`` queries,
+    ``assertQueriesDoNotGrow`` fails when an endpoint runs more queries after
+    more rows were added, which is what an N+1 looks like. Transaction control
+    statements (savepoints, commits) are not counted.
+    """
+
+    @contextmanager
+    def assertMaxQueries(self, budget, using=DEFAULT_DB_ALIAS):
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        queries = counted_queries(context)
+        if len(queries) > budget:
+            listing = '\n'.join(f"{i}. {query['sql']}" for i, query in enumerate(queries, start=1))
+            self.fail(f"{len(queries)} queries executed, budget is {budget}\n{listing}")
+
+    def count_queries(self, func, using=DEFAULT_DB_ALIAS):
+        with CaptureQueriesContext(connections[using]) as context:
+            func()
+        return len(counted_queries(context))
+
+    def assertQueriesDoNotGrow(self, func, grow, using=DEFAULT_DB_ALIAS):
+        # Warm up first, so lazily filled caches don't count as a difference.
+        func()
+        before = self.count_queries(func, using)
+        grow()
+        after = self.count_queries(func, using)
+        self.assertEqual(before, after, f"query count grew from {before} to {after} with more data")
@@ -1,3 +1,1243 @@
-from django.test import TestCase
+import io
+import json
+import os
+import pstats
+import sqlite3
+import tempfile
+import threading
+from datetime import date, timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection, connections, router, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from . import dbprofile, hashing, inventory, metrics, profiling, urls
+from .availability import RoomCalendar, engine
+from .management.commands import bench_endpoints
+from .bookings import BookingConflict, create_booking, double_bookings
+from .cache import LRUCache, hotel_cache, hotel_versions
+from .pricing import RateTable
+from .models import User, Hotel, Room, Booking, RateRule, Review, RoomNight
+from .testing import QueryBudgetMixin
+from .views import get_tokens_for_user
+
 
 # Create your tests here.
+# Where the tests keep request profiles.
+PROFILING_DIR = tempfile.mkdtemp(prefix='authapi-test-profiles-')
+
+
+def days(n):
+    return date.today() + timedelta(days=n)
+
+
+def review(hotel, rating):
+    user = User.objects.filter(email="reviewer@example.com").first() or User.objects.create_user(
+        email="reviewer@example.com", name="Reviewer", tc=True, password="pw")
+    return Review.objects.create(hotel_id=hotel, user_id=user, rating=rating, comment="Nice")
+
+
+class APITestCase(TestCase):
+    """
+    Resets the process-wide caches, they outlive the rolled back test transactions.
+    """
+
+    def setUp(self):
+        engine.invalidate()
+        hotel_cache.clear()
+        self.client = APIClient()
+
+
+class HotelDataMixin:
+    def setUp(self):
+        super().setUp()
+        self.hotel = Hotel.objects.create(name="Test Hotel", address="MG Road", city="Pune",
+                                          contact_no="9999999999", rating=4, email="hotel@example.com")
+        self.room1 = Room.objects.create(hotel_id=self.hotel, room_no=101, room_type='Standard Room',
+                                         price_per_night=1000)
+        self.room2 = Room.objects.create(hotel_id=self.hotel, room_no=102, room_type='Suite',
+                                         price_per_night=3000)
+
+    def book(self, room, check_in, check_out, guest="guest"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(f'/api/hotels/{self.hotel.id}/{room.id}/book', {
+                'check_in_date': check_in.isoformat(),
+                'check_out_date': check_out.isoformat(),
+                'guest_name': guest,
+            }, format='json')
+
+    def available(self, check_in, check_out):
+        response = self.client.post(f'/api/hotels/{self.hotel.id}/rooms', {
+            'check_in_date': check_in.isoformat(),
+            'check_out_date': check_out.isoformat(),
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        return [room['id'] for room in response.data]
+
+
+class RoomCalendarTests(TestCase):
+    def test_overlap_uses_inclusive_bounds(self):
+        calendar = RoomCalendar()
+        calendar.add(days(10), days(12))
+        self.assertTrue(calendar.is_booked(days(12), days(14)))
+        self.assertTrue(calendar.is_booked(days(8), days(10)))
+        self.assertFalse(calendar.is_booked(days(13), days(15)))
+        self.assertFalse(calendar.is_booked(days(5), days(9)))
+
+    def test_long_stay_is_found_behind_later_short_stays(self):
+        calendar = RoomCalendar()
+        calendar.add(days(1), days(30))
+        calendar.add(days(5), days(6))
+        self.assertTrue(calendar.is_booked(days(20), days(21)))
+        self.assertTrue(calendar.remove(days(1), days(30)))
+        self.assertFalse(calendar.is_booked(days(20), days(21)))
+
+
+class RoomsAvailableViewTests(HotelDataMixin, APITestCase):
+    def test_booked_room_is_hidden_until_cancelled(self):
+        self.assertEqual(self.available(days(5), days(7)), [self.room1.id, self.room2.id])
+
+        response = self.book(self.room1, days(4), days(6))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.available(days(5), days(7)), [self.room2.id])
+        self.assertEqual(self.available(days(8), days(9)), [self.room1.id, self.room2.id])
+
+        booking = Booking.objects.get(room_id=self.room1)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/api/bookings/{booking.id}/cancel')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.available(days(5), days(7)), [self.room1.id, self.room2.id])
+
+    def test_matches_orm_query(self):
+        self.book(self.room1, days(1), days(3))
+        self.book(self.room2, days(6), days(9))
+        for check_in, check_out in [(days(0), days(1)), (days(2), days(6)), (days(4), days(5)), (days(9), days(10))]:
+            expected = list(Room.objects.filter(hotel_id=self.hotel.id).exclude(
+                booking__check_in_date__lte=check_out, booking__check_out_date__gte=check_in
+            ).distinct().order_by('id').values_list('id', flat=True))
+            self.assertEqual(self.available(check_in, check_out), expected)
+
+    def test_writes_of_other_processes_are_seen(self):
+        self.assertEqual(self.available(days(5), days(7)), [self.room1.id, self.room2.id])
+        # bulk_create sends no signals, like a write this process never heard of.
+        Booking.objects.bulk_create([Booking(room_id=self.room1, guest_name="x", check_in_date=days(5),
+                                             check_out_date=days(6), total_price=1000)])
+        hotel_versions.bump(self.hotel.id)
+        self.assertEqual(self.available(days(5), days(7)), [self.room2.id])
+
+    def test_loads_skip_past_stays_and_run_unlocked(self):
+        Booking.objects.bulk_create([
+            Booking(room_id=self.room1, guest_name="x", check_in_date=days(-9), check_out_date=days(-2),
+                    total_price=1000),
+            Booking(room_id=self.room2, guest_name="x", check_in_date=days(-1), check_out_date=days(0),
+                    total_price=1000)])
+        load = engine._load
+
+        def unlocked_load(hotel_id):
+            self.assertFalse(engine._lock._is_owned())
+            return load(hotel_id)
+
+        with patch.object(engine, '_load', unlocked_load):
+            calendars = engine._calendars(self.hotel.id)
+        self.assertEqual(list(calendars), [self.room2.id])
+
+
+class QueryPlanTests(TestCase):
+    """
+    EXPLAIN QUERY PLAN of the hot booking and room queries. A full table scan
+    (a ``SCAN authapi_...`` step) or a missing index fails the test.
+    """
+
+    def plans(self):
+        today = date.today()
+        return {
+            'booking conflict check': (
+                Booking.objects.filter(room_id=1, check_in_date__lte=today, check_out_date__gte=today),
+                ['booking_room_dates_idx']),
+            'availability load': (
+                Booking.objects.filter(room_id__hotel_id=1).order_by('check_in_date').values_list(
+                    'room_id', 'check_in_date', 'check_out_date'),
+                ['room_hotel_type_price_idx', 'booking_room_dates_idx']),
+            'available rooms': (
+                Room.objects.filter(hotel_id=1).exclude(id__in=[1, 2]).order_by('id'),
+                ['room_hotel_type_price_idx']),
+            'hotel bookings': (
+                Booking.objects.filter(room_id__hotel_id=1),
+                ['room_hotel_type_price_idx', 'booking_room_dates_idx']),
+            'bookings checking in today': (
+                Booking.objects.filter(check_in_date=today),
+                ['booking_check_in_idx']),
+            'rooms by type and price': (
+                Room.objects.filter(hotel_id=1, room_type='Suite', price_per_night__lte=5000),
+                ['room_hotel_type_price_idx']),
+        }
+
+    def test_query_plans_use_indexes(self):
+        for name, (queryset, indexes) in self.plans().items():
+            with self.subTest(name):
+                plan = queryset.explain()
+                self.assertNotRegex(plan, r'\bSCAN authapi_', msg=plan)
+                for index in indexes:
+                    self.assertIn(index, plan)
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(7):
+            hotel = Hotel.objects.create(name=f"Hotel {i}", address="Street", city="Pune", contact_no="9999999999",
+                                         rating=i % 3 + 1, email="hotel@example.com")
+            review(hotel, i % 3 + 1)
+
+    def walk(self, url):
+        names, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            names += [hotel['name'] for hotel in response.data['results']]
+            url, pages = response.data['next'], pages + 1
+        return names, pages
+
+    def test_pages_follow_ordering(self):
+        names, pages = self.walk('/api/hotels?ordering=-rating&page_size=3')
+        expected = list(Hotel.objects.order_by('-average_rating', 'id').values_list('name', flat=True))
+        self.assertEqual(names, expected)
+        self.assertEqual(pages, 3)
+
+    def test_previous_cursor_goes_back(self):
+        first = self.client.get('/api/hotels?ordering=rating,name&page_size=2').data
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+        self.assertEqual(back['results'], first['results'])
+        self.assertIsNone(first['previous'])
+
+    def test_page_size_is_capped(self):
+        with self.settings(PAGINATION_MAX_PAGE_SIZE=4):
+            response = self.client.get('/api/hotels?page_size=1000')
+        self.assertEqual(len(response.data['results']), 4)
+
+    def test_unpaginated_request_keeps_list(self):
+        response = self.client.get('/api/hotels')
+        self.assertEqual(len(response.data), 7)
+
+    def test_cursor_from_other_ordering_is_rejected(self):
+        first = self.client.get('/api/hotels?ordering=rating&page_size=2').data
+        cursor = parse_qs(urlparse(first['next']).query)['cursor'][0]
+        response = self.client.get(f'/api/hotels?ordering=name&cursor={cursor}')
+        self.assertEqual(response.status_code, 404)
+
+
+class HotelSearchTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.hotel = Hotel.objects.create(name="Sea Breeze Resort", address="Marine Drive", city="Mumbai",
+                                          contact_no="9999999999", rating=5, email="a@example.com")
+        review(self.hotel, 5)
+        review(Hotel.objects.create(name="Breeze Inn", address="FC Road", city="Pune",
+                                    contact_no="9999999999", rating=3, email="b@example.com"), 3)
+        review(Hotel.objects.create(name="Mountain View", address="Mall Road", city="Manali",
+                                    contact_no="9999999999", rating=5, email="c@example.com"), 5)
+
+    def names(self, query):
+        response = self.client.get(f'/api/hotels?{query}')
+        self.assertEqual(response.status_code, 200)
+        return sorted(hotel['name'] for hotel in response.data)
+
+    def test_filters_combine(self):
+        self.assertEqual(self.names('name=breeze'), ["Breeze Inn", "Sea Breeze Resort"])
+        self.assertEqual(self.names('name=breeze&city=pun'), ["Breeze Inn"])
+        self.assertEqual(self.names('name=breeze&rating=5'), ["Sea Breeze Resort"])
+        self.assertEqual(self.names('add=road&rating=5'), ["Mountain View"])
+
+    def test_short_terms_fall_back_to_icontains(self):
+        self.assertEqual(self.names('city=m'), ["Mountain View", "Sea Breeze Resort"])
+        self.assertEqual(self.names('city=m&name=view'), ["Mountain View"])
+
+    def test_index_follows_hotel_writes(self):
+        self.hotel.name = "Ocean Pearl"
+        self.hotel.save()
+        self.assertEqual(self.names('name=breeze'), ["Breeze Inn"])
+        self.assertEqual(self.names('name=pearl'), ["Ocean Pearl"])
+        self.hotel.delete()
+        self.assertEqual(self.names('name=pearl'), [])
+
+    def test_ranked_results_paginate(self):
+        response = self.client.get('/api/hotels?q=breeze&page_size=1')
+        self.assertEqual(len(response.data['results']), 1)
+        second = self.client.get(response.data['next'])
+        names = [response.data['results'][0]['name'], second.data['results'][0]['name']]
+        self.assertEqual(sorted(names), ["Breeze Inn", "Sea Breeze Resort"])
+        self.assertIsNone(second.data['next'])
+
+
+class RatingAggregateTests(HotelDataMixin, APITestCase):
+    def aggregates(self, hotel):
+        hotel.refresh_from_db()
+        return (hotel.review_count, hotel.rating_sum, hotel.average_rating,
+                [getattr(hotel, f'rating_{star}_count') for star in range(1, 6)])
+
+    def test_reviews_update_aggregates(self):
+        first = review(self.hotel, 5)
+        second = review(self.hotel, 2)
+        self.assertEqual(self.aggregates(self.hotel), (2, 7, 3.5, [0, 1, 0, 0, 1]))
+
+        second = Review.objects.get(id=second.id)
+        second.rating = 4
+        second.save()
+        self.assertEqual(self.aggregates(self.hotel), (2, 9, 4.5, [0, 0, 0, 1, 1]))
+
+        other = Hotel.objects.create(name="Other", address="Street", city="Goa", contact_no="9999999999",
+                                     rating=3, email="other@example.com")
+        second.hotel_id = other
+        second.save()
+        self.assertEqual(self.aggregates(self.hotel), (1, 5, 5.0, [0, 0, 0, 0, 1]))
+        self.assertEqual(self.aggregates(other), (1, 4, 4.0, [0, 0, 0, 1, 0]))
+
+        first.delete()
+        self.assertEqual(self.aggregates(self.hotel), (0, 0, 0.0, [0, 0, 0, 0, 0]))
+
+    def test_hotel_payload_and_search_use_aggregates(self):
+        self.assertEqual(self.client.get(f'/api/hotels/{self.hotel.id}').data['review_count'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            review(self.hotel, 3)
+        data = self.client.get(f'/api/hotels/{self.hotel.id}').data
+        self.assertEqual((data['review_count'], data['average_rating'], data['rating_histogram'][3]), (1, 3.0, 1))
+        self.assertEqual(len(self.client.get('/api/hotels?rating=3&name=test').data), 1)
+        self.assertEqual(len(self.client.get('/api/hotels?rating=4').data), 0)
+
+    def test_repair_command(self):
+        review(self.hotel, 4)
+        Hotel.objects.filter(id=self.hotel.id).update(review_count=9, average_rating=1)
+        out = io.StringIO()
+        call_command('repair_hotel_ratings', '--check', stdout=out)
+        self.assertIn("1 hotels have stale ratings", out.getvalue())
+        call_command('repair_hotel_ratings', stdout=out)
+        self.assertEqual(self.aggregates(self.hotel), (1, 4, 4.0, [0, 0, 0, 1, 0]))
+
+
+class CityAvailabilityTests(HotelDataMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.cheap = Hotel.objects.create(name="Budget Stay", address="Camp", city="Pune", contact_no="9999999999",
+                                          rating=2, email="budget@example.com")
+        self.cheap_room = Room.objects.create(hotel_id=self.cheap, room_no=1, room_type='Standard Room',
+                                              price_per_night=500)
+        goa = Hotel.objects.create(name="Goa Inn", address="Beach", city="Goa", contact_no="9999999999",
+                                   rating=3, email="goa@example.com")
+        Room.objects.create(hotel_id=goa, room_no=1, room_type='Standard Room', price_per_night=100)
+
+    def search(self, **params):
+        params = {'city': "pune", 'check_in_date': days(1).isoformat(), 'check_out_date': days(3).isoformat(),
+                  **params}
+        response = self.client.get('/api/hotels/available', params)
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode()
+        if params.get('format') == 'ndjson':
+            return [json.loads(line) for line in content.splitlines()]
+        return json.loads(content)
+
+    def test_groups_by_hotel_cheapest_first(self):
+        self.book(self.room1, days(2), days(4))
+        groups = self.search()
+        self.assertEqual([(group['hotel']['name'], [room['id'] for room in group['rooms']]) for group in groups],
+                         [("Budget Stay", [self.cheap_room.id]), ("Test Hotel", [self.room2.id])])
+        self.assertEqual(self.search(format='ndjson'), groups)
+
+    def test_room_type_and_price_filters(self):
+        self.assertEqual([group['hotel']['name'] for group in self.search(room_type='Suite')], ["Test Hotel"])
+        groups = self.search(max_price=1000)
+        self.assertEqual([[room['price_per_night'] for room in group['rooms']] for group in groups], [[500], [1000]])
+
+    def test_invalid_stay(self):
+        response = self.client.get('/api/hotels/available', {'city': "Pune", 'check_in_date': days(3).isoformat(),
+                                                             'check_out_date': days(1).isoformat()})
+        self.assertEqual(response.status_code, 400)
+
+
+class BookingExportTests(HotelDataMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.book(self.room1, days(1), days(3), guest="Asha")
+        self.book(self.room2, days(2), days(4), guest="Ravi")
+
+    def test_ndjson_export_streams_one_booking_per_line(self):
+        response = self.client.get(f'/api/hotels/{self.hotel.id}/rooms/bookings?booking=1&format=ndjson')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['guest_name'] for row in rows], ["Asha", "Ravi"])
+        self.assertEqual(rows[0]['room_no'], 101)
+
+    def test_streamed_json_matches_regular_response(self):
+        regular = self.client.get(f'/api/hotels/{self.hotel.id}/rooms/bookings?booking=1')
+        streamed = self.client.get(f'/api/hotels/{self.hotel.id}/rooms/bookings?booking=1&stream=1')
+        self.assertTrue(streamed.streaming)
+        self.assertEqual(json.loads(b''.join(streamed.streaming_content)), json.loads(regular.content))
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], PROFILING_DIR=PROFILING_DIR)
+class EndpointQueryBudgetTests(QueryBudgetMixin, HotelDataMixin, APITestCase):
+    """
+    Every named route in authapi/urls.py has a query budget here, a new route without one fails the suite.
+    """
+    BUDGETS = {
+        ('registration', 'post'): 3,
+        ('login', 'post'): 2,
+        ('async-registration', 'post'): 3,
+        ('async-login', 'post'): 1,
+        ('profile', 'get'): 1,
+        ('users', 'get'): 2,
+        ('user-delete', 'delete'): 4,
+        ('change-password', 'post'): 2,
+        ('hotels', 'get'): 2,
+        ('hotels', 'post'): 3,
+        ('single-hotel', 'get'): 2,
+        ('single-hotel', 'put'): 4,
+        ('single-hotel', 'delete'): 10,
+        ('city-availability', 'get'): 1,
+        ('add-room', 'post'): 3,
+        ('hotel-room-available', 'post'): 3,
+        ('book-room', 'post'): 6,
+        ('bulk-book', 'post'): 6,
+        ('quote', 'post'): 3,
+        ('rate-rules', 'get'): 1,
+        ('rate-rules', 'post'): 2,
+        ('hotel-analytics', 'get'): 3,
+        ('booking-cancel', 'delete'): 3,
+        ('cache-stats', 'get'): 1,
+        ('metrics', 'get'): 1,
+        ('profiling-token', 'post'): 1,
+        ('request-profile', 'get'): 1,
+        ('hotel-bookings', 'get'): 2,
+        ('async-hotels', 'get'): 2,
+        ('async-single-hotel', 'get'): 2,
+        ('async-hotel-room-available', 'post'): 3,
+        ('async-hotel-bookings', 'get'): 2,
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user(email="admin@example.com", name="Admin", tc=True, password="secret")
+        self.admin.is_admin = True
+        self.admin.save()
+        self.other = User.objects.create_user(email="other@example.com", name="Other", tc=True, password="secret")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(self.admin)['access']}")
+        self.book(self.room1, days(1), days(3))
+        self.booking = Booking.objects.get()
+        self.profile_id = self.client.get(reverse('hotels'), HTTP_X_PROFILE=profiling.make_token(self.admin))[
+            'X-Profile-Id']
+
+    def call(self, name, method):
+        kwargs = {
+            'user-delete': {'pk': self.other.id},
+            'single-hotel': {'pk': self.hotel.id},
+            'add-room': {'pk': self.hotel.id},
+            'hotel-room-available': {'pk': self.hotel.id},
+            'book-room': {'pk': self.hotel.id, 'pk2': self.room2.id},
+            'bulk-book': {'pk': self.hotel.id},
+            'quote': {'pk': self.hotel.id},
+            'rate-rules': {'pk': self.hotel.id},
+            'hotel-analytics': {'pk': self.hotel.id},
+            'booking-cancel': {'pk': self.booking.id},
+            'hotel-bookings': {'pk': self.hotel.id},
+            'async-single-hotel': {'pk': self.hotel.id},
+            'async-hotel-room-available': {'pk': self.hotel.id},
+            'async-hotel-bookings': {'pk': self.hotel.id},
+            'request-profile': {'pk': self.profile_id},
+        }.get(name, {})
+        data = {
+            'registration': {'email': "new@example.com", 'name': "New", 'password': "pw", 'password2': "pw",
+                             'tc': True},
+            'login': {'email': "admin@example.com", 'password': "secret"},
+            'async-registration': {'email': "new@example.com", 'name': "New", 'password': "pw", 'password2': "pw",
+                                   'tc': True},
+            'async-login': {'email': "admin@example.com", 'password': "secret"},
+            'change-password': {'password': "secret", 'password2': "secret"},
+            'hotels': {'name': "New Hotel", 'address': "Street", 'city': "Goa", 'contact_no': "9999999999",
+                       'rating': 3, 'email': "new@example.com"},
+            'single-hotel': {'name': "Renamed", 'address': "Street", 'city': "Goa", 'contact_no': "9999999999",
+                             'rating': 3, 'email': "new@example.com"},
+            'add-room': {'room_no': 201, 'room_type': 'Suite', 'price_per_night': 2000},
+            'hotel-room-available': {'check_in_date': days(1).isoformat(), 'check_out_date': days(2).isoformat()},
+            'async-hotel-room-available': {'check_in_date': days(1).isoformat(),
+                                           'check_out_date': days(2).isoformat()},
+            'book-room': {'check_in_date': days(5).isoformat(), 'check_out_date': days(6).isoformat(),
+                          'guest_name': "Guest"},
+            'bulk-book': {'bookings': [
+                {'room_id': room.id, 'check_in_date': days(8).isoformat(), 'check_out_date': days(9).isoformat()}
+                for room in (self.room1, self.room2)]},
+            'quote': {'stays': [{'check_in_date': days(1).isoformat(), 'check_out_date': days(4).isoformat()},
+                                {'check_in_date': days(8).isoformat(), 'check_out_date': days(9).isoformat()}]},
+            'rate-rules': {'weekdays': RateRule.WEEKEND, 'percent': 120},
+            'city-availability': {'city': "Pune", 'check_in_date': days(1).isoformat(),
+                                  'check_out_date': days(2).isoformat()},
+            'hotel-analytics': {'start': days(0).isoformat(), 'end': days(30).isoformat()},
+        }.get(name)
+        url = reverse(name, kwargs=kwargs)
+        if name in ('hotel-bookings', 'async-hotel-bookings'):
+            url += '?booking=1'
+        return getattr(self.client, method)(url, data, format='json')
+
+    def test_every_route_has_a_budget(self):
+        names = {pattern.name for pattern in urls.urlpatterns if pattern.name}
+        budgeted = {name for name, _ in self.BUDGETS}
+        self.assertEqual(names - budgeted, set())
+
+    def test_endpoints_stay_within_budget(self):
+        for (name, method), budget in self.BUDGETS.items():
+            with self.subTest(name=name, method=method):
+                with transaction.atomic():
+                    sid = transaction.savepoint()
+                    with self.assertMaxQueries(budget):
+                        response = self.call(name, method)
+                        # Streamed bodies run their queries while being consumed.
+                        content = b''.join(response.streaming_content) if response.streaming else response.data
+                    self.assertLess(response.status_code, 300, content)
+                    transaction.savepoint_rollback(sid)
+
+    def test_list_endpoints_do_not_grow_with_data(self):
+        def grow():
+            for no in range(10):
+                room = Room.objects.create(hotel_id=self.hotel, room_no=300 + no, room_type='Suite',
+                                           price_per_night=1000)
+                Booking.objects.create(room_id=room, guest_name="Guest", check_in_date=days(1),
+                                       check_out_date=days(2), total_price=1000)
+                Hotel.objects.create(name=f"Hotel {no}", address="Street", city="Goa", contact_no="9999999999",
+                                     rating=3, email="hotel@example.com")
+                User.objects.create_user(email=f"user{no}@example.com", name="User", tc=True, password="pw")
+
+        def lists():
+            # Measure the database work, not the hotel cache.
+            hotel_cache.clear()
+            self.client.get(reverse('hotels'))
+            self.client.get(reverse('users'))
+            self.client.get(reverse('hotel-bookings', kwargs={'pk': self.hotel.id}) + '?booking=1')
+            self.client.get(reverse('hotel-bookings', kwargs={'pk': self.hotel.id}) + '?all=1')
+            self.call('hotel-room-available', 'post')
+
+        self.assertQueriesDoNotGrow(lists, grow)
+
+
+class MetricsTests(HotelDataMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        metrics.registry.clear()
+        self.admin = User.objects.create_user(email="admin@example.com", name="Admin", tc=True, password="pw")
+        self.admin.is_admin = True
+        self.admin.save()
+
+    def scrape(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(self.admin)['access']}")
+        response = self.client.get(reverse('metrics'))
+        self.client.credentials()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        samples = {}
+        for line in response.content.decode().splitlines():
+            if not line.startswith('#'):
+                name, value = line.rsplit(' ', 1)
+                samples[name] = float(value)
+        return samples
+
+    def test_records_latency_sql_and_bytes_per_url_name(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('hotels'))
+        # The next request resets the query log.
+        query_count = len(queries.captured_queries)
+        self.client.get(reverse('hotels'))
+        samples = self.scrape()
+        labels = 'view="hotels",method="GET"'
+        self.assertEqual(samples[f'authapi_request_duration_seconds_count{{{labels}}}'], 2)
+        self.assertEqual(samples[f'authapi_request_duration_seconds_bucket{{{labels},le="+Inf"}}'], 2)
+        # The second request is served from the hotel cache.
+        self.assertEqual(samples[f'authapi_request_sql_queries_sum{{{labels}}}'], query_count)
+        self.assertEqual(samples[f'authapi_request_sql_queries_bucket{{{labels},le="0"}}'], 1)
+        self.assertEqual(samples[f'authapi_response_bytes_total{{{labels}}}'], 2 * len(response.content))
+
+    def test_async_views_and_streams(self):
+        self.book(self.room1, days(1), days(2))
+        self.client.get(reverse('async-single-hotel', kwargs={'pk': self.hotel.id}))
+        response = self.client.get(reverse('hotel-bookings', kwargs={'pk': self.hotel.id}),
+                                   {'booking': 1, 'format': 'ndjson'})
+        with CaptureQueriesContext(connection) as queries:
+            body = b''.join(response.streaming_content)
+        # The export runs its queries while streaming.
+        streamed_queries = len(queries.captured_queries)
+        self.assertGreater(streamed_queries, 0)
+        samples = self.scrape()
+        self.assertGreater(samples['authapi_request_sql_queries_sum{view="async-single-hotel",method="GET"}'], 0)
+        self.assertGreaterEqual(samples['authapi_request_sql_queries_sum{view="hotel-bookings",method="GET"}'],
+                                streamed_queries)
+        self.assertEqual(samples['authapi_response_bytes_total{view="hotel-bookings",method="GET"}'], len(body))
+
+    def test_admin_only(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        user = User.objects.create_user(email="user@example.com", name="User", tc=True, password="pw")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(user)['access']}")
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+
+@override_settings(PROFILING_DIR=PROFILING_DIR)
+class ProfilingTests(HotelDataMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user(email="admin@example.com", name="Admin", tc=True, password="pw")
+        self.admin.is_admin = True
+        self.admin.save()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(self.admin)['access']}")
+        self.token = self.client.post(reverse('profiling-token')).data['token']
+
+    def profile(self, response):
+        self.assertEqual(response.status_code, 200)
+        return self.client.get(reverse('request-profile', kwargs={'pk': response['X-Profile-Id']})).data
+
+    def test_cprofile_with_sql(self):
+        response = self.client.post(reverse('hotel-room-available', kwargs={'pk': self.hotel.id}),
+                                    {'check_in_date': days(1).isoformat(), 'check_out_date': days(2).isoformat()},
+                                    format='json', HTTP_X_PROFILE=self.token)
+        profile = self.profile(response)
+        self.assertEqual(profile['status'], 200)
+        self.assertTrue(any('"authapi_room"' in statement['sql'] for statement in profile['sql']))
+        self.assertIn("cumulative", profile['summary'])
+
+        download = self.client.get(reverse('request-profile', kwargs={'pk': profile['id']}), {'download': 1})
+        with tempfile.NamedTemporaryFile(suffix='.prof') as f:
+            f.write(b''.join(download.streaming_content))
+            f.flush()
+            self.assertTrue(pstats.Stats(f.name).total_calls)
+
+    def test_sampling_by_query_flag_and_async_sql(self):
+        response = self.client.get(reverse('async-single-hotel', kwargs={'pk': self.hotel.id}),
+                                   {'profile': self.token, 'profile_mode': 'sample'})
+        profile = self.profile(response)
+        self.assertEqual(profile['mode'], 'sample')
+        self.assertTrue(profile['sql'])
+        download = self.client.get(reverse('request-profile', kwargs={'pk': profile['id']}), {'download': 1})
+        self.assertEqual(json.loads(b''.join(download.streaming_content))['profiles'][0]['type'], 'sampled')
+
+    def test_only_admins(self):
+        response = self.client.get(reverse('hotels'))
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertNotIn('X-Profile-Status', response)
+
+        user = User.objects.create_user(email="user@example.com", name="User", tc=True, password="pw")
+        for token in (self.token + "x", profiling.make_token(user)):
+            response = self.client.get(reverse('hotels'), HTTP_X_PROFILE=token)
+            self.assertEqual((response.status_code, response['X-Profile-Status']), (200, "denied"))
+            self.assertNotIn('X-Profile-Id', response)
+        # A leaked token needs its admin's credentials.
+        other_admin = User.objects.create_user(email="other@example.com", name="Other", tc=True, password="pw")
+        other_admin.is_admin = True
+        other_admin.save()
+        for authorization in ({}, {'HTTP_AUTHORIZATION': f"Bearer {get_tokens_for_user(user)['access']}"},
+                              {'HTTP_AUTHORIZATION': f"Bearer {get_tokens_for_user(other_admin)['access']}"}):
+            self.client.credentials(**authorization)
+            response = self.client.get(reverse('hotels'), HTTP_X_PROFILE=self.token)
+            self.assertEqual(response['X-Profile-Status'], "denied")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(user)['access']}")
+        self.assertEqual(self.client.post(reverse('profiling-token')).status_code, 403)
+
+    def test_old_profiles_are_pruned(self):
+        with override_settings(PROFILING_DIR=tempfile.mkdtemp(prefix='authapi-test-profiles-'), PROFILING_KEEP=2):
+            ids = [self.client.get(reverse('hotels'), HTTP_X_PROFILE=self.token)['X-Profile-Id'] for _ in range(3)]
+            self.assertEqual(len(os.listdir(profiling.directory())), 4)
+            self.assertEqual(self.client.get(reverse('request-profile', kwargs={'pk': ids[-1]})).status_code, 200)
+
+
+class EndpointBenchmarkTests(TestCase):
+    def test_every_route_has_a_scenario(self):
+        names = {pattern.name for pattern in urls.urlpatterns if pattern.name}
+        self.assertEqual(names - {name for name, _ in bench_endpoints.SCENARIOS}, set())
+
+    def test_regressions(self):
+        base = {'p50_ms': 10.0, 'p95_ms': 20.0, 'queries': 2, 'alloc_kib': 100.0}
+        baseline = {'routes': {'hotels GET': base}}
+
+        def check(**changes):
+            return bench_endpoints.regressions(baseline, {'hotels GET': {**base, **changes}, 'new GET': base},
+                                               threshold=0.25, min_delta_ms=1.0)
+
+        self.assertEqual(check(p95_ms=24.0, alloc_kib=110.0), [])
+        self.assertEqual(check(p50_ms=13.0, queries=3),
+                         ["hotels GET: p50_ms 10.00 -> 13.00", "hotels GET: queries 2 -> 3"])
+        self.assertEqual(check(alloc_kib=200.0), ["hotels GET: alloc_kib 100 -> 200"])
+        # Relative growth on a fast route stays under the absolute floor.
+        baseline['routes']['hotels GET'] = {**base, 'p50_ms': 0.5}
+        self.assertEqual(check(p50_ms=1.2), [])
+
+
+class GenerateDataTests(TestCase):
+    def generate(self, prefix, **options):
+        options = {'hotels': 3, 'rooms': 'uniform:2,4', 'users': 5, 'years': 0.5, 'ahead': 30, 'seed': 1, **options}
+        call_command('generate_data', prefix=prefix, stdout=io.StringIO(), **options)
+        return list(Booking.objects.filter(room_id__hotel_id__name__startswith=f"{prefix} hotel ").order_by('id')
+                    .values_list('guest_name', 'check_in_date', 'check_out_date', 'total_price'))
+
+    def test_bookings_are_valid_and_reproducible(self):
+        bookings = self.generate("a")
+        self.assertTrue(bookings)
+        self.assertEqual(list(double_bookings()), [])
+        self.assertEqual(inventory.check(), {'stray': [], 'incomplete': []})
+        self.assertEqual(User.objects.filter(email__startswith="a-user").count(), 5)
+        self.assertEqual(self.generate("b", chunk_size=7), bookings)
+
+    def test_leaves_the_rest_of_the_cache_alone(self):
+        hotel_cache.shared.set('unrelated', 1)
+        etag = self.client.get('/api/hotels')['ETag']
+        self.generate("e")
+        self.assertEqual(hotel_cache.shared.get('unrelated'), 1)
+        response = self.client.get('/api/hotels', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 3)
+
+    def test_bad_arguments(self):
+        with self.assertRaisesMessage(CommandError, "--nights"):
+            self.generate("c", nights="poisson:3")
+        self.generate("d", hotels=1)
+        with self.assertRaisesMessage(CommandError, "exists already"):
+            self.generate("d")
+
+
+class BookingCommitTests(HotelDataMixin, APITestCase):
+    def test_conflicting_booking_is_rejected_and_rolled_back(self):
+        self.assertEqual(self.book(self.room1, days(1), days(3)).status_code, 200)
+        response = self.book(self.room1, days(2), days(5))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertFalse(double_bookings().exists())
+
+    def test_create_booking_raises_on_conflict(self):
+        data = {'room_id': self.room2, 'guest_name': "A", 'check_in_date': days(1), 'check_out_date': days(2),
+                'total_price': 3000}
+        create_booking(dict(data))
+        with self.assertRaises(BookingConflict):
+            create_booking(dict(data, check_in_date=days(2), check_out_date=days(4)))
+        self.room2.refresh_from_db()
+        self.assertFalse(self.room2.is_available)
+
+    def test_double_bookings_finds_overlaps(self):
+        for check_in, check_out in [(days(1), days(3)), (days(3), days(4)), (days(6), days(7))]:
+            Booking.objects.create(room_id=self.room1, guest_name="A", check_in_date=check_in,
+                                   check_out_date=check_out, total_price=1000)
+        self.assertEqual(double_bookings().count(), 1)
+
+
+class RoomNightTests(HotelDataMixin, APITestCase):
+    def nights(self, room):
+        return list(RoomNight.objects.filter(room_id=room).order_by('date').values_list('date', flat=True))
+
+    def test_bookings_sell_and_release_nights(self):
+        self.book(self.room1, days(1), days(3))
+        self.assertEqual(self.nights(self.room1), [days(1), days(2)])
+        self.client.post('/api/hotels/{}/book'.format(self.hotel.id), {'bookings': [
+            {'room_id': self.room2.id, 'check_in_date': days(1).isoformat(), 'check_out_date': days(2).isoformat()}
+        ]}, format='json')
+        self.assertEqual(self.nights(self.room2), [days(1)])
+
+        self.client.delete(f'/api/bookings/{Booking.objects.get(room_id=self.room1).id}/cancel')
+        self.assertEqual(self.nights(self.room1), [])
+
+    def test_database_rejects_selling_a_night_twice(self):
+        Booking.objects.create(room_id=self.room1, guest_name="a", check_in_date=days(1), check_out_date=days(4),
+                               total_price=3000)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Booking.objects.create(room_id=self.room1, guest_name="b", check_in_date=days(3),
+                                   check_out_date=days(5), total_price=2000)
+        # Checking out the morning another guest checks in is fine for the table.
+        Booking.objects.create(room_id=self.room1, guest_name="c", check_in_date=days(4), check_out_date=days(5),
+                               total_price=1000)
+
+    def test_backfill_and_check(self):
+        first = Booking.objects.create(room_id=self.room1, guest_name="a", check_in_date=days(1),
+                                       check_out_date=days(3), total_price=2000)
+        Booking.objects.create(room_id=self.room2, guest_name="b", check_in_date=days(1), check_out_date=days(2),
+                               total_price=3000)
+        RoomNight.objects.all().delete()
+        out = io.StringIO()
+        with self.assertRaises(CommandError):
+            call_command('check_room_nights', stdout=out)
+        call_command('backfill_room_nights', stdout=out)
+        self.assertIn("Backfilled 3 room nights of 2 bookings", out.getvalue())
+        call_command('check_room_nights', stdout=out)
+
+        RoomNight.objects.filter(booking_id=first, date=days(2)).update(date=days(7))
+        with self.assertRaises(CommandError):
+            call_command('check_room_nights', stdout=out)
+        call_command('check_room_nights', '--fix', stdout=out)
+        self.assertEqual(self.nights(self.room1), [days(1), days(2)])
+
+
+    @override_settings(MAX_STAY_NIGHTS=30)
+    def test_overlong_stays_are_rejected(self):
+        self.assertEqual(self.book(self.room1, days(1), days(32)).status_code, 400)
+        response = self.client.post(f'/api/hotels/{self.hotel.id}/book', {'bookings': [
+            {'room_id': self.room2.id, 'check_in_date': days(1).isoformat(), 'check_out_date': days(32).isoformat()}
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.book(self.room1, days(1), days(31)).status_code, 200)
+        self.assertEqual(len(self.nights(self.room1)), 30)
+        self.assertEqual(self.nights(self.room2), [])
+
+class BulkBookingTests(HotelDataMixin, APITestCase):
+    def bulk(self, bookings, mode='all_or_nothing'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(f'/api/hotels/{self.hotel.id}/book', {'mode': mode, 'bookings': [
+                {'room_id': room.id, 'check_in_date': check_in.isoformat(), 'check_out_date': check_out.isoformat(),
+                 'guest_name': "Group"} for room, check_in, check_out in bookings]}, format='json')
+
+    def test_books_all_rooms_with_prices(self):
+        response = self.bulk([(self.room1, days(1), days(3)), (self.room2, days(1), days(2))])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([b['total_price'] for b in response.data['bookings']], [2000, 3000])
+        self.assertEqual(self.available(days(1), days(2)), [])
+
+    def test_all_or_nothing_rolls_back_on_conflict(self):
+        self.book(self.room2, days(2), days(4))
+        response = self.bulk([(self.room1, days(1), days(3)), (self.room2, days(1), days(2))])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data['errors']), [1])
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_partial_mode_books_what_it_can(self):
+        response = self.bulk([(self.room1, days(1), days(3)), (self.room1, days(2), days(4)),
+                              (self.room2, days(3), days(1))], mode='partial')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([b['index'] for b in response.data['bookings']], [0])
+        self.assertEqual(sorted(response.data['errors']), [1, 2])
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_rooms_of_other_hotels_are_rejected(self):
+        other = Hotel.objects.create(name="Other", address="Street", city="Goa", contact_no="9999999999",
+                                     rating=3, email="other@example.com")
+        room = Room.objects.create(hotel_id=other, room_no=1, room_type='Suite', price_per_night=10)
+        response = self.bulk([(room, days(1), days(2))])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Booking.objects.exists())
+
+
+class PricingTests(HotelDataMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        # Next Monday, so the week's nights are known.
+        self.monday = days(7 - date.today().weekday())
+
+    def test_rules_by_weekday_season_and_priority(self):
+        rules = [
+            ('', None, None, RateRule.WEEKEND, 150),
+            ('Suite', self.monday + timedelta(days=1), self.monday + timedelta(days=2), RateRule.EVERY_DAY, 200),
+        ]
+        rates = RateTable(rules).nightly_rates([1000, 3000], [0, 2], self.monday, self.monday + timedelta(days=7))
+        self.assertEqual(rates.tolist(), [[1000, 1000, 1000, 1000, 1500, 1500, 1000],
+                                          [3000, 6000, 6000, 3000, 4500, 4500, 3000]])
+
+    def test_quote_matches_charged_price(self):
+        admin = User.objects.create_user(email="admin@example.com", name="Admin", tc=True, password="pw")
+        admin.is_admin = True
+        self.client.force_authenticate(admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/hotels/{self.hotel.id}/rates',
+                                        {'weekdays': RateRule.WEEKEND, 'percent': 120}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        stays = [(self.monday, self.monday + timedelta(days=7)), (self.monday, self.monday + timedelta(days=2))]
+        response = self.client.post(f'/api/hotels/{self.hotel.id}/quote', {'stays': [
+            {'check_in_date': check_in.isoformat(), 'check_out_date': check_out.isoformat()}
+            for check_in, check_out in stays]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        week, short = response.data['stays']
+        self.assertEqual([room['total_price'] for room in week['rooms']], [7400, 22200])
+        self.assertEqual([room['total_price'] for room in short['rooms']], [2000, 6000])
+
+        self.book(self.room2, *stays[0])
+        self.assertEqual(Booking.objects.get().total_price, 22200)
+        response = self.client.post(f'/api/hotels/{self.hotel.id}/quote', {'stays': [
+            {'check_in_date': self.monday.isoformat(), 'check_out_date': (self.monday + timedelta(days=2)).isoformat()}
+        ]}, format='json')
+        self.assertEqual([room['id'] for room in response.data['stays'][0]['rooms']], [self.room1.id])
+
+    @override_settings(MAX_STAY_NIGHTS=30, QUOTE_MAX_SPAN_DAYS=60)
+    def test_stay_length_and_span_are_capped(self):
+        def quote(*stays):
+            return self.client.post(f'/api/hotels/{self.hotel.id}/quote', {'stays': [
+                {'check_in_date': days(start).isoformat(), 'check_out_date': days(end).isoformat()}
+                for start, end in stays]}, format='json')
+
+        self.assertEqual(quote((1, 31), (40, 61)).status_code, 200)
+        self.assertEqual(quote((1, 32)).status_code, 400)
+        self.assertEqual(quote((1, 2), (40, 62)).status_code, 400)
+        response = self.client.post(f'/api/hotels/{self.hotel.id}/book', {'mode': 'partial', 'bookings': [
+            {'room_id': self.room1.id, 'check_in_date': days(start).isoformat(),
+             'check_out_date': days(end).isoformat()} for start, end in ((1, 2), (100, 101))]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_rates_stay_out_of_the_hotel_cache_stats(self):
+        stats = dict(hotel_cache.stats)
+        self.book(self.room1, days(1), days(2))
+        self.book(self.room1, days(2), days(3))
+        self.assertEqual(hotel_cache.stats, stats)
+
+
+class AnalyticsTests(HotelDataMixin, APITestCase):
+    def test_daily_occupancy_and_revenue(self):
+        self.book(self.room1, days(1), days(3))
+        self.book(self.room2, days(2), days(6))
+        admin = User.objects.create_user(email="admin@example.com", name="Admin", tc=True, password="pw")
+        admin.is_admin = True
+        self.client.force_authenticate(admin)
+
+        response = self.client.get(f'/api/hotels/{self.hotel.id}/analytics',
+                                   {'start': days(2).isoformat(), 'end': days(5).isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(day['rooms_sold'], day['occupancy'], day['revenue']) for day in response.data['days']],
+                         [(2, 100.0, 4000.0), (1, 50.0, 3000.0), (1, 50.0, 3000.0)])
+        self.assertEqual(response.data['summary'], {'rooms_sold': 4, 'occupancy': 66.67, 'revenue': 10000.0,
+                                                    'adr': 2500.0, 'revpar': 1666.67})
+
+        # A booking without a night must not divide its price by zero.
+        Booking.objects.create(room_id=self.room1, guest_name="x", check_in_date=days(4), check_out_date=days(4),
+                               total_price=0)
+        response = self.client.get(f'/api/hotels/{self.hotel.id}/analytics',
+                                   {'start': days(2).isoformat(), 'end': days(5).isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['summary']['rooms_sold'], 4)
+
+        response = self.client.get(f'/api/hotels/{self.hotel.id}/analytics', {'start': days(5).isoformat(),
+                                                                               'end': days(5).isoformat()})
+        self.assertEqual(response.status_code, 400)
+
+
+class BulkRoomAddTests(HotelDataMixin, APITestCase):
+    def add(self, data):
+        return self.client.post(f'/api/hotels/{self.hotel.id}/room/add', data, format='json')
+
+    def test_ranges_and_rooms(self):
+        response = self.add({
+            'rooms': [{'room_no': 501, 'room_type': 'Suite', 'price_per_night': 5000}],
+            'ranges': [{'room_no_from': 201, 'room_no_to': 210, 'room_type': 'Deluxe Room',
+                        'price_per_night': 2000}],
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Room.objects.filter(hotel_id=self.hotel, room_type='Deluxe Room').count(), 10)
+        self.assertEqual(len(response.data['rooms']), 11)
+
+    def test_reports_duplicates_and_invalid_items_without_aborting(self):
+        response = self.add([
+            {'room_no': 101, 'room_type': 'Suite', 'price_per_night': 1},
+            {'room_no': 301, 'room_type': 'Penthouse', 'price_per_night': 1},
+            {'room_no': 302, 'room_type': 'Suite', 'price_per_night': 1},
+            {'room_no': 302, 'room_type': 'Suite', 'price_per_night': 1},
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([error['index'] for error in response.data['errors']], [0, 1, 3])
+        self.assertEqual(sorted(Room.objects.filter(hotel_id=self.hotel).values_list('room_no', flat=True)),
+                         [101, 102, 302])
+
+    def test_single_room_still_works(self):
+        response = self.add({'room_no': 103, 'room_type': 'Suite', 'price_per_night': 100})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['room_no'], 103)
+
+
+class HotelCacheTests(HotelDataMixin, APITestCase):
+    def test_hotel_reads_are_cached_until_the_hotel_changes(self):
+        url = f'/api/hotels/{self.hotel.id}'
+        self.assertEqual(self.client.get(url).data['name'], "Test Hotel")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).data['name'], "Test Hotel")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hotel.name = "Renamed Hotel"
+            self.hotel.save()
+        self.assertEqual(self.client.get(url).data['name'], "Renamed Hotel")
+
+    def test_list_queries_are_normalized_and_invalidated(self):
+        self.assertEqual(len(self.client.get('/api/hotels?city=Pune').data), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.client.get('/api/hotels?city=pune').data), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Hotel.objects.create(name="Second", address="Street", city="Pune", contact_no="9999999999",
+                                 rating=3, email="second@example.com")
+        self.assertEqual(len(self.client.get('/api/hotels?city=pune').data), 2)
+
+    def test_stats_count_hits_and_misses(self):
+        before = dict(hotel_cache.stats)
+        self.client.get(f'/api/hotels/{self.hotel.id}')
+        self.client.get(f'/api/hotels/{self.hotel.id}')
+        self.assertEqual(hotel_cache.stats['misses'] - before['misses'], 1)
+        self.assertEqual(hotel_cache.stats['local_hits'] - before['local_hits'], 1)
+
+    def test_lru_evicts_least_recently_used(self):
+        lru = LRUCache(maxsize=2, ttl=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual((lru.get('a'), lru.get('c')), (1, 3))
+
+
+class CachedAuthenticationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(email="user@example.com", name="User", tc=True, password="secret")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(self.user)['access']}")
+
+    def test_warm_user_costs_no_queries(self):
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse('profile')).data['email'], "user@example.com")
+
+    def test_user_changes_invalidate_the_cache(self):
+        self.client.get(reverse('profile'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('change-password'), {'password': "new", 'password2': "new"}, format='json')
+        with self.assertNumQueries(1):
+            self.client.get(reverse('profile'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.get(id=self.user.id).delete()
+        self.assertEqual(self.client.get(reverse('profile')).status_code, 401)
+
+
+class SQLiteProfileTests(TestCase):
+    def test_new_connections_get_the_pragmas(self):
+        self.assertEqual(dbprofile.current_pragmas(connection, ['busy_timeout', 'synchronous', 'cache_size']),
+                         {'busy_timeout': 5000, 'synchronous': 1, 'cache_size': -65536})
+
+    def test_journal_mode_needs_the_production_profile(self):
+        with tempfile.TemporaryDirectory() as folder:
+            raw = sqlite3.connect(os.path.join(folder, 'db.sqlite3'))
+            sqlite = SimpleNamespace(vendor='sqlite', connection=raw)
+            try:
+                dbprofile.apply_pragmas(sqlite, {'journal_mode': 'wal'})
+                self.assertEqual(dbprofile.current_pragmas(sqlite, ['journal_mode']), {'journal_mode': 'delete'})
+                with override_settings(SQLITE_PRODUCTION_PROFILE=True):
+                    dbprofile.apply_pragmas(sqlite, {'journal_mode': 'wal'})
+                self.assertEqual(dbprofile.current_pragmas(sqlite, ['journal_mode']), {'journal_mode': 'wal'})
+            finally:
+                raw.close()
+
+    def test_pragmas_are_checked(self):
+        with self.assertRaises(ValueError):
+            dbprofile.apply_pragmas(connection, {'busy_timeout': "1; DROP TABLE authapi_hotel"})
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    The replica alias mirrors the test database, committed rows show up on both connections.
+    """
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        engine.invalidate()
+        hotel_cache.clear()
+        self.client = APIClient()
+        self.hotel = Hotel.objects.create(name="Test Hotel", address="MG Road", city="Pune",
+                                          contact_no="9999999999", rating=4, email="hotel@example.com")
+        self.room = Room.objects.create(hotel_id=self.hotel, room_no=101, room_type='Standard Room',
+                                        price_per_night=1000)
+
+    def settle(self):
+        # As if the last writes were long ago, past the sticky window.
+        hotel_versions.shared.set(hotel_versions.key(self.hotel.id), 1, None)
+        hotel_cache.shared.delete(hotel_cache.WRITTEN_KEY)
+
+    def replica_queries(self, client, url, params=None):
+        with CaptureQueriesContext(connections['replica']) as context:
+            response = client.get(url, params)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_writes_stay_on_the_primary(self):
+        self.assertEqual(router.db_for_write(Booking), 'default')
+        self.assertEqual(router.db_for_read(Booking), 'default')
+
+    def test_read_only_views_read_from_the_replica(self):
+        self.settle()
+        self.assertGreater(self.replica_queries(self.client, '/api/hotels'), 0)
+        self.assertGreater(self.replica_queries(self.client, f'/api/hotels/{self.hotel.id}'), 0)
+        self.assertGreater(self.replica_queries(self.client, f'/api/hotels/{self.hotel.id}/rooms/bookings',
+                                                {'all': 1}), 0)
+        admin = User.objects.create_user(email="admin@example.com", name="Admin", tc=True, password="pw")
+        User.objects.filter(id=admin.id).update(is_admin=True)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_tokens_for_user(admin)['access']}")
+        self.assertGreater(self.replica_queries(self.client, '/api/users'), 0)
+
+    def test_streamed_export_stays_on_the_replica(self):
+        self.settle()
+        self.assertGreater(self.replica_queries(self.client, f'/api/hotels/{self.hotel.id}/rooms/bookings',
+                                                {'booking': 1, 'format': 'ndjson'}), 0)
+
+    def test_freshly_written_data_is_read_from_the_primary(self):
+        self.assertEqual(self.replica_queries(self.client, f'/api/hotels/{self.hotel.id}'), 0)
+        self.assertEqual(self.replica_queries(self.client, '/api/hotels'), 0)
+
+    def test_writer_sticks_to_the_primary(self):
+        response = self.client.post(f'/api/hotels/{self.hotel.id}/{self.room.id}/book', {
+            'check_in_date': days(1).isoformat(), 'check_out_date': days(2).isoformat(), 'guest_name': "guest"},
+            format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('db_pin', response.cookies)
+        self.settle()
+        url = f'/api/hotels/{self.hotel.id}/rooms/bookings'
+        self.assertEqual(self.replica_queries(self.client, url, {'booking': 1}), 0)
+        self.assertGreater(self.replica_queries(APIClient(), url, {'booking': 1}), 0)
+
+
+class AsyncAuthViewTests(APITestCase):
+    def test_register_and_login(self):
+        response = self.client.post(reverse('async-registration'), {
+            'email': "new@example.com", 'name': "New", 'password': "pw", 'password2': "pw", 'tc': True},
+            format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(User.objects.get(email="new@example.com").check_password("pw"))
+
+        response = self.client.post(reverse('async-login'), {'email': "new@example.com", 'password': "pw"},
+                                    format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.data['token'])
+        for email, password in (("new@example.com", "wrong"), ("nobody@example.com", "pw")):
+            response = self.client.post(reverse('async-login'), {'email': email, 'password': password},
+                                        format='json')
+            self.assertEqual(response.status_code, 400)
+
+    def test_full_hashing_backlog_is_rejected(self):
+        with override_settings(PASSWORD_HASHING_BACKLOG=1):
+            hashing.pool.pending = 1
+            try:
+                response = self.client.post(reverse('async-login'), {'email': "a@example.com", 'password': "pw"},
+                                            format='json')
+            finally:
+                hashing.pool.pending = 0
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+
+class AsyncReadViewTests(HotelDataMixin, APITestCase):
+    def assertSameResponse(self, path, method='get', data=None, **extra):
+        sync = getattr(self.client, method)(f'/api/{path}', data, format='json', **extra)
+        hotel_cache.clear()
+        asynchronous = getattr(self.client, method)(f'/api/async/{path}', data, format='json', **extra)
+        self.assertEqual(asynchronous.status_code, sync.status_code)
+        # Only the links of paginated responses point elsewhere.
+        self.assertEqual(asynchronous.content.replace(b'/api/async/', b'/api/'), sync.content)
+        return asynchronous
+
+    def test_responses_match_the_sync_views(self):
+        self.book(self.room1, days(1), days(3))
+        Hotel.objects.create(name="Sea View", address="Beach Road", city="Goa", contact_no="9999999999",
+                             rating=5, email="sea@example.com")
+        self.assertSameResponse('hotels')
+        self.assertSameResponse('hotels?city=goa&ordering=-rating')
+        self.assertEqual(len(self.assertSameResponse('hotels?page_size=1').data['results']), 1)
+        self.assertSameResponse(f'hotels/{self.hotel.id}')
+        self.assertSameResponse(f'hotels/{self.hotel.id}/rooms', 'post', {
+            'check_in_date': days(2).isoformat(), 'check_out_date': days(4).isoformat()})
+        self.assertSameResponse(f'hotels/{self.hotel.id}/rooms', 'post', {})
+        self.assertSameResponse(f'hotels/{self.hotel.id}/rooms/bookings?all=1')
+        self.assertSameResponse(f'hotels/{self.hotel.id}/rooms/bookings?booking=1&page_size=10')
+
+    def test_streamed_export(self):
+        self.book(self.room1, days(1), days(3))
+        response = self.client.get(f'/api/async/hotels/{self.hotel.id}/rooms/bookings?booking=1&format=ndjson')
+
+        async def content():
+            return b''.join([chunk async for chunk in response.streaming_content])
+
+        rows = [json.loads(line) for line in async_to_sync(content)().decode().splitlines()]
+        self.assertEqual([row['room_no'] for row in rows], [101])
+
+    def test_lookups_do_not_wait_for_loads_of_other_hotels(self):
+        self.book(self.room1, days(1), days(3))
+        self.assertEqual(engine.booked_room_ids(self.hotel.id, days(2), days(4)), {self.room1.id})
+        loading, release = threading.Event(), threading.Event()
+
+        def slow_load(hotel_id):
+            loading.set()
+            release.wait(5)
+            return {}
+
+        with patch.object(engine, '_load', slow_load):
+            thread = threading.Thread(target=engine._calendars, args=(self.hotel.id + 1,))
+            thread.start()
+            loading.wait(5)
+            try:
+                booked = async_to_sync(engine.abooked_room_ids)(self.hotel.id, days(2), days(4))
+                self.assertTrue(thread.is_alive())
+            finally:
+                release.set()
+                thread.join()
+        self.assertEqual(booked, {self.room1.id})
+
+    def test_conditional_get(self):
+        url = f'/api/async/hotels/{self.hotel.id}'
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class ConditionalGetTests(HotelDataMixin, APITestCase):
+    def assertNotModified(self, url, etag):
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_single_hotel_etag(self):
+        url = f'/api/hotels/{self.hotel.id}'
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+        self.assertNotModified(url, response['ETag'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hotel.rating = 2
+            self.hotel.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['rating'], 2)
+
+    def test_body_follows_the_etag(self):
+        for url in (f'/api/hotels/{self.hotel.id}', f'/api/async/hotels/{self.hotel.id}'):
+            Hotel.objects.filter(id=self.hotel.id).update(name="Old")
+            hotel_versions.bump(self.hotel.id)
+            etag = self.client.get(url)['ETag']
+            # Written the way another process would, this process's LRU is left as it is.
+            Hotel.objects.filter(id=self.hotel.id).update(name="New")
+            hotel_versions.bump(self.hotel.id)
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+            self.assertEqual(response.data['name'], "New")
+            self.assertNotModified(url, response['ETag'])
+
+    def test_hotel_list_etag_changes_with_query(self):
+        etag = self.client.get('/api/hotels?city=pune')['ETag']
+        self.assertNotModified('/api/hotels?city=Pune', etag)
+        self.assertEqual(self.client.get('/api/hotels?city=goa', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_room_listing_changes_with_rooms_and_bookings(self):
+        url = f'/api/hotels/{self.hotel.id}/rooms/bookings?all=1'
+        etag = self.client.get(url)['ETag']
+        self.assertNotModified(url, etag)
+
+        self.book(self.room1, days(1), days(2))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.client.get(url)['ETag']
+        self.client.post(f'/api/hotels/{self.hotel.id}/room/add', [
+            {'room_no': 103, 'room_type': 'Suite', 'price_per_night': 100}], format='json')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 3)
@@ -4,6 +4,8 @@ from . import views
 urlpatterns = [
     path('register', views.RegistrationView.as_view(), name='registration'),
     path('login', views.UserLoginView.as_view(), name='login'),
+    path('async/register', views.AsyncRegistrationView.as_view(), name='async-registration'),
+    path('async/login', views.AsyncUserLoginView.as_view(), name='async-login'),
     path('profile', views.UserProfileview.as_view(), name='profile'),
     path('users', views.AllUserView.as_view(), name='users'),
     path('users/delete/<int:pk>', views.AllUserView.as_view(), name='user-delete'),
@@ -12,10 +14,24 @@ urlpatterns = [
     # path('reset-password/<uid>/<token>/', views.UserResetPasswordView.as_view(), name='reset-password'),
     path('hotels', views.HotelView.as_view(), name='hotels'),
     path('hotels/<int:pk>', views.SingleHotelView.as_view(), name='single-hotel'),
+    path('hotels/available', views.CityAvailabilityView.as_view(), name='city-availability'),
     path('hotels/<int:pk>/room/add', views.RoomAddView.as_view(), name='add-room'),
     path('hotels/<int:pk>/rooms', views.RoomsAvailableView.as_view(), name='hotel-room-available'),
     path('hotels/<int:pk>/<int:pk2>/book', views.CustomBookingView.as_view(), name='book-room'),
+    path('hotels/<int:pk>/book', views.BulkBookingView.as_view(), name='bulk-book'),
+    path('hotels/<int:pk>/quote', views.QuoteView.as_view(), name='quote'),
+    path('hotels/<int:pk>/rates', views.RateRuleView.as_view(), name='rate-rules'),
+    path('hotels/<int:pk>/analytics', views.HotelAnalyticsView.as_view(), name='hotel-analytics'),
     path('bookings/<int:pk>/cancel', views.CustomBookingView.as_view(), name='booking-cancel'),
-    path('hotels/<int:pk>/rooms/bookings', views.RoomsBookingView.as_view()),
+    path('hotels/<int:pk>/rooms/bookings', views.RoomsBookingView.as_view(), name='hotel-bookings'),
+    path('cache/stats', views.CacheStatsView.as_view(), name='cache-stats'),
+    path('metrics', views.MetricsView.as_view(), name='metrics'),
+    path('profiling/token', views.ProfilingTokenView.as_view(), name='profiling-token'),
+    path('profiling/<uuid:pk>', views.RequestProfileView.as_view(), name='request-profile'),
+    path('async/hotels', views.AsyncHotelView.as_view(), name='async-hotels'),
+    path('async/hotels/<int:pk>', views.AsyncSingleHotelView.as_view(), name='async-single-hotel'),
+    path('async/hotels/<int:pk>/rooms', views.AsyncRoomsAvailableView.as_view(), name='async-hotel-room-available'),
+    path('async/hotels/<int:pk>/rooms/bookings', views.AsyncRoomsBookingView.as_view(),
+         name='async-hotel-bookings'),
     # path('hotels/rooms/book1', views.CustomView.as_view()),
 ]
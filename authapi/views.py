@@ -1,20 +1,37 @@
 from datetime import datetime
 from django.core.exceptions import ObjectDoesNotExist
 
+from django.conf import settings
 from django.contrib.auth import authenticate
-from django.db.models import Q
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from rest_framework import status
-from rest_framework.exceptions import PermissionDenied
-
+from rest_framework.exceptions import PermissionDenied, ValidationError
+
+from asgiref.sync import sync_to_async
+
+from . import analytics, availability, metrics, pricing, profiling, rooms, search
+from .asyncapi import AsyncAPIView
+from .bookings import BookingConflict, BulkBookingFailed, create_booking, create_bookings
+from .cache import hotel_cache, hotel_versions
+from .hashing import aauthenticate
+from .conditional import conditional, hotel_bookings_etag, hotel_bookings_last_modified, hotel_etag, \
+    hotel_last_modified, hotel_list_etag, hotel_list_written, hotel_written
+from .pagination import KeysetPagination
+from .renderers import NDJSONRenderer, PrometheusRenderer, astreaming_response, stream, streaming_response
+from .routers import replica_reads
 from .permissions import IsAdminOrReadOnly
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.decorators import APIView
 from .serializers import UserRegistrationSerializer, UserLoginSerializer, UserProfileSerializer, \
     ChangeUserPasswordSerializer, HotelSerializer, \
-    CustomBookSerializer, CustomBookViewSerializer, RoomsAvailableSerializer, RoomAddSerilizer, AllUserSerializer
-from .models import User, Hotel, Room, Booking
+    CustomBookSerializer, CustomBookViewSerializer, RoomsAvailableSerializer, RoomAddSerilizer, AllUserSerializer, \
+    BulkBookingSerializer, BulkBookingItemSerializer, BulkRoomAddSerializer, BulkRoomSerializer, QuoteSerializer, \
+    RateRuleSerializer, AnalyticsRangeSerializer, CityAvailabilitySerializer, FreeRoomSerializer, max_stay_nights, \
+    validate_span
+from .models import User, Hotel, Room, Booking, RateRule
 from rest_framework_simplejwt.tokens import RefreshToken
 
 
@@ -58,11 +75,45 @@ class UserLoginView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class AsyncRegistrationView(AsyncAPIView):
+    """
+    RegistrationView for ASGI, the password is hashed on the hashing pool instead of the event loop.
+    """
+
+    async def post(self, request):
+        serializer = UserRegistrationSerializer(data=request.data)
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        user = await User.objects.acreate_user(**serializer.validated_data)
+        token = get_tokens_for_user(user)
+        return Response({'token': token, "message": "registration successfull"}, status=status.HTTP_201_CREATED)
+
+
+class AsyncUserLoginView(AsyncAPIView):
+    """
+    UserLoginView for ASGI, the password is checked on the hashing pool instead of the event loop.
+    """
+
+    async def post(self, request):
+        serializer = UserLoginSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = await aauthenticate(serializer.data.get('email'), serializer.data.get('password'))
+        if user is not None:
+            token = get_tokens_for_user(user)
+            return Response({'token': token, "message": "Login success"}, status=status.HTTP_200_OK)
+        return Response({'errors': {"non_field_errors": ["Email password not valid"]}},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+
 class AllUserView(APIView):
     permission_classes = [IsAdminOrReadOnly]
 
+    @replica_reads()
     def get(self, request):
         users = User.objects.all()
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(users, request, view=self)
+        if page is not None:
+            return paginator.get_paginated_response(AllUserSerializer(page, many=True).data)
         serializer = AllUserSerializer(users, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -110,26 +161,28 @@ class UserResetPasswordView(APIView):
 
 
 class HotelView(APIView):
+    @conditional(hotel_list_etag)
+    @replica_reads(hotel_list_written)
     def get(self, request):
-        data = Hotel.objects.all()
-        rating = request.query_params.get('rating')
-        search_hname = request.query_params.get('name')
-        search_city = request.query_params.get('city')
-        search_add = request.query_params.get('add')
+        data = hotel_cache.hotel_list(request, lambda: self.list_hotels(request))
+        return Response(data, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def hotel_queryset(request):
         ordering = request.query_params.get('ordering')
-        if search_hname:
-            data = Hotel.objects.filter(name__icontains=search_hname)
-        if search_city:
-            data = Hotel.objects.filter(city__icontains=search_city)
-        if search_add:
-            data = Hotel.objects.filter(address__icontains=search_add)
-        if rating:
-            data = Hotel.objects.filter(rating=rating)
+        data = search.filter_hotels(Hotel.objects.all(), request.query_params)
         if ordering:
-            ordering_fields = ordering.split(",")
-            data = data.order_by(*ordering_fields)
+            data = search.order_hotels(data, ordering)
+        return data
+
+    def list_hotels(self, request):
+        data = self.hotel_queryset(request)
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(data, request, view=self)
+        if page is not None:
+            return paginator.get_paginated_response(HotelSerializer(page, many=True).data).data
         serializer = HotelSerializer(data, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return serializer.data
 
     def post(self, request):
         serializer = HotelSerializer(data=request.data)
@@ -139,10 +192,11 @@ class HotelView(APIView):
 
 
 class SingleHotelView(APIView):
+    @conditional(hotel_etag, hotel_last_modified)
+    @replica_reads(hotel_written)
     def get(self, request, pk):
-        data = Hotel.objects.get(pk=pk)
-        serializer = HotelSerializer(data)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        data = hotel_cache.hotel(pk, hotel_versions.get(pk), lambda: HotelSerializer(Hotel.objects.get(pk=pk)).data)
+        return Response(data, status=status.HTTP_200_OK)
 
     def put(self, request, pk):
         data = Hotel.objects.get(pk=pk)
@@ -165,6 +219,8 @@ class SingleHotelView(APIView):
 
 class RoomAddView(APIView):
     def post(self, request, pk):
+        if isinstance(request.data, list) or 'rooms' in request.data or 'ranges' in request.data:
+            return self.bulk_post(request, pk)
         hotel_id = pk
         request.data['hotel_id'] = hotel_id
         serializer = RoomAddSerilizer(data=request.data)
@@ -172,36 +228,62 @@ class RoomAddView(APIView):
         serializer.save()
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    def bulk_post(self, request, pk):
+        """
+        Add many rooms at once, either as a list of rooms or as
+        ``{"rooms": [...], "ranges": [{"room_no_from", "room_no_to", "room_type", "price_per_night"}]}``.
+        Invalid or duplicate room numbers are reported per item, the rest are still added.
+        """
+        hotel = get_object_or_404(Hotel, pk=pk)
+        data = {'rooms': request.data} if isinstance(request.data, list) else request.data
+        serializer = BulkRoomAddSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        items = rooms.expand(serializer.validated_data['rooms'], serializer.validated_data['ranges'])
+        created, errors = rooms.provision_rooms(hotel, items)
+        return Response({"message": f"{len(created)} rooms added",
+                         "rooms": BulkRoomSerializer(created, many=True).data,
+                         "errors": errors},
+                        status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST)
+
 
 class RoomsAvailableView(APIView):
     def post(self, request, pk):
+        check_in_date, check_out_date, error = self.parse_stay(request)
+        if error is not None:
+            return error
+        booked_room_ids = availability.engine.booked_room_ids(pk, check_in_date, check_out_date)
+        serializer = RoomsAvailableSerializer(self.available_rooms(pk, booked_room_ids), many=True,
+                                              context={'request': request})
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def parse_stay(request):
+        """
+        Check-in and check-out dates of the request, or an error response as the third item.
+        """
         check_in_str = request.data.get('check_in_date')
         check_out_str = request.data.get('check_out_date')
 
-        if check_in_str:
+        if not check_in_str:
+            return None, None, Response({"message": "Please enter all data"}, status=status.HTTP_400_BAD_REQUEST)
 
-            check_in_date = datetime.strptime(check_in_str, '%Y-%m-%d').date()
-            check_out_date = datetime.strptime(check_out_str, '%Y-%m-%d').date()
+        check_in_date = datetime.strptime(check_in_str, '%Y-%m-%d').date()
+        check_out_date = datetime.strptime(check_out_str, '%Y-%m-%d').date()
 
-            if check_in_date < timezone.now().date() or check_out_date < timezone.now().date():
-                return Response(
-                    {"Message": "No time machines here! Booking is strictly for the present and future, not the past."},
-                    status=status.HTTP_400_BAD_REQUEST)
+        if check_in_date < timezone.now().date() or check_out_date < timezone.now().date():
+            return None, None, Response(
+                {"Message": "No time machines here! Booking is strictly for the present and future, not the past."},
+                status=status.HTTP_400_BAD_REQUEST)
 
-            if check_out_date <= check_in_date:
-                return Response({"message": "Check-out date should be greater than check-in date"},
-                                status=status.HTTP_400_BAD_REQUEST)
+        if check_out_date <= check_in_date:
+            return None, None, Response({"message": "Check-out date should be greater than check-in date"},
+                                        status=status.HTTP_400_BAD_REQUEST)
+        return check_in_date, check_out_date, None
 
-            available_rooms = Room.objects.filter(
-                hotel_id=pk,
-            ).exclude(
-                Q(booking__check_in_date__lte=check_out_date, booking__check_out_date__gte=check_in_date)
-            ).distinct()
-            print(available_rooms)
-            serializer = RoomsAvailableSerializer(available_rooms, many=True, context={'request': request})
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        else:
-            return Response({"message": "Please enter all data"}, status=status.HTTP_400_BAD_REQUEST)
+    @staticmethod
+    def available_rooms(pk, booked_room_ids):
+        return Room.objects.filter(hotel_id=pk).exclude(id__in=booked_room_ids).select_related(
+            'hotel_id').order_by('id')
 
 
 class CustomBookingView(APIView):
@@ -216,7 +298,6 @@ class CustomBookingView(APIView):
     def post(self, request, pk, pk2):
 
         room = Room.objects.get(id=pk2)
-        print(room)
 
         try:
             check_in_str = request.data.get('check_in_date')
@@ -228,17 +309,10 @@ class CustomBookingView(APIView):
                 if check_out_date <= check_in_date:
                     return Response({"message": "Check-out date should be after check-in date"},
                                     status=status.HTTP_400_BAD_REQUEST)
-                # print("---------")
-                conflicting_bookings = Booking.objects.filter(
-                    Q(room_id=pk2, check_in_date__lte=check_out_date, check_out_date__gte=check_in_date)
-                )
-                #                 print("----------Hello------")
-                if conflicting_bookings.exists():
-                    return Response({"message": "Room is not available for the requested dates"},
+                if (check_out_date - check_in_date).days > max_stay_nights():
+                    return Response({"message": f"At most {max_stay_nights()} nights per stay"},
                                     status=status.HTTP_400_BAD_REQUEST)
-                #                 print("------AFter conflict---")
-                total_days = (check_out_date - check_in_date).days
-                total_price = total_days * room.price_per_night
+                total_price = pricing.stay_prices(room.hotel_id_id, [room], [check_in_date], [check_out_date])[0]
         #                 print("------AFter conflict---")
         except ValueError:
             return Response({"message": "Please enter all data"}, status=status.HTTP_400_BAD_REQUEST)
@@ -253,16 +327,18 @@ class CustomBookingView(APIView):
         #         print("------AFter conflict---")
         serializer = CustomBookSerializer(data=booking_data)
         serializer.is_valid(raise_exception=True)
-        #         print("------AFter conflict--------------------")
-        room.is_available = False
-        room.save()
-        serializer.save()
+        # The conflict check, the room update and the insert run together under the room's lock.
+        try:
+            create_booking(serializer.validated_data)
+        except BookingConflict:
+            return Response({"message": "Room is not available for the requested dates"},
+                            status=status.HTTP_400_BAD_REQUEST)
         return Response({"message": "Room book Successfully"}, status=status.HTTP_200_OK)
 
     def delete(self, request, pk):
         try:
-            booking = Booking.objects.get(id=pk)
-            print(booking)
+            # The delete signals look up the booking's hotel through its room.
+            booking = Booking.objects.select_related('room_id').get(id=pk)
             booking.delete()
         except ObjectDoesNotExist:
             return Response({"message": "There is no booking for this room"}, status=status.HTTP_400_BAD_REQUEST)
@@ -273,6 +349,189 @@ class CustomBookingView(APIView):
         return Response({"message": "Room booking canceled successfully"}, status=status.HTTP_200_OK)
 
 
+class BulkBookingView(APIView):
+    """
+    Book several rooms of a hotel in one request, for group and corporate reservations.
+
+    ``mode`` is ``all_or_nothing`` (default), where one bad stay rejects the
+    whole request, or ``partial``, where the valid stays are booked and the
+    others are reported back by their position in ``bookings``.
+    """
+
+    def post(self, request, pk):
+        serializer = BulkBookingSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        partial = serializer.validated_data['mode'] == 'partial'
+
+        items, errors = {}, {}
+        for index, item in enumerate(serializer.validated_data['bookings']):
+            item_serializer = BulkBookingItemSerializer(data=item)
+            if item_serializer.is_valid():
+                items[index] = item_serializer.validated_data
+            else:
+                errors[index] = item_serializer.errors
+        if errors and not partial:
+            return Response({"message": "No rooms were booked", "errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        if items:
+            try:
+                validate_span(items.values())
+            except ValidationError as exc:
+                return Response({"message": "No rooms were booked", "errors": exc.detail},
+                                status=status.HTTP_400_BAD_REQUEST)
+        try:
+            created, conflicts = create_bookings(pk, items, partial=partial)
+        except BulkBookingFailed as exc:
+            return Response({"message": "No rooms were booked", "errors": exc.errors},
+                            status=status.HTTP_400_BAD_REQUEST)
+        errors.update(conflicts)
+        bookings = [{"index": index, "id": booking.id, "room_id": booking.room_id_id,
+                     "total_price": booking.total_price} for index, booking in sorted(created.items())]
+        return Response({"message": f"{len(bookings)} rooms booked", "bookings": bookings, "errors": errors},
+                        status=status.HTTP_201_CREATED if bookings else status.HTTP_400_BAD_REQUEST)
+
+
+class CityAvailabilityView(APIView):
+    """
+    Free rooms of every hotel in a city for a stay, e.g.
+    ``?city=Pune&check_in_date=2026-11-01&check_out_date=2026-11-03&room_type=Suite&max_price=4000``.
+
+    Streams one ``{"hotel": ..., "rooms": [...]}`` group per hotel, cheapest
+    hotels first, as a JSON array or as NDJSON (``?format=ndjson``).
+    """
+    renderer_classes = APIView.renderer_classes + [NDJSONRenderer]
+
+    def get(self, request):
+        serializer = CityAvailabilitySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        rooms = search.free_rooms(params['city'], params['check_in_date'], params['check_out_date'],
+                                  params.get('room_type'), params.get('max_price'))
+        return stream(self.groups(rooms), ndjson=request.accepted_renderer.format == 'ndjson', filename=None)
+
+    @staticmethod
+    def groups(rooms):
+        hotel_serializer, room_serializer = HotelSerializer(), FreeRoomSerializer()
+        group = None
+        for room in rooms.iterator(chunk_size=2000):
+            if group is None or group['hotel']['id'] != room.hotel_id_id:
+                if group is not None:
+                    yield group
+                group = {'hotel': hotel_serializer.to_representation(room.hotel_id), 'rooms': []}
+            group['rooms'].append(room_serializer.to_representation(room))
+        if group is not None:
+            yield group
+
+
+class QuoteView(APIView):
+    """
+    Price every available room of a hotel for several candidate stays at once.
+
+    Prices come from ``authapi.pricing``, the same engine the booking views
+    charge with.
+    """
+
+    def post(self, request, pk):
+        serializer = QuoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        stays = [(stay['check_in_date'], stay['check_out_date']) for stay in serializer.validated_data['stays']]
+        hotel_rooms = Room.objects.filter(hotel_id=pk).order_by('id')
+        if 'room_type' in serializer.validated_data:
+            hotel_rooms = hotel_rooms.filter(room_type=serializer.validated_data['room_type'])
+        hotel_rooms = list(hotel_rooms)
+        totals = pricing.quote_rooms(pk, hotel_rooms, stays)
+
+        quotes = []
+        for column, (check_in_date, check_out_date) in enumerate(stays):
+            booked = availability.engine.booked_room_ids(pk, check_in_date, check_out_date)
+            quotes.append({
+                "check_in_date": check_in_date,
+                "check_out_date": check_out_date,
+                "nights": (check_out_date - check_in_date).days,
+                "rooms": [{"id": room.id, "room_no": room.room_no, "room_type": room.room_type,
+                           "total_price": int(totals[row, column])}
+                          for row, room in enumerate(hotel_rooms) if room.id not in booked],
+            })
+        return Response({"stays": quotes}, status=status.HTTP_200_OK)
+
+
+class RateRuleView(APIView):
+    permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
+
+    def get(self, request, pk):
+        rules = RateRule.objects.filter(hotel_id=pk).order_by('priority', 'id')
+        return Response(RateRuleSerializer(rules, many=True).data, status=status.HTTP_200_OK)
+
+    def post(self, request, pk):
+        hotel = get_object_or_404(Hotel, pk=pk)
+        serializer = RateRuleSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(hotel_id=hotel)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class HotelAnalyticsView(APIView):
+    """
+    Daily occupancy, ADR and revenue of a hotel for the nights from ``?start=`` up to the night before ``?end=``.
+    """
+    permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
+
+    def get(self, request, pk):
+        serializer = AnalyticsRangeSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        hotel = get_object_or_404(Hotel, pk=pk)
+        start, end = serializer.validated_data['start'], serializer.validated_data['end']
+        return Response({"hotel": hotel.id, "start": start, "end": end,
+                         **analytics.occupancy(hotel.id, start, end)}, status=status.HTTP_200_OK)
+
+
+class CacheStatsView(APIView):
+    permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
+
+    def get(self, request):
+        return Response({**hotel_cache.stats, "hit_ratio": hotel_cache.hit_ratio(),
+                         "local_entries": len(hotel_cache.local)}, status=status.HTTP_200_OK)
+
+
+class MetricsView(APIView):
+    """
+    Request metrics of this process in the Prometheus text format, see ``authapi.metrics``.
+    """
+    permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
+    renderer_classes = [PrometheusRenderer]
+
+    def get(self, request):
+        return Response(metrics.registry.render(), status=status.HTTP_200_OK)
+
+
+class ProfilingTokenView(APIView):
+    """
+    A signed token that has requests profiled when sent as ``X-Profile`` or ``?profile=``, see
+    ``authapi.profiling``.
+    """
+    permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
+
+    def post(self, request):
+        return Response({'token': profiling.make_token(request.user), 'header': 'X-Profile',
+                         'expires_in': settings.PROFILING_TOKEN_MAX_AGE}, status=status.HTTP_201_CREATED)
+
+
+class RequestProfileView(APIView):
+    """
+    A stored profile with the SQL of its request, ``?download=1`` for the pstats or speedscope file itself.
+    """
+    permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
+
+    def get(self, request, pk):
+        try:
+            meta = profiling.load(pk)
+        except FileNotFoundError:
+            raise Http404
+        if request.query_params.get('download'):
+            return FileResponse(open(profiling.path(meta), 'rb'), as_attachment=True, filename=meta['file'])
+        return Response(meta, status=status.HTTP_200_OK)
+
+
 # class HotelRoomView(APIView):
 #
 #     def get(self, request, pk):
@@ -306,21 +565,106 @@ class CustomBookingView(APIView):
 
 
 class RoomsBookingView(APIView):
+    renderer_classes = APIView.renderer_classes + [NDJSONRenderer]
+
+    @conditional(hotel_bookings_etag, hotel_bookings_last_modified)
+    @replica_reads(hotel_written)
     def get(self, request, pk):
         try:
             all = request.query_params.get('all')
             bookings = request.query_params.get('booking')
             today = request.query_params.get('today')
-            print(all)
+            paginator = KeysetPagination()
             if all:
                 data = Room.objects.filter(hotel_id=pk)
+                page = paginator.paginate_queryset(data, request, view=self)
+                if page is not None:
+                    return paginator.get_paginated_response(RoomAddSerilizer(page, many=True).data)
                 serializer = RoomAddSerilizer(data, many=True)
                 return Response(serializer.data, status=status.HTTP_200_OK)
-            if bookings:
-                data = Booking.objects.filter(room_id__hotel_id=pk)
-            if today:
-                data = Booking.objects.filter(check_in_date=timezone.now().date())
+            data = self.booking_queryset(pk, bookings, today)
+            ndjson = request.accepted_renderer.format == 'ndjson'
+            if ndjson or request.query_params.get('stream'):
+                # Exports can be the whole booking history, stream them instead of building one big list.
+                # The body is read after this returns, keep it on the database routed to now.
+                return streaming_response(data.using(data.db).order_by('id'), CustomBookViewSerializer,
+                                          ndjson=ndjson)
+            page = paginator.paginate_queryset(data, request, view=self)
+            if page is not None:
+                return paginator.get_paginated_response(CustomBookViewSerializer(page, many=True).data)
             serializer = CustomBookViewSerializer(data, many=True)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except ValueError:
             raise Response({"message": "Sorry no bookings available!"}, status=status.HTTP_306_RESERVED)
+
+    @staticmethod
+    def booking_queryset(pk, bookings, today):
+        if bookings:
+            data = Booking.objects.filter(room_id__hotel_id=pk)
+        if today:
+            data = Booking.objects.filter(check_in_date=timezone.now().date())
+        return data.select_related('room_id')
+
+
+class AsyncHotelView(AsyncAPIView):
+    """
+    Read side of HotelView on the async ORM, for ASGI deployments.
+    """
+
+    @conditional(hotel_list_etag)
+    async def get(self, request):
+        data = await hotel_cache.ahotel_list(request, lambda: self.list_hotels(request))
+        return Response(data, status=status.HTTP_200_OK)
+
+    async def list_hotels(self, request):
+        data = HotelView.hotel_queryset(request)
+        paginator = KeysetPagination()
+        page = await paginator.apaginate_queryset(data, request, view=self)
+        if page is not None:
+            return paginator.get_paginated_response(HotelSerializer(page, many=True).data).data
+        return HotelSerializer([hotel async for hotel in data], many=True).data
+
+
+class AsyncSingleHotelView(AsyncAPIView):
+    @conditional(hotel_etag, hotel_last_modified)
+    async def get(self, request, pk):
+        data = await hotel_cache.ahotel(pk, await hotel_versions.aget(pk), lambda: self.hotel(pk))
+        return Response(data, status=status.HTTP_200_OK)
+
+    @staticmethod
+    async def hotel(pk):
+        return HotelSerializer(await Hotel.objects.aget(pk=pk)).data
+
+
+class AsyncRoomsAvailableView(AsyncAPIView):
+    async def post(self, request, pk):
+        check_in_date, check_out_date, error = RoomsAvailableView.parse_stay(request)
+        if error is not None:
+            return error
+        booked_room_ids = await availability.engine.abooked_room_ids(pk, check_in_date, check_out_date)
+        available_rooms = [room async for room in RoomsAvailableView.available_rooms(pk, booked_room_ids)]
+        serializer = RoomsAvailableSerializer(available_rooms, many=True, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class AsyncRoomsBookingView(AsyncAPIView):
+    renderer_classes = RoomsBookingView.renderer_classes
+
+    @conditional(hotel_bookings_etag, hotel_bookings_last_modified)
+    async def get(self, request, pk):
+        paginator = KeysetPagination()
+        if request.query_params.get('all'):
+            data = Room.objects.filter(hotel_id=pk)
+            serializer_class = RoomAddSerilizer
+        else:
+            data = RoomsBookingView.booking_queryset(pk, request.query_params.get('booking'),
+                                                     request.query_params.get('today'))
+            serializer_class = CustomBookViewSerializer
+            ndjson = request.accepted_renderer.format == 'ndjson'
+            if ndjson or request.query_params.get('stream'):
+                return astreaming_response(data.order_by('id'), serializer_class, ndjson=ndjson)
+        page = await paginator.apaginate_queryset(data, request, view=self)
+        if page is not None:
+            return paginator.get_paginated_response(serializer_class(page, many=True).data)
+        serializer = serializer_class([instance async for instance in data], many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
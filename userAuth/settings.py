@@ -43,11 +43,36 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authapi.authentication.CachedJWTAuthentication',
     )
 }
 
+# Longest stay a booking or quote may cover, every night of a booking is a RoomNight row
+MAX_STAY_NIGHTS = 365
+
+# On-demand request profiling for admins, see authapi.profiling. None stores profiles in the temp directory.
+PROFILING_DIR = None
+PROFILING_TOKEN_MAX_AGE = 600
+PROFILING_SAMPLE_INTERVAL = 0.001
+# Older profiles are deleted
+PROFILING_KEEP = 100
+
+# How long CachedJWTAuthentication keeps a resolved user
+USER_CACHE_TTL = 60
+
+# Thread pool of the async login/registration views, see authapi.hashing.
+# None means one worker per CPU and a backlog of 8 calls per worker.
+PASSWORD_HASHING_WORKERS = None
+PASSWORD_HASHING_BACKLOG = None
+
+# Keyset pagination (?cursor= / ?page_size=), see authapi.pagination
+PAGINATION_PAGE_SIZE = 50
+PAGINATION_MAX_PAGE_SIZE = 500
+
 MIDDLEWARE = [
+    # First, so its latency covers the other middleware too
+    "authapi.middleware.metrics_middleware",
+    "authapi.middleware.profiling_middleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -56,6 +81,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "authapi.middleware.replica_pin_middleware",
 ]
 
 ROOT_URLCONF = "userAuth.urls"
@@ -85,9 +111,55 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Keep connections (and the pragmas set on them) across requests
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
+    },
+    # A read replica. Locally a copy of db.sqlite3 refreshed with ``manage.py sync_replicas``,
+    # tests read it through the default database.
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db.replica.sqlite3",
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
+        "TEST": {"MIRROR": "default"},
+    },
+}
+
+# Run on every new SQLite connection, see authapi.dbprofile. WAL lets HotelView readers carry on
+# while a booking commits, busy_timeout makes writers queue for the write lock instead of failing
+# with "database is locked". Set to {} for SQLite's defaults.
+# journal_mode is written into the database file, it is only applied with SQLITE_PRODUCTION_PROFILE.
+SQLITE_PRODUCTION_PROFILE = False
+SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    # Durable at checkpoints rather than at every commit, safe against corruption in WAL mode
+    "synchronous": "normal",
+    "mmap_size": 256 * 1024 * 1024,
+    # Negative sizes are KiB, so 64 MiB of page cache per connection
+    "cache_size": -64 * 1024,
+    "busy_timeout": 5000,
+}
+
+# Read-only views read from these aliases, see authapi.routers. Empty keeps everything on default.
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ["authapi.routers.PrimaryReplicaRouter"]
+# How long a client stays on the primary after a write, and how long data counts as freshly written
+DATABASE_REPLICA_STICKY_SECONDS = 5
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "hotelapi",
     }
 }
 
+# Hotel catalog cache, see authapi.cache
+HOTEL_CACHE_ALIAS = "default"
+HOTEL_CACHE_TTL = 300
+HOTEL_CACHE_LOCAL_TTL = 5
+HOTEL_CACHE_LOCAL_SIZE = 1024
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 